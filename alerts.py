@@ -0,0 +1,67 @@
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+
+from pivot_engine import LEVEL_KEYS
+
+# tick_time is the exchange timestamp of the tick that fired the alert (None
+# for polled prices); created_at is the wall-clock time the alert was raised.
+# timeframe is the pivot timeframe of the level ('1Day', '1Week', '1Month').
+# direction is the price's side of the level, as in LevelHit. motion ('up',
+# 'down' or None if flat), velocity ($/second) and action (see
+# tick_history.Motion) come from the symbol's recent ticks and are None
+# without a TickHistory.
+Alert = namedtuple('Alert', ['symbol', 'level', 'level_value', 'price', 'direction', 'crossed',
+                             'tick_time', 'created_at', 'timeframe', 'velocity', 'action', 'motion'],
+                   defaults=('1Day', None, None, None))
+
+
+def parse_tick_time(value):
+    """Parse an RFC 3339 stream timestamp (nanosecond precision is truncated) into an aware datetime"""
+    if not value:
+        return None
+    return datetime.fromisoformat(value)
+
+
+class AlertEngine:
+    """
+    Turns level hits into alerts, at most one per (symbol, timeframe, level)
+    per cooldown.
+
+    `sink(alert)` delivers the alert; if it returns False the alert was not
+    delivered and the cooldown is released so the next hit can try again.
+    With a TickHistory, the alert also carries the price's actual movement
+    over the last `motion_window` seconds, its speed and a bounce/break
+    classification.
+    """
+
+    def __init__(self, book, cooldowns, sink, clock=time.time, history=None, motion_window=60.0):
+        self.book = book
+        self.history = history
+        self.motion_window = motion_window
+        self.cooldowns = cooldowns
+        self.sink = sink
+        self.clock = clock
+        self.alerts = 0
+        self.suppressed = 0
+
+    def on_hit(self, symbol, price, hit, tick_time=None):
+        key = (self.book.slot(symbol), LEVEL_KEYS[(hit.timeframe, hit.name)])
+        if not self.cooldowns.allow(key):
+            self.suppressed += 1
+            return None
+
+        motion = None
+        if self.history is not None:
+            motion = self.history.motion(symbol, hit.value, self.motion_window)
+        alert = Alert(symbol, hit.name, hit.value, price, hit.direction, hit.crossed,
+                      parse_tick_time(tick_time),
+                      datetime.fromtimestamp(self.clock(), timezone.utc), hit.timeframe,
+                      motion.velocity if motion is not None else None,
+                      motion.action if motion is not None else None,
+                      motion.direction if motion is not None else None)
+        if self.sink(alert) is False:
+            self.cooldowns.discard(key)
+            return None
+        self.alerts += 1
+        return alert
@@ -0,0 +1,299 @@
+"""
+Headless backtest: replay cached minute bars through the live crossing and
+cooldown logic to see how many alerts a setting would have produced.
+
+    python backtest.py fetch --symbols AAPL,MSFT --start 2024-01-01 --end 2024-12-31
+    python backtest.py run --symbols AAPL,MSFT --threshold 0.05 --cooldown 300
+    python backtest.py synth --symbols 500 --days 252   # synthetic cache for load testing
+
+Bars are cached per symbol as compressed NumPy columns in BACKTEST_CACHE
+(default cache/bars). Daily pivots come from the previous session's bars via
+pivot_engine, and every minute close is replayed through LevelBook and
+AlertEngine on a simulated clock, so cooldowns behave exactly as they would
+live, only without waiting.
+"""
+import argparse
+import asyncio
+import csv
+import os
+import sys
+import time
+import zlib
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+from alerts import AlertEngine
+from cooldown import CooldownStore
+from level_index import LevelBook
+from market_data import AlpacaDataClient
+from pivot_engine import PIVOT_METHODS, compute_pivots, levels_to_dict
+
+load_dotenv()
+
+CACHE_DIR = os.getenv('BACKTEST_CACHE', 'cache/bars')
+MARKET_TZ = 'America/New_York'
+MARKET_ZONE = ZoneInfo(MARKET_TZ)
+BAR_COLUMNS = ('t', 'o', 'h', 'l', 'c', 'v')
+SESSION_OPEN_MINUTE = 9 * 60 + 30
+SESSION_CLOSE_MINUTE = 16 * 60
+
+
+class SimulatedClock:
+    """Clock whose time only moves when the replay sets `now` (unix seconds)"""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def cache_path(cache_dir, symbol):
+    return os.path.join(cache_dir, f"{symbol}.npz")
+
+
+def save_bars(cache_dir, symbol, bars):
+    """Write {column: array} minute bars for one symbol; `t` is bar start in unix seconds"""
+    os.makedirs(cache_dir, exist_ok=True)
+    np.savez_compressed(cache_path(cache_dir, symbol), **{k: bars[k] for k in BAR_COLUMNS})
+
+
+def load_bars(cache_dir, symbol):
+    with np.load(cache_path(cache_dir, symbol)) as data:
+        return {k: data[k] for k in BAR_COLUMNS}
+
+
+def bars_to_columns(raw_bars):
+    """Convert Alpaca bar dicts into sorted column arrays"""
+    t = pd.to_datetime([b['t'] for b in raw_bars], utc=True).astype('int64') // 10**9
+    columns = {'t': np.asarray(t, dtype=np.int64)}
+    for key in ('o', 'h', 'l', 'c', 'v'):
+        columns[key] = np.array([b[key] for b in raw_bars], dtype=np.float64)
+    order = np.argsort(columns['t'], kind='stable')
+    return {k: v[order] for k, v in columns.items()}
+
+
+async def fetch_to_cache(client, symbols, start, end, cache_dir, symbols_per_batch=20):
+    """Download minute bars month by month so only one batch is ever held as dicts"""
+    months = pd.date_range(start, end, freq='MS').union([pd.Timestamp(start)])
+    edges = [d.date() for d in months] + [end + timedelta(days=1)]
+    for i in range(0, len(symbols), symbols_per_batch):
+        batch = symbols[i:i + symbols_per_batch]
+        parts = defaultdict(list)
+        for month_start, month_end in zip(edges, edges[1:]):
+            raw = await client.get_bars(batch, '1Min', month_start.isoformat(),
+                                        (month_end - timedelta(days=1)).isoformat())
+            for symbol, symbol_bars in raw.items():
+                parts[symbol].append(bars_to_columns(symbol_bars))
+        for symbol, chunks in parts.items():
+            save_bars(cache_dir, symbol, {k: np.concatenate([c[k] for c in chunks]) for k in BAR_COLUMNS})
+        print(f"💾 Cached {min(i + symbols_per_batch, len(symbols))}/{len(symbols)} symbols")
+
+
+def session_index(t, regular_hours=True):
+    """
+    Map bar timestamps to trading sessions.
+
+    Returns (mask of bars to keep, session number per kept bar, session dates).
+    """
+    local = pd.to_datetime(t, unit='s', utc=True).tz_convert(MARKET_TZ)
+    keep = np.ones(len(t), dtype=bool)
+    if regular_hours:
+        minute = np.asarray(local.hour * 60 + local.minute)
+        keep = (minute >= SESSION_OPEN_MINUTE) & (minute < SESSION_CLOSE_MINUTE)
+    days = np.asarray(local.normalize().tz_localize(None).values.astype('datetime64[D]'))[keep]
+    session_dates, sessions = np.unique(days, return_inverse=True)
+    return keep, sessions, session_dates
+
+
+def session_pivots(bars, sessions, session_count, method):
+    """Pivot levels for every session, computed from the previous session's O/H/L/C"""
+    starts = np.r_[0, np.flatnonzero(np.diff(sessions)) + 1]
+    ends = np.r_[starts[1:], len(sessions)]
+    high = np.maximum.reduceat(bars['h'], starts)
+    low = np.minimum.reduceat(bars['l'], starts)
+    close = bars['c'][ends - 1]
+    open_ = bars['o'][starts]
+    levels = np.full((session_count, 7), np.nan)
+    levels[1:] = compute_pivots(high[:-1], low[:-1], close[:-1], method, open_[:-1])
+    return levels
+
+
+def candidate_ticks(prices, tick_levels, sessions, threshold):
+    """
+    Indexes of the ticks that can leave a symbol's no-op band: the first tick
+    of each session, ticks within `threshold` of a level and ticks whose
+    position among the levels differs from the previous tick. Every other
+    tick is provably inside the band LevelIndex would have cached, so it is
+    skipped without changing the result.
+    """
+    with np.errstate(invalid='ignore'):
+        near = np.nanmin(np.abs(tick_levels - prices[:, None]), axis=1) < threshold
+        gap = (tick_levels <= prices[:, None]).sum(axis=1)
+    new_session = np.r_[True, sessions[1:] != sessions[:-1]]
+    moved = np.r_[True, gap[1:] != gap[:-1]]
+    return np.flatnonzero(near | moved | new_session)
+
+
+def replay_symbol(symbol, bars, book, engine, clock, threshold, method, regular_hours=True):
+    """Replay one symbol's minute closes; returns the number of bars replayed"""
+    keep, sessions, session_dates = session_index(bars['t'], regular_hours)
+    bars = {k: v[keep] for k, v in bars.items()}
+    if len(session_dates) < 2:
+        return 0
+    levels = session_pivots(bars, sessions, len(session_dates), method)
+
+    # The first session has no previous day to derive pivots from
+    active = sessions > 0
+    sessions = sessions[active]
+    prices = bars['c'][active]
+    tick_times = bars['t'][active] + 60  # a minute bar's close is known at its end
+    armed_session = -1
+    for i in candidate_ticks(prices, levels[sessions], sessions, threshold).tolist():
+        session = sessions[i]
+        if session != armed_session:
+            book.arm(symbol, levels_to_dict(levels[session]))
+            armed_session = session
+        clock.now = float(tick_times[i])
+        price = float(prices[i])
+        hit = book.check(symbol, price)
+        if hit is not None:
+            engine.on_hit(symbol, price, hit)
+    return len(prices)
+
+
+def run_backtest(symbols, cache_dir, threshold, cooldown, method, regular_hours=True):
+    """Replay every cached symbol; returns (alerts, bars replayed, symbols without a cache)"""
+    clock = SimulatedClock()
+    book = LevelBook(threshold)
+    alerts = []
+    engine = AlertEngine(book, CooldownStore(cooldown, clock=clock), alerts.append, clock=clock)
+    replayed = 0
+    missing = []
+    for symbol in symbols:
+        if not os.path.exists(cache_path(cache_dir, symbol)):
+            missing.append(symbol)
+            continue
+        replayed += replay_symbol(symbol, load_bars(cache_dir, symbol), book, engine, clock,
+                                  threshold, method, regular_hours)
+        book.disarm(symbol)
+    return alerts, replayed, missing
+
+
+def summarize(alerts, top=25):
+    by_level = defaultdict(list)
+    for alert in alerts:
+        by_level[(alert.symbol, alert.level)].append(alert.created_at)
+
+    print(f"\n🎯 {len(alerts):,} alerts across {len({a.symbol for a in alerts})} symbols")
+    level_totals = Counter(alert.level for alert in alerts)
+    print("📊 By level: " + ", ".join(f"{level} {count:,}" for level, count in level_totals.most_common()))
+
+    hours = Counter(a.created_at.astimezone(MARKET_ZONE).hour for a in alerts)
+    print("⏰ By hour (ET): " + ", ".join(f"{h:02d}h {hours[h]:,}" for h in sorted(hours)))
+
+    print(f"\n{'Symbol':<8} {'Level':<6} {'Alerts':>7}  {'First':<20} {'Last':<20}")
+    ranked = sorted(by_level.items(), key=lambda item: -len(item[1]))
+    for (symbol, level), times in ranked[:top]:
+        print(f"{symbol:<8} {level:<6} {len(times):>7}  {min(times):%Y-%m-%d %H:%M}Z{'':<3} {max(times):%Y-%m-%d %H:%M}Z")
+
+
+def write_alerts(path, alerts):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['time', 'symbol', 'level', 'level_value', 'price', 'direction', 'crossed'])
+        for a in alerts:
+            writer.writerow([a.created_at.isoformat(), a.symbol, a.level, f"{a.level_value:.4f}",
+                             f"{a.price:.4f}", a.direction, a.crossed])
+
+
+def synthetic_bars(symbol, start, days, seed=0):
+    """Random-walk regular-hours minute bars for `days` weekdays starting at `start`"""
+    rng = np.random.default_rng([zlib.crc32(symbol.encode()), seed])
+    sessions = []
+    day = start
+    while len(sessions) < days:
+        if day.weekday() < 5:
+            sessions.append(day)
+        day += timedelta(days=1)
+    opens = pd.DatetimeIndex([pd.Timestamp(d.isoformat() + ' 09:30', tz=MARKET_TZ) for d in sessions])
+    t = (opens.asi8 // 10**9)[:, None] + np.arange(390)[None, :] * 60
+    t = t.ravel()
+    close = rng.uniform(20, 400) * np.exp(np.cumsum(rng.normal(0, 0.0008, len(t))))
+    spread = np.abs(rng.normal(0, 0.0004, len(t))) * close
+    return {'t': t.astype(np.int64), 'o': np.r_[close[0], close[:-1]], 'h': close + spread,
+            'l': close - spread, 'c': close, 'v': rng.integers(100, 10000, len(t)).astype(np.float64)}
+
+
+def parse_symbols(value, cache_dir):
+    if value:
+        return [s.strip().upper() for s in value.split(',') if s.strip()]
+    return sorted(f[:-4] for f in os.listdir(cache_dir) if f.endswith('.npz'))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest pivot alerts on cached minute bars")
+    parser.add_argument('--cache', default=CACHE_DIR, help="minute bar cache directory")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    fetch = commands.add_parser('fetch', help="download minute bars into the cache")
+    fetch.add_argument('--symbols', required=True)
+    fetch.add_argument('--start', required=True, type=date.fromisoformat)
+    fetch.add_argument('--end', default=(datetime.now(timezone.utc).date() - timedelta(days=1)).isoformat(),
+                       type=date.fromisoformat)
+
+    run = commands.add_parser('run', help="replay the cache through the alert logic")
+    run.add_argument('--symbols', help="comma-separated symbols (default: everything cached)")
+    run.add_argument('--threshold', type=float, default=float(os.getenv('CROSSING_THRESHOLD', '0.01')))
+    run.add_argument('--cooldown', type=float, default=float(os.getenv('ALERT_COOLDOWN', '300')))
+    run.add_argument('--method', default=os.getenv('PIVOT_METHOD', 'traditional'), choices=PIVOT_METHODS)
+    run.add_argument('--extended-hours', action='store_true', help="also replay pre/post-market bars")
+    run.add_argument('--alerts-out', help="write every alert to this CSV file")
+    run.add_argument('--top', type=int, default=25, help="symbol/level rows to print")
+
+    synth = commands.add_parser('synth', help="fill the cache with synthetic bars")
+    synth.add_argument('--symbols', type=int, default=500)
+    synth.add_argument('--days', type=int, default=252)
+    synth.add_argument('--start', default='2024-01-02', type=date.fromisoformat)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'fetch':
+        api_key = os.getenv('ALPACA_API_KEY')
+        api_secret = os.getenv('ALPACA_API_SECRET')
+        if not api_key or not api_secret:
+            raise ValueError("ALPACA_API_KEY and ALPACA_API_SECRET environment variables are required")
+
+        async def fetch_all():
+            async with AlpacaDataClient(api_key, api_secret) as client:
+                await fetch_to_cache(client, parse_symbols(args.symbols, args.cache), args.start, args.end, args.cache)
+        asyncio.run(fetch_all())
+
+    elif args.command == 'synth':
+        for i in range(args.symbols):
+            save_bars(args.cache, f"SYN{i}", synthetic_bars(f"SYN{i}", args.start, args.days))
+        print(f"💾 Wrote {args.symbols} synthetic symbols x {args.days} sessions to {args.cache}")
+
+    else:
+        symbols = parse_symbols(args.symbols, args.cache)
+        started = time.perf_counter()
+        alerts, replayed, missing = run_backtest(symbols, args.cache, args.threshold, args.cooldown,
+                                                 args.method, not args.extended_hours)
+        elapsed = time.perf_counter() - started
+        if missing:
+            print(f"⚠️ No cached bars for: {', '.join(missing)} (run `backtest.py fetch` first)")
+        print(f"🧪 Replayed {replayed:,} minute bars for {len(symbols) - len(missing)} symbols in {elapsed:.1f}s "
+              f"(threshold ${args.threshold}, cooldown {args.cooldown:g}s, {args.method} pivots)")
+        summarize(alerts, args.top)
+        if args.alerts_out:
+            write_alerts(args.alerts_out, alerts)
+            print(f"\n💾 Wrote {len(alerts):,} alerts to {args.alerts_out}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
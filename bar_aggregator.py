@@ -0,0 +1,200 @@
+import threading
+import time
+from array import array
+from collections import namedtuple
+from datetime import datetime, timezone
+
+import numpy as np
+
+from trading_calendar import MARKET_TZ
+
+Bar = namedtuple('Bar', ['start', 'open', 'high', 'low', 'close', 'volume'])
+
+# Bar spans in minutes
+BAR_TIMEFRAMES = {'1Min': 1, '5Min': 5}
+# Bars kept per symbol: an hour of 1-minute bars, a full regular session of 5-minute bars
+BAR_HISTORY = {'1Min': 60, '5Min': 78}
+
+_OPEN, _HIGH, _LOW, _CLOSE, _VOLUME = range(5)
+
+
+class BarAggregator:
+    """
+    Intraday OHLCV bars and session VWAP per symbol, built from stream ticks.
+
+    Every timeframe keeps a fixed ring of `history[timeframe]` bars per
+    symbol in preallocated arrays: `_numbers` holds each ring slot's bar
+    number (epoch minutes // span, -1 = empty) and `_ohlcv` its open, high,
+    low, close and volume. A tick updates the current bar in place or starts
+    the next one over the oldest slot, so memory per symbol is fixed however
+    long the session runs (about 6.6 KB with the default history). The tick
+    path writes through flat memoryviews of the arrays, which index several
+    times faster than numpy scalars.
+
+    VWAP accumulates price x size over the market day of the tick and restarts
+    with the first tick of the next day. Ticks are bucketed by their exchange
+    timestamp; each minute's timestamp prefix is parsed once.
+    """
+
+    def __init__(self, capacity=64, history=BAR_HISTORY, clock=time.time):
+        self.timeframes = tuple(history)
+        self.spans = tuple(BAR_TIMEFRAMES[timeframe] for timeframe in self.timeframes)
+        self.sizes = tuple(history[timeframe] for timeframe in self.timeframes)
+        self.clock = clock
+        self.ticks = 0
+        self.late = 0
+        self._slots = {}
+        self._symbols = []
+        self._minutes = {}  # 'YYYY-MM-DDTHH:MM' -> (epoch minute, market day ordinal)
+        self._lock = threading.Lock()
+        self._numbers = [np.full((capacity, size), -1, dtype=np.int64) for size in self.sizes]
+        self._ohlcv = [np.zeros((capacity, size, 5)) for size in self.sizes]
+        self._current = [np.full(capacity, -1, dtype=np.int64) for _ in self.sizes]
+        self._pv = np.zeros(capacity)
+        self._volume = np.zeros(capacity)
+        self._day = np.zeros(capacity, dtype=np.int32)
+        self._views()
+
+    def _views(self):
+        self._numbers_mv = [memoryview(a).cast('B').cast('q') for a in self._numbers]
+        self._ohlcv_mv = [memoryview(a).cast('B').cast('d') for a in self._ohlcv]
+        self._current_mv = [memoryview(a).cast('B').cast('q') for a in self._current]
+        self._pv_mv = memoryview(self._pv).cast('B').cast('d')
+        self._volume_mv = memoryview(self._volume).cast('B').cast('d')
+        self._day_mv = memoryview(self._day).cast('B').cast('i')
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, symbol):
+        return symbol in self._slots
+
+    @property
+    def nbytes(self):
+        arrays = self._numbers + self._ohlcv + self._current + [self._pv, self._volume, self._day]
+        return sum(array.nbytes for array in arrays)
+
+    def _slot(self, symbol):
+        slot = self._slots.get(symbol)
+        if slot is not None:
+            return slot
+        with self._lock:
+            slot = self._slots.get(symbol)
+            if slot is None:
+                slot = len(self._symbols)
+                if slot == len(self._pv):
+                    self._numbers = [np.concatenate([a, np.full_like(a, -1)]) for a in self._numbers]
+                    self._ohlcv = [np.concatenate([a, np.zeros_like(a)]) for a in self._ohlcv]
+                    self._current = [np.concatenate([a, np.full_like(a, -1)]) for a in self._current]
+                    self._pv = np.concatenate([self._pv, np.zeros(slot)])
+                    self._volume = np.concatenate([self._volume, np.zeros(slot)])
+                    self._day = np.concatenate([self._day, np.zeros(slot, dtype=np.int32)])
+                    self._views()
+                self._symbols.append(symbol)
+                self._slots[symbol] = slot
+            return slot
+
+    def _minute(self, tick_time):
+        """(epoch minute, market day ordinal) of an RFC 3339 UTC timestamp, or of now if there is none"""
+        if not tick_time or not tick_time.endswith('Z'):
+            moment = datetime.fromisoformat(tick_time) if tick_time else datetime.fromtimestamp(self.clock(),
+                                                                                                timezone.utc)
+            return int(moment.timestamp() // 60), moment.astimezone(MARKET_TZ).date().toordinal()
+        key = tick_time[:16]
+        cached = self._minutes.get(key)
+        if cached is None:
+            if len(self._minutes) > 4096:
+                self._minutes.clear()
+            moment = datetime.fromisoformat(key).replace(tzinfo=timezone.utc)
+            cached = self._minutes[key] = (int(moment.timestamp() // 60),
+                                           moment.astimezone(MARKET_TZ).date().toordinal())
+        return cached
+
+    def add(self, symbol, price, size=0, tick_time=None):
+        """Fold one tick into the symbol's bars and VWAP (size 0 for quotes: prices only)"""
+        minute, day = self._minute(tick_time)
+        slot = self._slot(symbol)
+        self.ticks += 1
+        days = self._day_mv
+        if day != days[slot]:
+            if day < days[slot]:
+                self.late += 1
+                return
+            days[slot] = day
+            self._pv_mv[slot] = 0.0
+            self._volume_mv[slot] = 0.0
+        if size:
+            self._pv_mv[slot] += price * size
+            self._volume_mv[slot] += size
+
+        for t, span in enumerate(self.spans):
+            number = minute // span
+            size_t = self.sizes[t]
+            current = self._current_mv[t]
+            position = number % size_t
+            ohlcv = self._ohlcv_mv[t]
+            base = (slot * size_t + position) * 5
+            if number == current[slot]:
+                if price > ohlcv[base + _HIGH]:
+                    ohlcv[base + _HIGH] = price
+                elif price < ohlcv[base + _LOW]:
+                    ohlcv[base + _LOW] = price
+                ohlcv[base + _CLOSE] = price
+                ohlcv[base + _VOLUME] += size
+            elif number > current[slot]:
+                current[slot] = number
+                self._numbers_mv[t][slot * size_t + position] = number
+                ohlcv[base:base + 5] = array('d', (price, price, price, price, size))
+            elif self._numbers_mv[t][slot * size_t + position] == number:
+                # Late tick for an earlier bar still in the ring: extend its range, keep its close
+                ohlcv[base + _HIGH] = max(ohlcv[base + _HIGH], price)
+                ohlcv[base + _LOW] = min(ohlcv[base + _LOW], price)
+                ohlcv[base + _VOLUME] += size
+
+    def add_many(self, ticks):
+        """Fold (symbol, price, size, tick_time) tuples in arrival order"""
+        add = self.add
+        for symbol, price, size, tick_time in ticks:
+            add(symbol, price, size, tick_time)
+
+    def bars(self, symbol, timeframe='1Min', count=None):
+        """The symbol's bars in the ring, oldest first, the last one still forming; [] if none"""
+        slot = self._slots.get(symbol)
+        if slot is None:
+            return []
+        t = self.timeframes.index(timeframe)
+        numbers = self._numbers[t][slot]
+        valid = np.flatnonzero((numbers >= 0) & (numbers > self._current[t][slot] - self.sizes[t]))
+        order = valid[np.argsort(numbers[valid])]
+        if count:
+            order = order[-count:]
+        seconds = self.spans[t] * 60
+        ohlcv = self._ohlcv[t][slot]
+        return [Bar(datetime.fromtimestamp(int(numbers[i]) * seconds, timezone.utc), *ohlcv[i].tolist())
+                for i in order]
+
+    def bar(self, symbol, timeframe='1Min'):
+        """The bar currently forming (or the last one completed), or None"""
+        bars = self.bars(symbol, timeframe, count=1)
+        return bars[0] if bars else None
+
+    def vwap(self, symbol, now=None):
+        """Today's volume-weighted average price, or None before the first trade of the day"""
+        slot = self._slots.get(symbol)
+        if slot is None or not self._volume[slot]:
+            return None
+        moment = datetime.fromtimestamp(self.clock() if now is None else now, MARKET_TZ)
+        if self._day[slot] != moment.date().toordinal():
+            return None
+        return float(self._pv[slot] / self._volume[slot])
+
+    def forget(self, symbol):
+        """Drop a symbol's bars and VWAP; its slot is kept for reuse"""
+        slot = self._slots.get(symbol)
+        if slot is None:
+            return
+        for t in range(len(self.sizes)):
+            self._numbers[t][slot] = -1
+            self._current[t][slot] = -1
+        self._pv[slot] = self._volume[slot] = 0.0
+        self._day[slot] = 0
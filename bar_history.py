@@ -0,0 +1,115 @@
+import os
+import sqlite3
+import threading
+from datetime import date
+
+import numpy as np
+
+# Symbols bound per query, below SQLite's historical limit of 999 parameters
+SYMBOLS_PER_QUERY = 500
+
+
+def _symbol_chunks(symbols):
+    """Sorted, de-duplicated symbols in chunks of SYMBOLS_PER_QUERY, each with its placeholder list"""
+    symbols = sorted(set(symbols))
+    for i in range(0, len(symbols), SYMBOLS_PER_QUERY):
+        chunk = symbols[i:i + SYMBOLS_PER_QUERY]
+        yield chunk, ', '.join('?' * len(chunk))
+
+
+class DailyBarHistory:
+    """
+    Local per-symbol daily OHLC bars, appended incrementally each session.
+
+    Weekly and monthly pivots are aggregated from these bars, so they cost no
+    API calls once the history is filled. Bars live in a SQLite WITHOUT ROWID
+    table of (day ordinal, symbol, o, h, l, c), day-major so period scans read
+    one contiguous range; a (symbol, day) index serves lookups for a few
+    symbols, such as an on-demand load. A per-symbol coverage range records which days were
+    fetched, from the first requested day (so the days before a newly listed
+    symbol's first bar are not asked for again) through the last bar actually
+    returned (so a late, missing or not yet final bar is asked for again).
+    """
+
+    def __init__(self, path):
+        if path != ':memory:' and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+            self._db.execute('CREATE TABLE IF NOT EXISTS daily_bars (day INTEGER NOT NULL, symbol TEXT NOT NULL, '
+                             'o REAL, h REAL, l REAL, c REAL, PRIMARY KEY (day, symbol)) WITHOUT ROWID')
+            self._db.execute('CREATE INDEX IF NOT EXISTS daily_bars_symbol ON daily_bars (symbol, day)')
+            self._db.execute('CREATE TABLE IF NOT EXISTS coverage (symbol TEXT PRIMARY KEY, first INTEGER NOT NULL, '
+                             'through INTEGER NOT NULL) WITHOUT ROWID')
+
+    def append(self, bars_by_symbol, symbols, first, through):
+        """
+        Store raw daily bars ({symbol: [{'t', 'o', 'h', 'l', 'c'}, ...]})
+        fetched for `symbols` from the date `first` through `through`, and mark
+        each symbol as fetched from `first` through its last returned bar.
+        Symbols without a bar are not marked. The range must touch or overlap
+        what was fetched before. Returns the number of bars written.
+        """
+        rows = [(date.fromisoformat(bar['t'][:10]).toordinal(), symbol, bar['o'], bar['h'], bar['l'], bar['c'])
+                for symbol, bars in bars_by_symbol.items() for bar in bars]
+        first, through = first.toordinal(), through.toordinal()
+        last_bar = {}
+        for day, symbol, *_ in rows:
+            if first <= day <= through and day > last_bar.get(symbol, 0):
+                last_bar[symbol] = day
+        with self._lock, self._db:
+            self._db.executemany('INSERT OR REPLACE INTO daily_bars (day, symbol, o, h, l, c) VALUES (?, ?, ?, ?, ?, ?)',
+                                 rows)
+            self._db.executemany('INSERT INTO coverage (symbol, first, through) VALUES (?, ?, ?) '
+                                 'ON CONFLICT(symbol) DO UPDATE SET first = MIN(first, excluded.first), '
+                                 'through = MAX(through, excluded.through)',
+                                 [(symbol, first, last_bar[symbol]) for symbol in symbols if symbol in last_bar])
+        return len(rows)
+
+    def coverage(self, symbols):
+        """{symbol: (first, through)} dates of the fetched history, for the symbols that have any"""
+        rows = []
+        with self._lock:
+            for chunk, placeholders in _symbol_chunks(symbols):
+                rows += self._db.execute(f'SELECT symbol, first, through FROM coverage WHERE symbol IN ({placeholders})',
+                                         chunk).fetchall()
+        return {symbol: (date.fromordinal(first), date.fromordinal(through)) for symbol, first, through in rows}
+
+    def ohlc(self, symbols, first, last):
+        """
+        Aggregate each symbol's bars between the dates `first` and `last`
+        (inclusive) into one bar: first open, highest high, lowest low, last
+        close. Returns (symbols, open, high, low, close) for the symbols with
+        at least one bar in the range, as a list and float64 arrays.
+        """
+        rows = []
+        with self._lock:
+            # Chunks are in symbol order, so the concatenated rows stay sorted by (symbol, day)
+            for chunk, placeholders in _symbol_chunks(symbols):
+                rows += self._db.execute(f'SELECT symbol, day, o, h, l, c FROM daily_bars WHERE symbol IN ({placeholders}) '
+                                         'AND day BETWEEN ? AND ? ORDER BY symbol, day',
+                                         (*chunk, first.toordinal(), last.toordinal())).fetchall()
+        if not rows:
+            empty = np.empty(0)
+            return [], empty, empty, empty, empty
+        names = [row[0] for row in rows]
+        values = np.array([row[2:] for row in rows], dtype=np.float64)
+        starts = np.flatnonzero([True] + [a != b for a, b in zip(names, names[1:])])
+        ends = np.append(starts[1:], len(rows)) - 1
+        return ([names[i] for i in starts], values[starts, 0], np.maximum.reduceat(values[:, 1], starts),
+                np.minimum.reduceat(values[:, 2], starts), values[ends, 3])
+
+    def prune(self, before_day):
+        """Delete bars older than the date `before_day`; returns the number removed"""
+        before_day = before_day.toordinal()
+        with self._lock, self._db:
+            self._db.execute('UPDATE coverage SET first = ? WHERE first < ?', (before_day, before_day))
+            return self._db.execute('DELETE FROM daily_bars WHERE day < ?', (before_day,)).rowcount
+
+    def close(self):
+        with self._lock:
+            self._db.close()
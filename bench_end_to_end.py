@@ -0,0 +1,105 @@
+"""
+End-to-end load test of the ingest path against a local fake Alpaca stream.
+
+The fake stream runs in a child process; this process runs the same
+AlpacaStream -> TickPipeline -> LevelBook -> AlertEngine chain as main.py,
+with a DiscordSink recording alerts instead of Discord.
+
+Usage: python bench_end_to_end.py [--symbols 500] [--rate 20000] [--seconds 10]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import statistics
+
+from alerts import AlertEngine
+from cooldown import CooldownStore
+from fake_alpaca import DiscordSink, FakeAlpacaServer, base_price
+from level_index import LevelBook
+from pivot_engine import compute_pivots, levels_to_dict
+from stream import AlpacaStream
+from tick_pipeline import TickPipeline
+
+
+def symbol_universe(count):
+    return [f"SYM{i}" for i in range(count)]
+
+
+def run_fake_server(symbols, rate, ready):
+    async def serve():
+        server = await FakeAlpacaServer(symbols, rate=rate).start()
+        ready.put(server.port)
+        await asyncio.Future()
+
+    asyncio.run(serve())
+
+
+def arm_book(symbols, threshold, day_range):
+    """Arm pivots around each symbol's fake base price so the random walk keeps hitting levels"""
+    book = LevelBook(threshold)
+    close = [base_price(s) for s in symbols]
+    levels = compute_pivots([c * (1 + day_range) for c in close], [c * (1 - day_range) for c in close], close)
+    for symbol, row in zip(symbols, levels):
+        book.arm(symbol, levels_to_dict(row))
+    return book
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run_ingest(url, symbols, args):
+    book = arm_book(symbols, args.threshold, args.day_range)
+    sink = DiscordSink()
+    engine = AlertEngine(book, CooldownStore(args.cooldown), sink)
+    pipeline = TickPipeline(book, set(symbols), engine.on_hit)
+    stream = AlpacaStream('key', 'secret', symbols, pipeline.feed, url=url)
+
+    task = asyncio.create_task(stream.run())
+    while not stream.connected:
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(1)  # warm up
+    start_messages = pipeline.messages
+    start_alerts = len(sink.alerts)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    await asyncio.sleep(args.seconds)
+    elapsed = loop.time() - started
+    messages = pipeline.messages - start_messages
+    await stream.stop()
+    await task
+    return messages / elapsed, sink.latencies()[start_alerts:], len(sink.alerts) - start_alerts, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--rate', type=int, default=20000, help="offered quotes per second")
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--threshold', type=float, default=0.01)
+    parser.add_argument('--cooldown', type=float, default=1.0)
+    parser.add_argument('--day-range', type=float, default=0.005, help="fractional H/L range used for pivots")
+    args = parser.parse_args()
+
+    symbols = symbol_universe(args.symbols)
+    ready = multiprocessing.Queue()
+    server = multiprocessing.Process(target=run_fake_server, args=(symbols, args.rate, ready), daemon=True)
+    server.start()
+    try:
+        url = f"ws://127.0.0.1:{ready.get(timeout=10)}"
+        throughput, latencies, alerts, elapsed = asyncio.run(run_ingest(url, symbols, args))
+    finally:
+        server.terminate()
+
+    print(f"📊 End-to-end ingest: {args.symbols} symbols, {args.rate:,} quotes/sec offered, {elapsed:.1f}s measured")
+    print(f"   throughput: {throughput:12,.0f} msgs/sec processed")
+    print(f"   alerts:     {alerts:12,d}")
+    if latencies:
+        ms = [l * 1000 for l in latencies]
+        print(f"   tick-to-alert latency (ms): p50 {percentile(ms, 50):.2f}  p90 {percentile(ms, 90):.2f}  "
+              f"p99 {percentile(ms, 99):.2f}  max {max(ms):.2f}  mean {statistics.fmean(ms):.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Benchmark the vectorized pivot engine against a per-symbol scalar loop"""
+import time
+
+import numpy as np
+
+from pivot_engine import PIVOT_METHODS, compute_pivots
+
+SYMBOLS = 10_000
+REPEATS = 20
+
+
+def scalar_traditional(high, low, close):
+    pivot = (high + low + close) / 3
+    trading_range = high - low
+    r2 = pivot + trading_range
+    s2 = pivot - trading_range
+    return {'Pivot': pivot, 'R1': 2 * pivot - low, 'S1': 2 * pivot - high,
+            'R2': r2, 'S2': s2, 'R3': r2 + trading_range, 'S3': s2 - trading_range}
+
+
+def best_of(fn, repeats=REPEATS):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    rng = np.random.default_rng(42)
+    close = rng.uniform(5, 500, SYMBOLS)
+    high = close * (1 + rng.uniform(0, 0.05, SYMBOLS))
+    low = close * (1 - rng.uniform(0, 0.05, SYMBOLS))
+    open_ = rng.uniform(low, high)
+
+    print(f"📊 Pivot engine benchmark: {SYMBOLS:,} symbols, best of {REPEATS}")
+    highs, lows, closes = high.tolist(), low.tolist(), close.tolist()
+    elapsed = best_of(lambda: [scalar_traditional(h, l, c) for h, l, c in zip(highs, lows, closes)])
+    print(f"   scalar loop (traditional): {elapsed * 1e3:8.2f} ms total, {elapsed / SYMBOLS * 1e9:8.1f} ns/symbol")
+
+    for method in PIVOT_METHODS:
+        elapsed = best_of(lambda: compute_pivots(high, low, close, method, open_))
+        print(f"   {method:<26} {elapsed * 1e3:8.2f} ms total, {elapsed / SYMBOLS * 1e9:8.1f} ns/symbol")
+
+
+if __name__ == "__main__":
+    main()
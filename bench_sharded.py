@@ -0,0 +1,67 @@
+"""
+Benchmark sharded ingestion: aggregate tick throughput with 1, 2, 4, ...
+worker processes.
+
+Usage: python bench_sharded.py [max_workers]
+
+Each worker replays generated frames for its own shard of the universe
+through the full worker path (decode, price cache, level check, alert
+engine, alert IPC), so no single fake server or socket becomes the
+bottleneck. Every worker gets the same amount of work; with one core per
+worker the aggregate rate should grow close to linearly. Scaling stops at
+the number of available cores.
+"""
+import asyncio
+import functools
+import os
+import sys
+
+from bench_tick_pipeline import build_levels, synthetic_frames
+from pivot_engine import levels_to_row
+from sharded_ingest import ShardedIngest, shard_of
+
+SYMBOLS_PER_WORKER = 1000
+FRAMES_PER_WORKER = 10_000
+THRESHOLD = 0.01
+
+
+def shard_frames(count, shard_id, symbols):
+    """Frame source run inside each worker (module level so it pickles)"""
+    frames, _ = synthetic_frames(symbols, count, seed=7)
+    return frames
+
+
+async def run(workers):
+    symbols = [f"SYM{i}" for i in range(SYMBOLS_PER_WORKER * workers)]
+    alerts = []
+    ingest = ShardedIngest(workers, None, None, symbols, None, THRESHOLD, cooldown=300,
+                           on_alert=alerts.append, stats_interval=0.1,
+                           frame_source=functools.partial(shard_frames, FRAMES_PER_WORKER))
+    for shard_id in range(workers):
+        shard_symbols = [s for s in symbols if shard_of(s, workers) == shard_id]
+        _, prices = synthetic_frames(shard_symbols, 0, seed=7)
+        ingest.arm({s: levels_to_row(levels) for s, levels in build_levels(shard_symbols, prices).items()})
+    await ingest.run()
+    await ingest.stop()
+    messages = sum(r[0] for r in ingest.replayed.values())
+    # Workers run concurrently: aggregate rate is bounded by the slowest one
+    elapsed = max(r[1] for r in ingest.replayed.values())
+    return messages, elapsed, sum(r[2] for r in ingest.replayed.values())
+
+
+def main():
+    max_workers = int(sys.argv[1]) if len(sys.argv) > 1 else min(8, os.cpu_count() or 1)
+    print(f"📊 Sharded ingest benchmark: {FRAMES_PER_WORKER:,} frames and {SYMBOLS_PER_WORKER:,} symbols "
+          f"per worker, {os.cpu_count()} CPUs")
+    baseline = None
+    workers = 1
+    while workers <= max_workers:
+        messages, elapsed, alerts = asyncio.run(run(workers))
+        rate = messages / elapsed
+        baseline = baseline or rate
+        print(f"   {workers:>2} workers {rate:12,.0f} msgs/sec  {rate / baseline:5.2f}x  ({alerts} alerts)")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
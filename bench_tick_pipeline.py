@@ -0,0 +1,134 @@
+"""
+Benchmark websocket frame processing: the original per-message path against
+the batched TickPipeline.
+
+Usage: python bench_tick_pipeline.py [frames.jsonl]
+
+Without an argument a synthetic recording is generated (500 symbols, frames
+of 1-50 quotes/trades). A recording is one raw websocket frame per line.
+"""
+import json
+import random
+import sys
+import time
+
+from level_index import LevelBook
+from pivot_engine import compute_pivots, levels_to_dict
+from tick_pipeline import TickPipeline
+
+SYMBOLS = 500
+FRAMES = 20_000
+THRESHOLD = 0.01
+
+
+def synthetic_frames(symbols, count, seed=7):
+    rng = random.Random(seed)
+    prices = {s: rng.uniform(20, 400) for s in symbols}
+    frames = []
+    for _ in range(count):
+        messages = []
+        for _ in range(rng.randint(1, 50)):
+            symbol = rng.choice(symbols)
+            prices[symbol] *= 1 + rng.gauss(0, 0.0005)
+            price = round(prices[symbol], 2)
+            if rng.random() < 0.8:
+                messages.append({'T': 'q', 'S': symbol, 'bp': price, 'ap': round(price + 0.02, 2),
+                                 'bs': 1, 'as': 2, 't': '2024-01-02T15:30:00.123456789Z'})
+            else:
+                messages.append({'T': 't', 'S': symbol, 'p': price, 's': 100,
+                                 't': '2024-01-02T15:30:00.123456789Z'})
+        frames.append(json.dumps(messages))
+    return frames, prices
+
+
+def build_levels(symbols, prices):
+    close = [prices[s] for s in symbols]
+    levels = compute_pivots([c * 1.02 for c in close], [c * 0.98 for c in close], close)
+    return {s: levels_to_dict(row) for s, row in zip(symbols, levels)}
+
+
+def original_path(frames, stocks, pivot_levels):
+    """The per-message path main.py used before the batch pipeline (debug output off)"""
+    alerts = 0
+
+    def check_pivot_crossing(stock, price):
+        nonlocal alerts
+        closest_level = None
+        closest_distance = float('inf')
+        for level_name, level_value in pivot_levels[stock].items():
+            distance = abs(price - level_value)
+            if distance < THRESHOLD and distance < closest_distance:
+                closest_distance = distance
+                closest_level = level_name
+        if closest_level:
+            alerts += 1
+
+    def process_websocket_message(msg):
+        msg_type = msg.get('T')
+        stock = msg.get('S')
+        if not stock or stock not in stocks:
+            return
+        price = 0
+        if msg_type == 'q':
+            ask_price = msg.get('ap', 0)
+            bid_price = msg.get('bp', 0)
+            if ask_price > 0 and bid_price > 0:
+                price = (ask_price + bid_price) / 2
+        elif msg_type == 't':
+            price = msg.get('p', 0)
+        else:
+            return
+        if price > 0:
+            check_pivot_crossing(stock, price)
+
+    for message in frames:
+        data = json.loads(message)
+        if isinstance(data, list):
+            for msg in data:
+                process_websocket_message(msg)
+        else:
+            process_websocket_message(data)
+    return alerts
+
+
+def batched_path(frames, stocks, pivot_levels):
+    book = LevelBook(THRESHOLD)
+    for symbol, levels in pivot_levels.items():
+        book.arm(symbol, levels)
+    hits = []
+    pipeline = TickPipeline(book, set(stocks), lambda s, p, h, t: hits.append(h))
+    for message in frames:
+        pipeline.feed(message)
+    return len(hits)
+
+
+def main():
+    if len(sys.argv) > 1:
+        with open(sys.argv[1]) as f:
+            frames = [line.rstrip('\n') for line in f if line.strip()]
+        symbols = sorted({m['S'] for frame in frames for m in json.loads(frame) if m.get('S')})
+        last = {}
+        for frame in frames:
+            for m in json.loads(frame):
+                if m.get('T') == 't':
+                    last[m['S']] = m['p']
+                elif m.get('T') == 'q' and m.get('bp'):
+                    last[m['S']] = m['bp']
+        prices = last
+    else:
+        symbols = [f"SYM{i}" for i in range(SYMBOLS)]
+        frames, prices = synthetic_frames(symbols, FRAMES)
+
+    pivot_levels = build_levels(symbols, prices)
+    total = sum(len(json.loads(frame)) for frame in frames)
+    print(f"📊 Tick pipeline benchmark: {len(frames):,} frames, {total:,} messages, {len(symbols)} symbols")
+
+    for name, path in (('original per-message', original_path), ('batched pipeline', batched_path)):
+        start = time.perf_counter()
+        alerts = path(frames, list(symbols), pivot_levels)
+        elapsed = time.perf_counter() - start
+        print(f"   {name:<22} {total / elapsed:12,.0f} msgs/sec  ({alerts} level hits)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+from datetime import datetime, timezone
+
+# Attributes every LogRecord has; anything else was passed through `extra=`
+# and ends up as a structured field in the JSONL output.
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+_listener = None
+
+
+class JsonLineFormatter(logging.Formatter):
+    """Format records as one JSON object per line with `extra=` fields inlined"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry.setdefault(key, value)
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that enqueues the record untouched.
+
+    The stdlib handler formats the message before enqueueing; skipping that
+    keeps %-formatting of the arguments on the background writer thread.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class SampleFilter(logging.Filter):
+    """Let through every record at or above `min_level` but only 1 in `every` records below it"""
+
+    def __init__(self, every, min_level=logging.INFO):
+        super().__init__()
+        self.every = max(1, every)
+        self.min_level = min_level
+        self._counts = {}
+
+    def filter(self, record):
+        if record.levelno >= self.min_level:
+            return True
+        count = self._counts.get(record.msg, 0)
+        self._counts[record.msg] = count + 1
+        return count % self.every == 0
+
+
+def setup_logging(level='INFO', log_dir='logs', tick_debug=False, debug_sample_every=100,
+                  max_bytes=20 * 1024 * 1024, backup_count=5, console=True):
+    """
+    Route the bot's loggers through a queue to a background writer.
+
+    Records go to `<log_dir>/pivotbot.jsonl` (rotated at `max_bytes`) as JSON
+    lines and, if `console` is set, to stdout as plain text. The
+    `pivotbot.tick` logger carries per-tick events: it stays at INFO unless
+    `tick_debug` is set, and then only 1 in `debug_sample_every` DEBUG records
+    per message template is kept.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+
+    handlers = []
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(
+            os.path.join(log_dir, 'pivotbot.jsonl'), maxBytes=max_bytes,
+            backupCount=backup_count, encoding='utf-8'
+        )
+        file_handler.setFormatter(JsonLineFormatter())
+        handlers.append(file_handler)
+    if console:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter('%(message)s'))
+        handlers.append(console_handler)
+
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+    root = logging.getLogger('pivotbot')
+    root.handlers[:] = [LazyQueueHandler(log_queue)]
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    root.propagate = False
+
+    tick = logging.getLogger('pivotbot.tick')
+    tick.filters[:] = []
+    if tick_debug:
+        tick.setLevel(logging.DEBUG)
+        tick.addFilter(SampleFilter(debug_sample_every))
+    else:
+        tick.setLevel(max(root.level, logging.INFO))
+    return root
+
+
+def shutdown_logging():
+    """Flush queued records and stop the background writer"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,84 @@
+import heapq
+import threading
+import time
+
+
+class CooldownStore:
+    """
+    TTL set of recently alerted keys, e.g. (symbol_id, level_id) tuples.
+
+    Expiry times live in a dict plus a min-heap, so expired entries are purged
+    in order as time moves on and the store never holds more than the keys
+    that alerted within the last `ttl` seconds. With `max_entries` set the
+    store is also hard-bounded: when full, the entry closest to expiring is
+    evicted early. Keys discarded before expiry leave stale heap entries,
+    which are compacted away once they outnumber the live ones.
+    """
+
+    def __init__(self, ttl, max_entries=None, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.expirations = 0
+        self.evictions = 0
+        self._expiry = {}
+        self._heap = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._expiry)
+
+    def __contains__(self, key):
+        expiry = self._expiry.get(key)
+        return expiry is not None and expiry > self.clock()
+
+    def _pop_earliest(self):
+        while self._heap:
+            expiry, key = heapq.heappop(self._heap)
+            if self._expiry.get(key) == expiry:
+                del self._expiry[key]
+                return
+
+    def _purge(self, now):
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            expiry, key = heapq.heappop(heap)
+            if self._expiry.get(key) == expiry:
+                del self._expiry[key]
+                self.expirations += 1
+
+    def allow(self, key, now=None):
+        """
+        Return True and start the cooldown for `key` if it is not cooling
+        down, otherwise return False.
+        """
+        with self._lock:
+            if now is None:
+                now = self.clock()
+            self._purge(now)
+            if key in self._expiry:
+                return False
+            if self.max_entries is not None and len(self._expiry) >= self.max_entries:
+                self._pop_earliest()
+                self.evictions += 1
+            expiry = now + self.ttl
+            self._expiry[key] = expiry
+            heapq.heappush(self._heap, (expiry, key))
+            return True
+
+    def discard(self, key):
+        """End the cooldown for `key` early; its heap entry is dropped lazily"""
+        with self._lock:
+            if self._expiry.pop(key, None) is not None and len(self._heap) > 2 * len(self._expiry) + 64:
+                # Rebuild from the live entries so stale ones cannot pile up under discard churn
+                self._heap = [(expiry, key) for key, expiry in self._expiry.items()]
+                heapq.heapify(self._heap)
+
+    def purge(self, now=None):
+        """Drop every expired entry; returns the number of live entries"""
+        with self._lock:
+            self._purge(self.clock() if now is None else now)
+            return len(self._expiry)
+
+    def stats(self):
+        return {'size': len(self._expiry), 'expirations': self.expirations, 'evictions': self.evictions}
@@ -0,0 +1,248 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+
+log = logging.getLogger('pivotbot.dispatch')
+
+# Lower sorts first: alerts jump ahead of daily summaries, which jump ahead of chatter
+PRIORITY_ALERT = 0
+PRIORITY_SUMMARY = 1
+PRIORITY_CHATTER = 2
+
+# Discord allows 5 messages per 5 seconds per channel
+DEFAULT_RATE_LIMIT = 5
+DEFAULT_RATE_PERIOD = 5.0
+# Discord rejects a message whose embeds hold more than 6000 characters in total
+MAX_EMBED_CHARS = 6000
+
+
+def embed_size(embed):
+    """Characters Discord counts against the message limit, for a discord.Embed or its dict form"""
+    if not isinstance(embed, dict):
+        return len(embed)  # discord.Embed.__len__ is exactly this count
+    size = len(embed.get('title') or '') + len(embed.get('description') or '')
+    size += len((embed.get('footer') or {}).get('text') or '') + len((embed.get('author') or {}).get('name') or '')
+    return size + sum(len(f.get('name') or '') + len(f.get('value') or '') for f in embed.get('fields') or [])
+
+
+class RateLimitBucket:
+    """
+    Token bucket mirroring Discord's per-route rate limit.
+
+    Discord hands out `limit` requests per window and reports the window in
+    X-RateLimit-Limit / -Remaining / -Reset-After headers. Until headers are
+    seen the bucket assumes `limit` requests per `period` seconds; `update()`
+    syncs it with whatever Discord last reported and `pause()` honours a 429's
+    retry_after.
+    """
+
+    def __init__(self, limit=DEFAULT_RATE_LIMIT, period=DEFAULT_RATE_PERIOD, clock=time.monotonic, sleep=asyncio.sleep):
+        self.limit = limit
+        self.period = period
+        self.tokens = limit
+        self.reset_at = None
+        self.clock = clock
+        self.sleep = sleep
+
+    async def acquire(self):
+        """Wait for a token; returns the seconds spent waiting"""
+        waited = 0.0
+        while True:
+            now = self.clock()
+            if self.reset_at is not None and now >= self.reset_at:
+                self.tokens = self.limit
+                self.reset_at = None
+            if self.tokens > 0:
+                self.tokens -= 1
+                if self.reset_at is None:
+                    self.reset_at = now + self.period
+                return waited
+            delay = self.reset_at - now
+            waited += delay
+            await self.sleep(delay)
+
+    def update(self, headers):
+        """Sync with X-RateLimit-* response headers (case-insensitive mapping or plain dict)"""
+        if not headers:
+            return
+        headers = {k.lower(): v for k, v in headers.items()}
+        try:
+            if 'x-ratelimit-limit' in headers:
+                self.limit = int(headers['x-ratelimit-limit'])
+            if 'x-ratelimit-remaining' in headers:
+                self.tokens = int(headers['x-ratelimit-remaining'])
+            if 'x-ratelimit-reset-after' in headers:
+                reset_after = float(headers['x-ratelimit-reset-after'])
+                self.reset_at = self.clock() + reset_after
+                self.period = max(self.period, reset_after)
+        except ValueError:
+            log.warning("⚠️ Ignoring malformed rate limit headers: %s", headers)
+
+    def pause(self, retry_after):
+        """Stop handing out tokens for `retry_after` seconds (after a 429)"""
+        self.tokens = 0
+        self.reset_at = self.clock() + retry_after
+
+
+class Dispatcher:
+    """
+    Single writer for a Discord channel.
+
+    Messages wait in a priority queue and are sent one at a time, paced by a
+    RateLimitBucket. Alerts are coalesced: the first queued alert is held for
+    `window` seconds (and for as long as the bucket is empty), and everything
+    that queued up meanwhile goes out as one message through
+    `render_alerts(alerts) -> (content, embeds)`. A batch whose embeds would
+    exceed `max_embed_chars` is cut to what fits and the rest goes back on
+    the queue for the next message; a multi-alert message Discord still
+    rejects as invalid (HTTP 400) is retried in halves.
+
+    `send(content, embeds)` performs the actual post and may return the
+    response headers so the bucket can follow Discord's limits exactly. With
+    `send_alerts(alerts)`, alert batches are handed over unrendered instead,
+    for senders that render per destination.
+    `submit_*` may be called from any thread.
+    """
+
+    def __init__(self, send, render_alerts, window=0.5, max_batch=80, bucket=None,
+                 clock=time.monotonic, history=1000, send_alerts=None, max_embed_chars=MAX_EMBED_CHARS):
+        self.send = send
+        self.render_alerts = render_alerts
+        self.send_alerts = send_alerts
+        self.window = window
+        self.max_batch = max_batch
+        self.max_embed_chars = max_embed_chars
+        self.bucket = bucket or RateLimitBucket(clock=clock)
+        self.clock = clock
+        self.loop = None
+        self.sent = 0
+        self.alerts_sent = 0
+        self.failed = 0
+        self.rate_limited_seconds = 0.0
+        self.delays = deque(maxlen=history)
+        self._heap = []
+        self._seq = itertools.count()
+        self._ready = None
+        self._next_batch_limit = None
+
+    def submit_alert(self, alert):
+        self._submit(PRIORITY_ALERT, alert)
+
+    def submit_message(self, content=None, embeds=None, priority=PRIORITY_CHATTER):
+        self._submit(priority, (content, embeds))
+
+    def _submit(self, priority, item):
+        if self.loop is None:
+            raise RuntimeError("Dispatcher.run() has not started")
+        try:
+            on_loop = asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            self._push(priority, item)
+        else:
+            self.loop.call_soon_threadsafe(self._push, priority, item)
+
+    def _push(self, priority, item):
+        heapq.heappush(self._heap, (priority, next(self._seq), self.clock(), item))
+        self._ready.set()
+
+    def depth(self):
+        """Queued items per priority"""
+        counts = {PRIORITY_ALERT: 0, PRIORITY_SUMMARY: 0, PRIORITY_CHATTER: 0}
+        for priority, _, _, _ in self._heap:
+            counts[priority] += 1
+        return counts
+
+    def stats(self):
+        delays = sorted(self.delays)
+        return {
+            'queued': len(self._heap),
+            'queued_alerts': self.depth()[PRIORITY_ALERT],
+            'sent': self.sent,
+            'alerts_sent': self.alerts_sent,
+            'failed': self.failed,
+            'rate_limited_seconds': round(self.rate_limited_seconds, 3),
+            'delay_p50': delays[len(delays) // 2] if delays else 0.0,
+            'delay_max': delays[-1] if delays else 0.0,
+        }
+
+    def _pop_batch(self):
+        priority, _, queued_at, item = heapq.heappop(self._heap)
+        if priority != PRIORITY_ALERT:
+            return priority, [(queued_at, item)]
+        limit = self._next_batch_limit or self.max_batch
+        self._next_batch_limit = None
+        batch = [(queued_at, item)]
+        while self._heap and self._heap[0][0] == PRIORITY_ALERT and len(batch) < limit:
+            _, _, queued_at, item = heapq.heappop(self._heap)
+            batch.append((queued_at, item))
+        return priority, batch
+
+    def _requeue(self, priority, batch):
+        for queued_at, item in batch:
+            heapq.heappush(self._heap, (priority, next(self._seq), queued_at, item))
+
+    def _render_fitting(self, batch):
+        """Render the largest head of the batch that fits in one message; the rest is requeued"""
+        while True:
+            content, embeds = self.render_alerts([item for _, item in batch])
+            size = sum(embed_size(embed) for embed in embeds or [])
+            if len(batch) == 1 or size <= self.max_embed_chars:
+                return batch, content, embeds
+            keep = min(len(batch) - 1, max(1, len(batch) * self.max_embed_chars // size))
+            self._requeue(PRIORITY_ALERT, batch[keep:])
+            batch = batch[:keep]
+
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        self._ready = asyncio.Event()
+        while True:
+            if not self._heap:
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+
+            priority, _, queued_at, _ = self._heap[0]
+            if priority == PRIORITY_ALERT:
+                hold = queued_at + self.window - self.clock()
+                if hold > 0:
+                    await asyncio.sleep(hold)
+            self.rate_limited_seconds += await self.bucket.acquire()
+
+            priority, batch = self._pop_batch()
+            try:
+                if priority == PRIORITY_ALERT:
+                    batch, content, embeds = self._render_fitting(batch)
+                    if self.send_alerts is not None:
+                        headers = await self.send_alerts([item for _, item in batch])
+                    else:
+                        headers = await self.send(content, embeds)
+                else:
+                    headers = await self.send(*batch[0][1])
+                self.bucket.update(headers)
+            except Exception as e:
+                retry_after = getattr(e, 'retry_after', None)
+                if retry_after:
+                    # Rate limited: put the batch back and wait out the window
+                    self.bucket.pause(retry_after)
+                    self._requeue(priority, batch)
+                    continue
+                if getattr(e, 'status', None) == 400 and len(batch) > 1:
+                    # Discord found the message invalid (most likely too large): retry it in halves
+                    log.warning("⚠️ Discord rejected a batch of %d alerts, retrying in halves: %s", len(batch), e)
+                    self._requeue(priority, batch)
+                    self._next_batch_limit = len(batch) // 2
+                    continue
+                self.failed += 1
+                log.error("❌ Failed to send Discord message: %s", e, extra={'batch': len(batch)})
+                continue
+
+            now = self.clock()
+            self.sent += 1
+            if priority == PRIORITY_ALERT:
+                self.alerts_sent += len(batch)
+            self.delays.extend(now - queued_at for queued_at, _ in batch)
@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+log = logging.getLogger('pivotbot.failover')
+
+
+class FailoverController:
+    """
+    REST polling that only runs when the stream cannot be trusted.
+
+    Healthy stream: every `idle_interval` seconds, symbols whose cached price
+    is older than `max_age` (quiet symbols, or ones the stream never priced)
+    are fetched in one batched request. Nothing is polled if every symbol
+    is fresh.
+
+    Failover starts when, during market hours, the stream is disconnected or
+    has sent nothing for `stale_after` seconds. All symbols are then polled
+    every `fast_interval` seconds. The interval is stretched as needed to keep
+    the REST calls under `rate_limit` requests per minute. Failover ends once
+    the stream has been connected and fresh for `recover_after` seconds.
+
+    `fetch(symbols)` is a coroutine returning {symbol: price}. Each price is
+    handed to `on_price(symbol, price)`. `requests_for(symbols)` says how
+    many HTTP requests a fetch takes. Everything runs on the event loop.
+    """
+
+    def __init__(self, fetch, on_price, symbols, price_cache, connected, stream_age, is_open,
+                 requests_for=lambda symbols: 1, max_age=60.0, idle_interval=60.0, fast_interval=5.0,
+                 stale_after=30.0, recover_after=10.0, rate_limit=180, clock=time.monotonic, sleep=asyncio.sleep):
+        self.fetch = fetch
+        self.on_price = on_price
+        self.symbols = symbols
+        self.price_cache = price_cache
+        self.connected = connected
+        self.stream_age = stream_age
+        self.is_open = is_open
+        self.requests_for = requests_for
+        self.max_age = max_age
+        self.idle_interval = idle_interval
+        self.fast_interval = fast_interval
+        self.stale_after = stale_after
+        self.recover_after = recover_after
+        self.rate_limit = rate_limit
+        self.clock = clock
+        self.sleep = sleep
+        self.active = False
+        self.failovers = 0
+        self.polls = 0
+        self.requests = 0
+        self.prices_polled = 0
+        self.errors = 0
+        self.periods = deque(maxlen=100)  # (started, seconds) of finished failovers
+        self._failover_seconds = 0.0
+        self._started = None
+        self._healthy_since = None
+
+    def stream_healthy(self):
+        # Outside market hours there is nothing to miss
+        if not self.is_open():
+            return True
+        if not self.connected():
+            return False
+        age = self.stream_age()
+        return age is not None and age <= self.stale_after
+
+    def update_mode(self):
+        """Enter or leave failover from the current stream health; returns the mode"""
+        now = self.clock()
+        healthy = self.stream_healthy()
+        if not self.active and not healthy:
+            self.active = True
+            self.failovers += 1
+            self._started = now
+            self._healthy_since = None
+            log.warning("🚨 Market data stream unhealthy, failing over to REST polling every %.0fs", self.fast_interval,
+                        extra={'stream_age': self.stream_age(), 'connected': self.connected()})
+        elif self.active:
+            if not healthy:
+                self._healthy_since = None
+            elif self._healthy_since is None:
+                self._healthy_since = now
+            elif now - self._healthy_since >= self.recover_after:
+                seconds = now - self._started
+                self.active = False
+                self._failover_seconds += seconds
+                self.periods.append((self._started, seconds))
+                self._started = None
+                log.info("✅ Market data stream recovered after %.0fs of failover polling", seconds,
+                         extra={'failover_seconds': seconds})
+        return self.active
+
+    def failover_seconds(self):
+        """Total time spent in failover, including the current period"""
+        current = self.clock() - self._started if self.active else 0.0
+        return self._failover_seconds + current
+
+    def due_symbols(self):
+        symbols = list(self.symbols())
+        if self.active:
+            return symbols
+        return self.price_cache.stale(symbols, self.max_age)
+
+    async def poll(self, symbols):
+        """One batched fetch; returns the number of HTTP requests it took"""
+        if not symbols:
+            return 0
+        self.polls += 1
+        requests = self.requests_for(symbols)
+        self.requests += requests
+        try:
+            prices = await self.fetch(symbols)
+        except Exception as e:
+            self.errors += 1
+            log.warning("❌ Polling %d symbols failed: %s", len(symbols), e, extra={'symbols': len(symbols)})
+            return requests
+        self.price_cache.update_many(prices)
+        self.prices_polled += len(prices)
+        for symbol, price in prices.items():
+            try:
+                self.on_price(symbol, price)
+            except Exception:
+                log.exception("❌ Error checking polled price for %s", symbol)
+        return requests
+
+    def next_interval(self, requests):
+        interval = self.fast_interval if self.active else self.idle_interval
+        # Stay under the REST rate limit however large the universe is
+        return max(interval, requests * 60.0 / self.rate_limit)
+
+    async def run(self):
+        log.info("📡 Polling failover controller started")
+        while True:
+            requests = 0
+            try:
+                self.update_mode()
+                if self.is_open():
+                    requests = await self.poll(self.due_symbols())
+            except Exception:
+                log.exception("❌ Error in polling failover")
+            # Check stream health every fast_interval in both modes, so failover starts and
+            # ends on time even when the rate limit stretches the polling interval
+            interval = self.next_interval(requests)
+            deadline = self.clock() + interval
+            active = self.active
+            while self.clock() < deadline:
+                await self.sleep(min(self.fast_interval, deadline - self.clock()))
+                if self.update_mode() != active:
+                    break
+
+    def stats(self):
+        return {'active': self.active, 'failovers': self.failovers,
+                'failover_seconds': round(self.failover_seconds(), 1), 'polls': self.polls,
+                'requests': self.requests, 'prices_polled': self.prices_polled, 'errors': self.errors}
@@ -0,0 +1,183 @@
+"""
+Local stand-ins for Alpaca's market data stream and the Discord channel.
+
+Run a fake stream for the bot to connect to:
+
+    python fake_alpaca.py --symbols 500 --rate 20000 --port 8765
+    ALPACA_STREAM_URL=ws://127.0.0.1:8765 python main.py
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timezone
+
+import websockets
+
+
+def base_price(symbol):
+    """Deterministic starting price for a symbol, so test harnesses can derive pivots from it"""
+    return 20.0 + (sum(ord(c) * (i + 1) for i, c in enumerate(symbol)) % 380)
+
+
+def rfc3339_now():
+    now = time.time_ns()
+    seconds, nanos = divmod(now, 1_000_000_000)
+    stamp = datetime.fromtimestamp(seconds, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S')
+    return f"{stamp}.{nanos:09d}Z"
+
+
+class FakeAlpacaServer:
+    """
+    Websocket server speaking the Alpaca market data protocol.
+
+    Clients get the usual `connected` greeting, must authenticate (any key is
+    accepted unless `api_key`/`api_secret` are set) and can subscribe and
+    unsubscribe quotes. Subscribed symbols receive random-walk quotes at
+    `rate` messages per second in total, batched into one frame every
+    `interval` seconds.
+    """
+
+    def __init__(self, symbols, rate=1000, interval=0.01, volatility=0.0005,
+                 api_key=None, api_secret=None, seed=1):
+        self.symbols = list(symbols)
+        self.rate = rate
+        self.interval = interval
+        self.volatility = volatility
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.prices = {s: base_price(s) for s in self.symbols}
+        self.random = random.Random(seed)
+        self.sent = 0
+        self.connections = 0
+        self.subscription_messages = []
+        self._server = None
+
+    @property
+    def port(self):
+        return self._server.sockets[0].getsockname()[1]
+
+    @property
+    def url(self):
+        return f"ws://127.0.0.1:{self.port}"
+
+    async def start(self, host='127.0.0.1', port=0):
+        self._server = await websockets.serve(self._handle, host, port, max_size=None)
+        return self
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+    def _quote(self, symbol, timestamp):
+        price = self.prices[symbol] * (1 + self.random.gauss(0, self.volatility))
+        self.prices[symbol] = price
+        return {'T': 'q', 'S': symbol, 'bx': 'V', 'bp': round(price - 0.01, 2), 'bs': 1,
+                'ax': 'V', 'ap': round(price + 0.01, 2), 'as': 1, 'c': ['R'], 'z': 'C', 't': timestamp}
+
+    async def _handle(self, ws, path=None):
+        self.connections += 1
+        subscribed = {}  # insertion-ordered set
+        universe = []
+        await ws.send(json.dumps([{'T': 'success', 'msg': 'connected'}]))
+
+        auth = json.loads(await ws.recv())
+        if self.api_key is not None and (auth.get('key'), auth.get('secret')) != (self.api_key, self.api_secret):
+            await ws.send(json.dumps([{'T': 'error', 'code': 402, 'msg': 'auth failed'}]))
+            return
+        await ws.send(json.dumps([{'T': 'success', 'msg': 'authenticated'}]))
+
+        async def read_commands():
+            nonlocal universe
+            async for raw in ws:
+                msg = json.loads(raw)
+                self.subscription_messages.append(msg)
+                quotes = [s for s in msg.get('quotes', []) if s in self.prices or s == '*']
+                if msg.get('action') == 'subscribe':
+                    subscribed.update(dict.fromkeys(quotes))
+                elif msg.get('action') == 'unsubscribe':
+                    for symbol in quotes:
+                        subscribed.pop(symbol, None)
+                universe = self.symbols if '*' in subscribed else list(subscribed)
+                await ws.send(json.dumps([{'T': 'subscription', 'trades': [], 'quotes': list(subscribed),
+                                           'bars': []}]))
+
+        reader = asyncio.create_task(read_commands())
+        try:
+            per_frame = max(1, round(self.rate * self.interval))
+            next_frame = time.perf_counter()
+            while not reader.done():
+                if universe:
+                    timestamp = rfc3339_now()
+                    frame = [self._quote(self.random.choice(universe), timestamp) for _ in range(per_frame)]
+                    await ws.send(json.dumps(frame))
+                    self.sent += len(frame)
+                next_frame += self.interval
+                await asyncio.sleep(max(0, next_frame - time.perf_counter()))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            reader.cancel()
+
+    async def drop_connections(self):
+        """Close every client connection, e.g. to exercise reconnect logic"""
+        for ws in list(self._server.websockets):
+            await ws.close()
+
+
+class DiscordSink:
+    """
+    Stub Discord destination that records what the bot would have sent.
+
+    Use it as an AlertEngine sink (`sink(alert)`), in place of a
+    discord.TextChannel (`await sink.send(embeds=[...])`) or as a Dispatcher
+    sender.
+    """
+
+    name = 'fake-pivots'
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self.alerts = []
+        self.messages = []
+
+    def __call__(self, alert):
+        self.alerts.append((self.clock(), alert))
+        return True
+
+    async def send(self, content=None, embeds=None):
+        self.messages.append((self.clock(), content, embeds))
+
+    def latencies(self):
+        """Seconds from each alert's tick timestamp to the moment the sink received it"""
+        return [received - alert.tick_time.timestamp()
+                for received, alert in self.alerts if alert.tick_time is not None]
+
+
+async def _serve(args):
+    symbols = args.tickers.split(',') if args.tickers else [f"SYM{i}" for i in range(args.symbols)]
+    server = FakeAlpacaServer(symbols, rate=args.rate, interval=args.interval)
+    await server.start(args.host, args.port)
+    print(f"🧪 Fake Alpaca stream on ws://{args.host}:{server.port} "
+          f"({len(symbols)} symbols, {args.rate} quotes/sec)")
+    while True:
+        await asyncio.sleep(10)
+        print(f"📡 Sent {server.sent:,} quotes to {server.connections} connection(s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a fake Alpaca market data stream")
+    parser.add_argument('--symbols', type=int, default=500, help="number of synthetic SYM<n> symbols")
+    parser.add_argument('--tickers', help="comma-separated symbols to quote instead of SYM<n>")
+    parser.add_argument('--rate', type=int, default=5000, help="quotes per second across all symbols")
+    parser.add_argument('--interval', type=float, default=0.01, help="seconds between frames")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    asyncio.run(_serve(parser.parse_args()))
@@ -0,0 +1,190 @@
+from bisect import bisect_right
+from collections import namedtuple
+
+import numpy as np
+
+from pivot_engine import LEVEL_COUNT, LEVEL_NAMES
+
+INF = float('inf')
+
+# `direction` keeps the bot's original wording: "down" means the price is at or
+# coming from above the level, "up" means it is at or coming from below.
+LevelHit = namedtuple('LevelHit', ['name', 'value', 'direction', 'crossed', 'timeframe'], defaults=('1Day',))
+
+
+class LevelIndex:
+    """
+    Pivot levels of one symbol stored as a sorted array.
+
+    Besides the levels, the index caches a "no-op band": the closed price
+    interval around the last seen price in which no level is within the
+    threshold and no level lies between the last price and the new one. Ticks
+    inside the band return after two float comparisons; everything else goes
+    through a bisect-based check that also detects real crosses, so a move
+    that jumps over a level's threshold window still produces a hit.
+
+    Levels of several pivot timeframes share one sorted array; `timeframes`
+    says which timeframe each level belongs to.
+    """
+
+    __slots__ = ('names', 'values', 'timeframes', 'threshold', 'band_low', 'band_high', 'last_price')
+
+    def __init__(self, levels, threshold):
+        items = sorted(levels.items(), key=lambda item: item[1])
+        self.names = tuple(name for name, _ in items)
+        self.values = [value for _, value in items]
+        self.timeframes = ('1Day',) * len(items)
+        self.threshold = threshold
+        # Empty band until the first tick arrives, so it always takes the slow path.
+        self.band_low = INF
+        self.band_high = -INF
+        self.last_price = None
+
+    @classmethod
+    def from_row(cls, row, threshold, timeframes=('1Day',)):
+        """
+        Build from a level array row (NaN = undefined), e.g. a PivotTable row:
+        LEVEL_COUNT columns in LEVEL_NAMES order per entry of `timeframes`.
+        """
+        defined = np.flatnonzero(~np.isnan(row))
+        order = defined[np.argsort(row[defined], kind='stable')]
+        index = cls({}, threshold)
+        index.names = tuple(LEVEL_NAMES[i % LEVEL_COUNT] for i in order)
+        index.timeframes = tuple(timeframes[i // LEVEL_COUNT] for i in order)
+        index.values = row[order].tolist()
+        return index
+
+    def band_for(self, position):
+        """No-op band of the gap between values[position - 1] and values[position]"""
+        low = self.values[position - 1] + self.threshold if position > 0 else -INF
+        high = self.values[position] - self.threshold if position < len(self.values) else INF
+        return low, high
+
+    def check(self, price):
+        """Return a LevelHit if `price` is near or has crossed a level since the last tick, else None"""
+        if self.band_low <= price <= self.band_high:
+            self.last_price = price
+            return None
+        return self.resolve(price)
+
+    def resolve(self, price):
+        """Full bisect-based check for a price outside the cached band; refreshes the band"""
+        values = self.values
+        position = bisect_right(values, price)
+        previous = self.last_price
+        self.last_price = price
+        self.band_low, self.band_high = self.band_for(position)
+
+        best = None
+        best_distance = INF
+        for i in (position - 1, position):
+            if 0 <= i < len(values):
+                distance = abs(price - values[i])
+                if distance < self.threshold and distance < best_distance:
+                    best_distance = distance
+                    best = LevelHit(self.names[i], values[i], "down" if price > values[i] else "up", False,
+                                    self.timeframes[i])
+
+        if previous is not None:
+            previous_position = bisect_right(values, previous)
+            crossed = None
+            if position > previous_position:
+                crossed = position - 1
+                direction = "up"
+            elif position < previous_position:
+                crossed = position
+                direction = "down"
+            if crossed is not None and abs(price - values[crossed]) <= best_distance:
+                best = LevelHit(self.names[crossed], values[crossed], direction, True, self.timeframes[crossed])
+
+        return best
+
+
+class LevelBook:
+    """
+    Per-symbol LevelIndex registry used by the crossing check.
+
+    Every armed symbol owns a slot in the `band_low`/`band_high` arrays, which
+    mirror the bands cached on each LevelIndex so a whole batch of prices can be
+    tested against their bands in one vectorized step.
+    """
+
+    def __init__(self, threshold, capacity=64):
+        self.threshold = threshold
+        self._indexes = {}
+        self._slots = {}
+        self.band_low = np.full(capacity, -INF)
+        self.band_high = np.full(capacity, INF)
+
+    def __contains__(self, symbol):
+        return symbol in self._indexes
+
+    def __len__(self):
+        return len(self._indexes)
+
+    def slot(self, symbol):
+        """Stable small-integer id of `symbol`, allocated on first use"""
+        slot = self._slots.get(symbol)
+        if slot is None:
+            slot = len(self._slots)
+            if slot == len(self.band_low):
+                grow = len(self.band_low)
+                self.band_low = np.concatenate([self.band_low, np.full(grow, -INF)])
+                self.band_high = np.concatenate([self.band_high, np.full(grow, INF)])
+            self._slots[symbol] = slot
+        return slot
+
+    def _sync_band(self, symbol, index):
+        slot = self._slots[symbol]
+        self.band_low[slot] = index.band_low
+        self.band_high[slot] = index.band_high
+
+    def arm(self, symbol, levels):
+        """Index `levels` ({name: value}) for `symbol`, replacing any previous levels"""
+        index = LevelIndex(levels, self.threshold)
+        self._indexes[symbol] = index
+        self.slot(symbol)
+        self._sync_band(symbol, index)
+
+    def arm_row(self, symbol, row, timeframes=('1Day',)):
+        """Like arm(), from a level array row (see LevelIndex.from_row)"""
+        index = LevelIndex.from_row(row, self.threshold, timeframes)
+        self._indexes[symbol] = index
+        self.slot(symbol)
+        self._sync_band(symbol, index)
+
+    def disarm(self, symbol):
+        if self._indexes.pop(symbol, None) is not None:
+            slot = self._slots[symbol]
+            self.band_low[slot] = -INF
+            self.band_high[slot] = INF
+
+    def get(self, symbol):
+        return self._indexes.get(symbol)
+
+    def check(self, symbol, price):
+        index = self._indexes.get(symbol)
+        if index is None or index.band_low <= price <= index.band_high:
+            return None
+        hit = index.resolve(price)
+        self._sync_band(symbol, index)
+        return hit
+
+    def check_many(self, symbols, prices):
+        """
+        Check one price per armed symbol. `symbols` must all be armed. Returns a
+        list of (symbol, price, LevelHit) for the symbols that hit a level.
+        """
+        slots = np.fromiter((self._slots[s] for s in symbols), dtype=np.intp, count=len(symbols))
+        prices = np.asarray(prices, dtype=np.float64)
+        outside = (prices < self.band_low[slots]) | (prices > self.band_high[slots])
+        hits = []
+        for i in np.flatnonzero(outside).tolist():
+            symbol = symbols[i]
+            price = float(prices[i])
+            index = self._indexes[symbol]
+            hit = index.resolve(price)
+            self._sync_band(symbol, index)
+            if hit is not None:
+                hits.append((symbol, price, hit))
+        return hits
@@ -1,16 +1,37 @@
 import alpaca_trade_api as tradeapi
 import pandas as pd
-import requests
-import websocket
 import json
-import threading
+import re
+import logging
 import time
 import os
 import asyncio
 import discord
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
 from discord.ext import commands
+from alerts import AlertEngine
+from bot_logging import setup_logging
+from cooldown import CooldownStore
+from dispatcher import PRIORITY_CHATTER, PRIORITY_SUMMARY, Dispatcher, RateLimitBucket
+from failover import FailoverController
+from level_index import LevelBook
+from market_data import AlpacaDataClient, snapshot_price
+from metrics import Registry, start_metrics_server
+from bar_aggregator import BarAggregator
+from bar_history import DailyBarHistory
+from pivot_engine import PIVOT_METHODS, TIMEFRAME_LABELS, TIMEFRAMES, compute_pivots, levels_to_dict, pivot_period
+from pivot_loader import PivotLoader
+from pivot_store import PivotStore
+from pivot_table import PivotTable
+from price_cache import PriceCache
+from scheduler import SessionScheduler
+from sharded_ingest import ShardedIngest
+from stream import STREAM_URL as DEFAULT_STREAM_URL, AlpacaStream
+from tick_history import TickHistory
+from tick_pipeline import TickPipeline
+from trading_calendar import CALENDAR_CACHE as DEFAULT_CALENDAR_CACHE, MARKET_TZ, TradingCalendar, load_calendar, market_today
+from webhooks import WEBHOOK_RATE_LIMIT, WEBHOOK_RATE_PERIOD, WebhookFanout, load_routes
 
 load_dotenv()
 
@@ -18,29 +39,135 @@ API_KEY = os.getenv('ALPACA_API_KEY')
 API_SECRET = os.getenv('ALPACA_API_SECRET')
 BASE_URL = os.getenv('ALPACA_BASE_URL', 'https://paper-api.alpaca.markets/v2')
 DATA_URL = 'https://data.alpaca.markets/v2'
+STREAM_URL = os.getenv('ALPACA_STREAM_URL', DEFAULT_STREAM_URL)
 DISCORD_TOKEN = os.getenv('DISCORD_BOT_TOKEN')
 DISCORD_CHANNEL = os.getenv('DISCORD_CHANNEL', 'pivots')
 STOCKS = os.getenv('STOCKS', 'AAPL,MSFT,TSLA').split(',')
-PIVOT_TIMEFRAME = os.getenv('PIVOT_TIMEFRAME', '1Day')
+# PIVOT_TIMEFRAME (a single timeframe) is the older name of this setting and still honoured
+PIVOT_TIMEFRAMES = [tf.strip() for tf in (os.getenv('PIVOT_TIMEFRAMES') or os.getenv('PIVOT_TIMEFRAME') or '1Day').split(',')
+                    if tf.strip()]
+PIVOT_METHOD = os.getenv('PIVOT_METHOD', 'traditional').lower()
 CROSSING_THRESHOLD = float(os.getenv('CROSSING_THRESHOLD', '0.01'))
 ALERT_COOLDOWN = int(os.getenv('ALERT_COOLDOWN', '300'))
-REAL_TIME_DEBUG = os.getenv('REAL_TIME_DEBUG', 'true').lower() == 'true'
+ALERT_COOLDOWN_MAX_ENTRIES = int(os.getenv('ALERT_COOLDOWN_MAX_ENTRIES', '100000'))
+REAL_TIME_DEBUG = os.getenv('REAL_TIME_DEBUG', 'false').lower() == 'true'
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_DIR = os.getenv('LOG_DIR', 'logs')
+LOG_DEBUG_SAMPLE = int(os.getenv('LOG_DEBUG_SAMPLE', '100'))
+PIVOT_DB = os.getenv('PIVOT_DB', 'data/pivots.db')
+PIVOT_DB_RETENTION_DAYS = int(os.getenv('PIVOT_DB_RETENTION_DAYS', '30'))
+HISTORY_DB = os.getenv('HISTORY_DB', 'data/history.db')
+HISTORY_RETENTION_DAYS = int(os.getenv('HISTORY_RETENTION_DAYS', '120'))
+CALENDAR_CACHE = os.getenv('CALENDAR_CACHE', DEFAULT_CALENDAR_CACHE)
+ALERT_BATCH_WINDOW = float(os.getenv('ALERT_BATCH_WINDOW', '0.5'))
+PRICE_MAX_AGE = float(os.getenv('PRICE_MAX_AGE', '60'))
+SCHEDULER_STATE = os.getenv('SCHEDULER_STATE', 'data/scheduler.json')
+PREOPEN_MINUTES = int(os.getenv('PREOPEN_MINUTES', '30'))
+POSTCLOSE_MINUTES = int(os.getenv('POSTCLOSE_MINUTES', '20'))
+SCHEDULER_JITTER = float(os.getenv('SCHEDULER_JITTER', '60'))
+PIVOT_NEGATIVE_TTL = float(os.getenv('PIVOT_NEGATIVE_TTL', '3600'))
+WATCHLIST_FILE = os.getenv('WATCHLIST_FILE', 'data/watchlist.json')
+INGEST_WORKERS = int(os.getenv('INGEST_WORKERS', '0'))
+METRICS_PORT = int(os.getenv('METRICS_PORT', '9100'))
+STREAM_STALE_SECONDS = float(os.getenv('STREAM_STALE_SECONDS', '30'))
+POLL_INTERVAL = float(os.getenv('POLL_INTERVAL', '60'))
+FAILOVER_POLL_INTERVAL = float(os.getenv('FAILOVER_POLL_INTERVAL', '5'))
+REST_RATE_LIMIT = int(os.getenv('REST_RATE_LIMIT', '180'))
+STREAM_TRADES = os.getenv('STREAM_TRADES', 'true').lower() == 'true'
+BAR_HISTORY_1MIN = int(os.getenv('BAR_HISTORY_1MIN', '60'))
+BAR_HISTORY_5MIN = int(os.getenv('BAR_HISTORY_5MIN', '78'))
+TICK_HISTORY_DEPTH = int(os.getenv('TICK_HISTORY_DEPTH', '32'))
+MOTION_WINDOW = float(os.getenv('MOTION_WINDOW', '60'))
+ALERT_ROUTES = os.getenv('ALERT_ROUTES', '')
+WEBHOOK_CONNECTIONS = int(os.getenv('WEBHOOK_CONNECTIONS', '32'))
+WEBHOOK_USERNAME = os.getenv('WEBHOOK_USERNAME', 'Market Structure Bot')
 
 if not API_KEY or not API_SECRET:
     raise ValueError("ALPACA_API_KEY and ALPACA_API_SECRET environment variables are required")
 if not DISCORD_TOKEN:
     raise ValueError("DISCORD_BOT_TOKEN environment variable is required")
+if PIVOT_METHOD not in PIVOT_METHODS:
+    raise ValueError(f"PIVOT_METHOD must be one of: {', '.join(PIVOT_METHODS)}")
+if os.getenv('PIVOT_TIMEFRAME') and not os.getenv('PIVOT_TIMEFRAMES'):
+    print("⚠️ PIVOT_TIMEFRAME is deprecated, use PIVOT_TIMEFRAMES (a comma-separated list)")
+elif os.getenv('PIVOT_TIMEFRAME'):
+    print("⚠️ PIVOT_TIMEFRAME is ignored because PIVOT_TIMEFRAMES is set")
+if not PIVOT_TIMEFRAMES or not set(PIVOT_TIMEFRAMES) <= set(TIMEFRAMES):
+    raise ValueError(f"PIVOT_TIMEFRAMES must be a comma-separated list of: {', '.join(TIMEFRAMES)}")
+# Canonical order: it fixes the column layout of the pivot table rows
+PIVOT_TIMEFRAMES = tuple(tf for tf in TIMEFRAMES if tf in PIVOT_TIMEFRAMES)
+# Webhook destinations across guilds and channels; without them alerts go to DISCORD_CHANNEL over the gateway
+alert_routes = load_routes(ALERT_ROUTES) if ALERT_ROUTES else []
+
+def load_watchlist(path, default):
+    """The symbol list saved by /watch, or `default` (the STOCKS setting) if none was saved"""
+    try:
+        with open(path) as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return default
+    if set(saved) != set(default):
+        print(f"⚠️ Using the {len(saved)} symbols saved by /watch in {path} instead of STOCKS "
+              f"({len(set(saved) - set(default))} added, {len(set(default) - set(saved))} removed); "
+              f"delete the file to go back to STOCKS")
+    return saved
+
+def save_watchlist():
+    if os.path.dirname(WATCHLIST_FILE):
+        os.makedirs(os.path.dirname(WATCHLIST_FILE), exist_ok=True)
+    with open(f"{WATCHLIST_FILE}.tmp", 'w') as f:
+        json.dump(STOCKS, f)
+    os.replace(f"{WATCHLIST_FILE}.tmp", WATCHLIST_FILE)
+
+# /watch edits this list in place, so every reader sees the live universe
+STOCKS = load_watchlist(WATCHLIST_FILE, STOCKS)
+
+log = setup_logging(LOG_LEVEL, LOG_DIR, tick_debug=REAL_TIME_DEBUG, debug_sample_every=LOG_DEBUG_SAMPLE)
+tick_log = logging.getLogger('pivotbot.tick')
 
 api = tradeapi.REST(API_KEY, API_SECRET, BASE_URL)
 
-pivot_levels = {stock: {} for stock in STOCKS}
-last_alert = {stock: {} for stock in STOCKS}
+metrics = Registry()
+frame_seconds = metrics.histogram('frame_evaluation_seconds', 'Time to decode and evaluate one stream frame')
+tick_to_alert_seconds = metrics.histogram('tick_to_alert_seconds', 'Exchange tick timestamp to alert raised')
+rest_seconds = metrics.histogram('rest_request_seconds', 'Alpaca REST request latency by endpoint')
+rest_errors = metrics.counter('rest_errors_total', 'Alpaca REST requests that failed, by endpoint')
+
+def record_rest_call(endpoint, seconds, status=200):
+    rest_seconds.observe(seconds, endpoint=endpoint)
+    if status != 200:
+        rest_errors.inc(endpoint=endpoint)
+
+pivot_table = PivotTable(capacity=max(64, len(STOCKS)), timeframes=PIVOT_TIMEFRAMES)
+alert_cooldowns = CooldownStore(ALERT_COOLDOWN, max_entries=ALERT_COOLDOWN_MAX_ENTRIES)
+level_book = LevelBook(CROSSING_THRESHOLD)
+pivot_store = PivotStore(PIVOT_DB)
+bar_history = DailyBarHistory(HISTORY_DB)
+data_client = AlpacaDataClient(API_KEY, API_SECRET, DATA_URL, on_request=record_rest_call)
+price_cache = PriceCache(capacity=max(64, len(STOCKS)))
+# Intraday bars and VWAP from the in-process stream (trades, or quote midpoints without STREAM_TRADES)
+bar_aggregator = BarAggregator(capacity=max(64, len(STOCKS)), history={'1Min': BAR_HISTORY_1MIN, '5Min': BAR_HISTORY_5MIN})
+# Recent price samples spanning MOTION_WINDOW, for the direction, speed and bounce/break of alerts
+tick_history = TickHistory(capacity=max(64, len(STOCKS)), depth=TICK_HISTORY_DEPTH, spacing=MOTION_WINDOW / TICK_HISTORY_DEPTH)
+# Weekday-only until the exchange calendar is loaded in main()
+trading_calendar = TradingCalendar.weekdays(market_today() - timedelta(days=366), market_today() + timedelta(days=366))
+watched_symbols = set(STOCKS)
 
 intents = discord.Intents.default()
 intents.message_content = True
 discord_client = discord.Client(intents=intents)
 tree = discord.app_commands.CommandTree(discord_client)
 discord_channel_obj = None
+event_loop = None
+
+def submit_to_loop(coro):
+    """Run a coroutine on the bot's event loop from the loop itself or from a worker thread"""
+    try:
+        if asyncio.get_running_loop() is event_loop:
+            return event_loop.create_task(coro)
+    except RuntimeError:
+        pass
+    return asyncio.run_coroutine_threadsafe(coro, event_loop)
 
 @discord_client.event
 async def on_ready():
@@ -59,6 +186,13 @@ async def on_ready():
             can_embed = permissions.embed_links
             print(f"       - #{channel.name} (ID: {channel.id}) - Send: {can_send}, Embed: {can_embed}")
     
+    if webhooks:
+        for route in alert_routes:
+            symbols = ', '.join(sorted(route.symbols)) if route.symbols is not None else 'all symbols'
+            print(f"🪝 Alert route {route.name}: {symbols}")
+        await announce_ready()
+        return
+    
     print(f"🎯 Looking for channel named: '{DISCORD_CHANNEL}'")
     
     for guild in discord_client.guilds:
@@ -74,59 +208,8 @@ async def on_ready():
                 
                 discord_channel_obj = channel
                 print(f'✅ Found Discord channel: #{channel.name} in {guild.name}')
-                
-                try:
-                    welcome_embed = discord.Embed(
-                        title="👋 Hello! Market Structure Bot is Online",
-                        description="I'm ready to monitor pivot levels and send you alerts!",
-                        color=0x00ff88,
-                        timestamp=datetime.now()
-                    )
-                    
-                    welcome_embed.add_field(
-                        name="📊 Monitoring Stocks", 
-                        value=", ".join(STOCKS), 
-                        inline=False
-                    )
-                    
-                    welcome_embed.add_field(
-                        name="🎯 Alert Threshold", 
-                        value=f"${CROSSING_THRESHOLD}", 
-                        inline=True
-                    )
-                    
-                    welcome_embed.add_field(
-                        name="⏰ Cooldown Period", 
-                        value=f"{ALERT_COOLDOWN} seconds", 
-                        inline=True
-                    )
-                    
-                    welcome_embed.add_field(
-                        name="📈 Features", 
-                        value="• Real-time pivot level monitoring\n• Daily pivot calculations\n• Smart alert system", 
-                        inline=False
-                    )
-                    
-                    welcome_embed.set_footer(text="Happy trading! 📈")
-                    
-                    await channel.send(embed=welcome_embed)
-                    
-                    await asyncio.sleep(5)
-                    await channel.send("✅ **Discord connection test successful!** Bot is ready to receive commands.")
-                    
-                    try:
-                        print("🔄 Syncing slash commands...")
-                        synced = await tree.sync()
-                        print(f"✅ Synced {len(synced)} slash commands")
-                    except Exception as e:
-                        print(f"❌ Failed to sync slash commands: {e}")
-                    
-                    return
-                    
-                except discord.Forbidden:
-                    print(f"❌ Permission denied when trying to send message to #{channel.name}")
-                except Exception as e:
-                    print(f"❌ Error sending welcome message: {e}")
+                await announce_ready()
+                return
     
     if not discord_channel_obj:
         print(f"❌ Could not find Discord channel '{DISCORD_CHANNEL}' in any server!")
@@ -141,6 +224,56 @@ async def on_ready():
         print("   - Create a text channel called 'pivots' in your server")
         print("   - Or change DISCORD_CHANNEL in your .env file to match an existing channel")
         print("   - Ensure bot has proper permissions in that channel")
+        print("   - Or set ALERT_ROUTES to deliver alerts through channel webhooks")
+
+async def announce_ready():
+    """Queue the welcome messages for the alert channels and sync slash commands"""
+    try:
+        welcome_embed = discord.Embed(
+            title="👋 Hello! Market Structure Bot is Online",
+            description="I'm ready to monitor pivot levels and send you alerts!",
+            color=0x00ff88,
+            timestamp=datetime.now()
+        )
+        
+        welcome_embed.add_field(
+            name="📊 Monitoring Stocks", 
+            value=", ".join(STOCKS), 
+            inline=False
+        )
+        
+        welcome_embed.add_field(
+            name="🎯 Alert Threshold", 
+            value=f"${CROSSING_THRESHOLD}", 
+            inline=True
+        )
+        
+        welcome_embed.add_field(
+            name="⏰ Cooldown Period", 
+            value=f"{ALERT_COOLDOWN} seconds", 
+            inline=True
+        )
+        
+        welcome_embed.add_field(
+            name="📈 Features", 
+            value="• Real-time pivot level monitoring\n• Daily pivot calculations\n• Smart alert system", 
+            inline=False
+        )
+        
+        welcome_embed.set_footer(text="Happy trading! 📈")
+        
+        dispatcher.submit_message(embeds=[welcome_embed], priority=PRIORITY_CHATTER)
+        dispatcher.submit_message("✅ **Discord connection test successful!** Bot is ready to receive commands.",
+                                  priority=PRIORITY_CHATTER)
+    except Exception as e:
+        print(f"❌ Error sending welcome message: {e}")
+    
+    try:
+        print("🔄 Syncing slash commands...")
+        synced = await tree.sync()
+        print(f"✅ Synced {len(synced)} slash commands")
+    except Exception as e:
+        print(f"❌ Failed to sync slash commands: {e}")
 
 @tree.command(name="stocks", description="Show which stocks the bot is monitoring")
 async def stocks_command(interaction: discord.Interaction):
@@ -161,24 +294,29 @@ async def stocks_command(interaction: discord.Interaction):
         
         embed.add_field(
             name="⚙️ Settings", 
-            value=f"• **Threshold:** ${CROSSING_THRESHOLD}\n• **Cooldown:** {ALERT_COOLDOWN}s\n• **Timeframe:** {PIVOT_TIMEFRAME}", 
+            value=f"• **Threshold:** ${CROSSING_THRESHOLD}\n• **Cooldown:** {ALERT_COOLDOWN}s\n• **Timeframes:** {', '.join(TIMEFRAME_LABELS[tf] for tf in PIVOT_TIMEFRAMES)}\n• **Method:** {PIVOT_METHOD.title()}", 
             inline=True
         )
         
-        stocks_with_pivots = len([s for s in STOCKS if pivot_levels.get(s)])
+        stocks_with_pivots = sum(1 for s in STOCKS if s in pivot_table)
         embed.add_field(
             name="📊 Status", 
-            value=f"• **Pivot Data:** {stocks_with_pivots}/{len(STOCKS)} stocks loaded\n• **Real-time:** {'✅ Active' if any(pivot_levels.values()) else '⏳ Loading'}", 
+            value=f"• **Pivot Data:** {stocks_with_pivots}/{len(STOCKS)} stocks loaded\n• **Real-time:** {'✅ Active' if len(pivot_table) else '⏳ Loading'}", 
             inline=True
         )
         
-        if any(pivot_levels.values()):
+        if len(pivot_table):
             pivot_text = ""
             for stock in STOCKS:
-                if pivot_levels.get(stock):
-                    levels = pivot_levels[stock]
-                    pivot_price = levels.get('Pivot', 0)
-                    pivot_text += f"**{stock}**: Pivot ${pivot_price:.2f}\n"
+                levels = pivot_table.get(stock)
+                if levels:
+                    pivot_price = levels.get('1Day', {}).get('Pivot', 0)
+                    cached = price_cache.get(stock)
+                    last_text = f" • Last ${cached[0]:.2f} ({cached[1]:.0f}s ago)" if cached else ""
+                    vwap = bar_aggregator.vwap(stock)
+                    if vwap is not None:
+                        last_text += f" • VWAP ${vwap:.2f}"
+                    pivot_text += f"**{stock}**: Pivot ${pivot_price:.2f}{last_text}\n"
                 else:
                     pivot_text += f"**{stock}**: Loading...\n"
             
@@ -206,25 +344,39 @@ async def status_command(interaction: discord.Interaction):
             timestamp=datetime.now()
         )
         
+        ready, reason = readiness()
+        age = stream_age()
+        stats = ingest_stats()
+        if not ready:
+            embed.color = 0xffaa00
+        
         embed.add_field(
             name="🔗 Connections", 
-            value="• **Discord:** ✅ Online\n• **Alpaca API:** ✅ Connected\n• **WebSocket:** ✅ Active" if any(pivot_levels.values()) else "• **Discord:** ✅ Online\n• **Alpaca API:** ⏳ Connecting\n• **WebSocket:** ⏳ Starting", 
+            value=f"• **Discord:** ✅ Online ({discord_client.latency * 1000:.0f} ms)\n"
+                  f"• **WebSocket:** {'✅ Connected' if ingest.connected else '❌ Disconnected'}"
+                  f"{f', last data {age:.0f}s ago' if age is not None else ''}\n"
+                  f"• **Reconnects:** {stats['reconnects']}\n"
+                  f"• **REST polling:** {'🚨 failover' if failover.active else 'quiet symbols only'}\n"
+                  f"• **Alpaca REST:** {rest_seconds.total_count()} calls, {rest_errors.total()} failed", 
             inline=True
         )
         
         embed.add_field(
             name="📊 Monitoring", 
-            value=f"• **Stocks:** {len(STOCKS)}\n• **Channel:** #{DISCORD_CHANNEL}\n• **Mode:** Live Trading", 
+            value=f"• **Stocks:** {len(STOCKS)} ({len(pivot_table)} with pivots)\n• **Channels:** {channel_summary()}\n"
+                  f"• **Market:** {'🟢 Open' if trading_calendar.is_open() else '🔴 Closed'}", 
             inline=True
         )
         
+        dispatch_stats = dispatcher.stats()
         embed.add_field(
             name="⚡ Performance", 
-            value=f"• **Servers:** {len(discord_client.guilds)}\n• **Pivot Updates:** Daily\n• **Alert Cooldown:** {ALERT_COOLDOWN}s", 
+            value=f"• **Ticks:** {stats['messages']:,}\n• **Alerts:** {dispatch_stats['alerts_sent']} sent, {stats['suppressed']} suppressed\n"
+                  f"• **Queue:** {dispatch_stats['queued']} waiting\n• **Alert Cooldown:** {ALERT_COOLDOWN}s", 
             inline=True
         )
         
-        embed.set_footer(text="Bot is running smoothly! 🚀")
+        embed.set_footer(text="Bot is running smoothly! 🚀" if ready else f"⚠️ Not ready: {reason}")
         
         await interaction.response.send_message(embed=embed)
         print(f"✅ Slash command /status used by {interaction.user} in {interaction.guild.name}")
@@ -235,8 +387,10 @@ async def status_command(interaction: discord.Interaction):
 
 @tree.command(name="pivots", description="Show detailed pivot levels for all monitored stocks")
 async def pivots_command(interaction: discord.Interaction):
+    # Price lookups go over the network; acknowledge within Discord's 3s deadline first
+    await interaction.response.defer()
     try:
-        if not any(pivot_levels.values()):
+        if not len(pivot_table):
             embed = discord.Embed(
                 title="⏳ Pivot Levels Loading",
                 description="No pivot data available yet. Try requesting a specific stock with `/pivots` or wait for data to load.",
@@ -244,9 +398,11 @@ async def pivots_command(interaction: discord.Interaction):
                 timestamp=datetime.now()
             )
             embed.set_footer(text="Use /pivots to see available stocks")
-            await interaction.response.send_message(embed=embed)
+            await interaction.followup.send(embed=embed)
             return
         
+        current_prices = await fetch_current_prices(pivot_table.symbols())
+        
         embed = discord.Embed(
             title="📊 Current Pivot Levels",
             description="Detailed pivot points for all monitored stocks:",
@@ -254,48 +410,24 @@ async def pivots_command(interaction: discord.Interaction):
             timestamp=datetime.now()
         )
         
-        for stock, levels in pivot_levels.items():
+        for stock, levels in pivot_table.items():
             if levels:
-                level_text = ""
-                level_order = ['R3', 'R2', 'R1', 'Pivot', 'S1', 'S2', 'S3']
-                
-                for level_name in level_order:
-                    if level_name in levels:
-                        level_value = levels[level_name]
-                        if level_name == 'Pivot':
-                            level_text += f"🎯 **{level_name}**: ${level_value:.2f}\n"
-                        elif 'R' in level_name:
-                            level_text += f"⬆️ **{level_name}**: ${level_value:.2f}\n"
-                        elif 'S' in level_name:
-                            level_text += f"⬇️ **{level_name}**: ${level_value:.2f}\n"
-                        else:
-                            level_text += f"📈 **{level_name}**: ${level_value:.2f}\n"
+                level_text = format_levels(levels)
                 
-                try:
-                    latest_trade = api.get_latest_trade(stock)
-                    if latest_trade:
-                        current_price = latest_trade.price
-                        level_text += f"\n💰 **Current Price**: ${current_price:.2f}"
-                        print(f"📊 Added current price: ${current_price:.2f}")
-                    else:
-                        current_bars = api.get_bars(stock, '1Min', limit=1).df
-                        if len(current_bars) > 0:
-                            current_price = current_bars['close'].iloc[0]
-                            level_text += f"\n💰 **Current Price**: ${current_price:.2f}"
-                            print(f"📊 Added current price (from bar): ${current_price:.2f}")
-                        else:
-                            level_text += f"\n💰 **Current Price**: Unavailable"
-                            print(f"⚠️ No current price data available for {stock}")
-                except Exception as e:
-                    print(f"⚠️ Could not fetch current price for {stock}: {e}")
-                    level_text += f"\n💰 **Current Price**: Loading..."
+                current_price = current_prices.get(stock)
+                if current_price is not None:
+                    level_text += f"\n💰 **Current Price**: ${current_price:.2f}"
+                else:
+                    level_text += f"\n💰 **Current Price**: Unavailable"
+                vwap = bar_aggregator.vwap(stock)
+                if vwap is not None:
+                    level_text += f"\n📊 **VWAP**: ${vwap:.2f}"
                 
                 embed.add_field(
                     name=f"📈 {stock}", 
                     value=level_text, 
                     inline=True
                 )
-                print(f"📈 Added {stock} data to embed")
             else:
                 embed.add_field(
                     name=f"⏳ {stock}", 
@@ -312,12 +444,87 @@ async def pivots_command(interaction: discord.Interaction):
         
         embed.set_footer(text="Pivot levels are recalculated daily at market close")
         
-        await interaction.response.send_message(embed=embed)
+        await interaction.followup.send(embed=embed)
         print(f"✅ Slash command /pivots used by {interaction.user} in {interaction.guild.name}")
         
     except Exception as e:
         print(f"❌ Error in /pivots command: {e}")
-        await interaction.response.send_message("❌ Error retrieving pivot levels.", ephemeral=True)
+        await interaction.followup.send("❌ Error retrieving pivot levels.", ephemeral=True)
+
+SYMBOL_PATTERN = re.compile(r'^[A-Z][A-Z.]{0,9}$')
+
+def parse_symbols(text):
+    """Split a comma/space separated symbol list; returns (valid symbols, rejected tokens)"""
+    tokens = [t.upper() for t in re.split(r'[\s,]+', text or '') if t]
+    valid = [t for t in dict.fromkeys(tokens) if SYMBOL_PATTERN.match(t)]
+    return valid, [t for t in tokens if not SYMBOL_PATTERN.match(t)]
+
+def symbol_summary(symbols, limit=1000):
+    """Comma-joined symbols, truncated to fit a Discord message"""
+    text = ", ".join(symbols)
+    if len(text) <= limit:
+        return text or "none"
+    shown = text[:limit].rsplit(", ", 1)[0]
+    return shown + f", … (+{len(symbols) - len(shown.split(', '))} more)"
+
+watch_group = discord.app_commands.Group(name="watch", description="Change the monitored stocks without restarting",
+                                         default_permissions=discord.Permissions(manage_guild=True))
+
+@watch_group.command(name="add", description="Start monitoring stocks (comma or space separated)")
+async def watch_add_command(interaction: discord.Interaction, symbols: str):
+    await interaction.response.defer()
+    try:
+        wanted, rejected = parse_symbols(symbols)
+        added, loaded = await watch_symbols(wanted)
+        no_data = [s for s in added if s not in loaded]
+        text = f"➕ **Added {len(added)}** stock(s): {symbol_summary(added)}\n📊 Pivots loaded for {len(loaded)}/{len(added)}"
+        if no_data:
+            text += f"\n⚠️ No daily bars for: {symbol_summary(no_data, 300)}"
+        if rejected:
+            text += f"\n❌ Not valid symbols: {symbol_summary(rejected, 300)}"
+        await interaction.followup.send(text + f"\n👀 Now monitoring {len(STOCKS)} stocks")
+        print(f"✅ Slash command /watch add used by {interaction.user}: +{len(added)}")
+    except Exception as e:
+        print(f"❌ Error in /watch add command: {e}")
+        await interaction.followup.send("❌ Error adding stocks.", ephemeral=True)
+
+@watch_group.command(name="remove", description="Stop monitoring stocks (comma or space separated)")
+async def watch_remove_command(interaction: discord.Interaction, symbols: str):
+    await interaction.response.defer()
+    try:
+        wanted, _ = parse_symbols(symbols)
+        removed = await unwatch_symbols(wanted)
+        await interaction.followup.send(f"➖ **Removed {len(removed)}** stock(s): {symbol_summary(removed)}\n"
+                                        f"👀 Now monitoring {len(STOCKS)} stocks")
+        print(f"✅ Slash command /watch remove used by {interaction.user}: -{len(removed)}")
+    except Exception as e:
+        print(f"❌ Error in /watch remove command: {e}")
+        await interaction.followup.send("❌ Error removing stocks.", ephemeral=True)
+
+@watch_group.command(name="list", description="List the monitored stocks")
+async def watch_list_command(interaction: discord.Interaction):
+    armed = len([s for s in STOCKS if s in level_book])
+    await interaction.response.send_message(
+        f"👀 **Monitoring {len(STOCKS)} stocks** ({armed} with pivots)\n{symbol_summary(STOCKS, 1800)}")
+
+tree.add_command(watch_group)
+
+def channel_summary():
+    """Where alerts go, for /status"""
+    if not webhooks:
+        return f"#{DISCORD_CHANNEL}"
+    stats = webhooks.stats()
+    guilds = {route.guild for route in alert_routes}
+    return (f"{stats['routes']} webhooks in {len(guilds)} server(s), {stats['failed']} failed posts, "
+            f"{stats['pending']} pending")
+
+def is_command_channel(channel):
+    """Text commands are answered in DISCORD_CHANNEL and in every channel an alert route posts to"""
+    if channel.name == DISCORD_CHANNEL:
+        return True
+    guild = getattr(channel, 'guild', None)
+    return any(route.channel == channel.name and route.guild in (None, getattr(guild, 'name', None))
+               for route in alert_routes)
 
 @discord_client.event
 async def on_message(message):
@@ -329,11 +536,11 @@ async def on_message(message):
     
     print(f"✅ Message is not from bot, proceeding...")
     
-    if message.channel.name != DISCORD_CHANNEL:
-        print(f"🚫 Message not in target channel. Expected: '{DISCORD_CHANNEL}', Got: '{message.channel.name}'")
+    if not is_command_channel(message.channel):
+        print(f"🚫 Message not in an alert channel. Expected: '{DISCORD_CHANNEL}' or a routed channel, Got: '{message.channel.name}'")
         return
     
-    print(f"✅ Message is in correct channel '{DISCORD_CHANNEL}', processing commands...")
+    print(f"✅ Message is in alert channel '{message.channel.name}', processing commands...")
     
     if message.content.lower() == '!test':
         print(f"🎯 Processing !test command")
@@ -355,7 +562,7 @@ async def on_message(message):
         )
         status_embed.add_field(name="📊 Monitoring", value=", ".join(STOCKS), inline=False)
         status_embed.add_field(name="🎯 Mode", value="Live Trading Mode", inline=True)
-        status_embed.add_field(name="📈 Pivot Levels", value=f"{len([s for s in STOCKS if pivot_levels.get(s)])} stocks loaded", inline=True)
+        status_embed.add_field(name="📈 Pivot Levels", value=f"{sum(1 for s in STOCKS if s in pivot_table)} stocks loaded", inline=True)
         await message.channel.send(embed=status_embed)
         print(f"✅ !status command completed")
     
@@ -378,20 +585,20 @@ async def on_message(message):
         
         stocks_embed.add_field(
             name="⚙️ Settings", 
-            value=f"• **Threshold:** ${CROSSING_THRESHOLD}\n• **Cooldown:** {ALERT_COOLDOWN}s\n• **Timeframe:** {PIVOT_TIMEFRAME}", 
+            value=f"• **Threshold:** ${CROSSING_THRESHOLD}\n• **Cooldown:** {ALERT_COOLDOWN}s\n• **Timeframes:** {', '.join(TIMEFRAME_LABELS[tf] for tf in PIVOT_TIMEFRAMES)}\n• **Method:** {PIVOT_METHOD.title()}", 
             inline=True
         )
         
-        stocks_with_pivots = len([s for s in STOCKS if pivot_levels.get(s)])
+        stocks_with_pivots = sum(1 for s in STOCKS if s in pivot_table)
         stocks_embed.add_field(
             name="📊 Status", 
-            value=f"• **Pivot Data:** {stocks_with_pivots}/{len(STOCKS)} stocks loaded\n• **Real-time:** {'✅ Active' if any(pivot_levels.values()) else '⏳ Loading'}", 
+            value=f"• **Pivot Data:** {stocks_with_pivots}/{len(STOCKS)} stocks loaded\n• **Real-time:** {'✅ Active' if len(pivot_table) else '⏳ Loading'}", 
             inline=True
         )
         
         status_text = ""
         for stock in STOCKS:
-            if pivot_levels.get(stock):
+            if stock in pivot_table:
                 status_text += f"✅ **{stock}** - Data loaded\n"
             else:
                 status_text += f"⏳ **{stock}** - Use `!pivots {stock}` to load\n"
@@ -421,7 +628,7 @@ async def on_message(message):
         ticker = parts[1].upper()
         print(f"📈 Specific ticker requested: {ticker}")
         
-        if not pivot_levels.get(ticker):
+        if ticker not in pivot_table:
             print(f"⏳ No pivot data for {ticker}, fetching on-demand")
             loading_msg = await message.channel.send(f"⏳ Fetching pivot data for **{ticker}**...")
             print(f"📤 Loading message sent")
@@ -440,8 +647,8 @@ async def on_message(message):
         else:
             print(f"✅ Found cached pivot data for {ticker}")
         
-        levels = pivot_levels[ticker]
-        print(f"📊 Creating embed for {ticker} with levels: {list(levels.keys())}")
+        levels = pivot_table.get(ticker)
+        print(f"📊 Creating embed for {ticker} with timeframes: {list(levels.keys())}")
         
         embed = discord.Embed(
             title=f"📊 {ticker} Pivot Analysis",
@@ -450,44 +657,16 @@ async def on_message(message):
             timestamp=datetime.now()
         )
         
-        level_text = ""
-        
-        level_order = ['R3', 'R2', 'R1', 'Pivot', 'S1', 'S2', 'S3']
-        
-        for level_name in level_order:
-            if level_name in levels:
-                level_value = levels[level_name]
-                if level_name == 'Pivot':
-                    level_text += f"🎯 **{level_name}**: ${level_value:.2f}\n"
-                elif 'R' in level_name:  # Resistance levels
-                    level_text += f"⬆️ **{level_name}**: ${level_value:.2f}\n"
-                elif 'S' in level_name:  # Support levels
-                    level_text += f"⬇️ **{level_name}**: ${level_value:.2f}\n"
-                else:
-                    level_text += f"📈 **{level_name}**: ${level_value:.2f}\n"
-                print(f"📝 Added {level_name}: ${level_value:.2f}")
+        level_text = format_levels(levels)
         
         # Add current price if available
-        try:
-            # Get the latest trade for current price
-            latest_trade = api.get_latest_trade(ticker)
-            if latest_trade:
-                current_price = latest_trade.price
-                level_text += f"\n💰 **Current Price**: ${current_price:.2f}"
-                print(f"📊 Added current price: ${current_price:.2f}")
-            else:
-                # Fallback to latest bar if no trade available
-                current_bars = api.get_bars(ticker, '1Min', limit=1).df
-                if len(current_bars) > 0:
-                    current_price = current_bars['close'].iloc[0]
-                    level_text += f"\n💰 **Current Price**: ${current_price:.2f}"
-                    print(f"📊 Added current price (from bar): ${current_price:.2f}")
-                else:
-                    level_text += f"\n💰 **Current Price**: Unavailable"
-                    print(f"⚠️ No current price data available for {ticker}")
-        except Exception as e:
-            print(f"⚠️ Could not fetch current price for {ticker}: {e}")
-            level_text += f"\n💰 **Current Price**: Loading..."
+        current_price = (await fetch_current_prices([ticker])).get(ticker)
+        if current_price is not None:
+            level_text += f"\n💰 **Current Price**: ${current_price:.2f}"
+            print(f"📊 Added current price: ${current_price:.2f}")
+        else:
+            level_text += f"\n💰 **Current Price**: Unavailable"
+            print(f"⚠️ No current price data available for {ticker}")
         
         embed.add_field(
             name="📈 Pivot Levels", 
@@ -495,7 +674,11 @@ async def on_message(message):
             inline=False
         )
         
-        embed.set_footer(text=f"Pivot levels for {ticker} • Updated daily at market close")
+        intraday = intraday_text(ticker)
+        if intraday:
+            embed.add_field(name="🕐 Intraday", value=intraday, inline=False)
+        
+        embed.set_footer(text=f"Pivot levels for {ticker} from the {pivot_table.day(ticker)} session • Updated daily at market close")
         await message.channel.send(embed=embed)
         print(f"✅ !pivots {ticker} command completed")
     
@@ -504,233 +687,330 @@ async def on_message(message):
     
     print(f"📨 Message processing completed for: '{message.content}'")
 
-async def send_discord_alert(symbol, pivot_level, price, timestamp):
-    print(f"📤 Attempting to send Discord alert for {symbol} {pivot_level} at ${price:.2f}")
-    
-    if not discord_channel_obj:
-        print(f"❌ No Discord channel available for alert")
-        return
-    
+async def fetch_current_prices(symbols):
+    """
+    Latest price per symbol: stream-fed cache first, then one batched
+    snapshots request for the symbols whose cached price is older than
+    PRICE_MAX_AGE. Symbols without data are absent.
+    """
+    prices = price_cache.fresh(symbols, PRICE_MAX_AGE)
+    stale = [s for s in symbols if s not in prices]
+    if not stale:
+        return prices
     try:
-        print(f"📝 Creating Discord embed for {symbol} alert")
+        snapshots = await data_client.get_snapshots(stale)
+    except Exception as e:
+        print(f"⚠️ Could not fetch current prices for {len(stale)} symbols: {e}")
+        return prices
+    fetched = {symbol: snapshot_price(snapshot) for symbol, snapshot in snapshots.items()}
+    fetched = {symbol: price for symbol, price in fetched.items() if price}
+    price_cache.update_many(fetched)
+    prices.update(fetched)
+    return prices
+
+def intraday_text(symbol):
+    """Session VWAP and the latest 1m/5m bars from the stream-fed aggregator (no network), or ''"""
+    lines = []
+    vwap = bar_aggregator.vwap(symbol)
+    if vwap is not None:
+        lines.append(f"📊 **VWAP**: ${vwap:.2f}")
+    for timeframe, label in (('1Min', '1m'), ('5Min', '5m')):
+        bar = bar_aggregator.bar(symbol, timeframe)
+        if bar is not None:
+            start = bar.start.astimezone(MARKET_TZ).strftime('%H:%M')
+            lines.append(f"🕐 **{label} {start}**: O ${bar.open:.2f} H ${bar.high:.2f} L ${bar.low:.2f} "
+                         f"C ${bar.close:.2f} • Vol {bar.volume:,.0f}")
+    return "\n".join(lines)
+
+def format_levels(levels_by_timeframe):
+    """Level lines from R3 down to S3, one block per timeframe (titled when there are several)"""
+    blocks = []
+    for timeframe, levels in levels_by_timeframe.items():
+        lines = [f"**{TIMEFRAME_LABELS[timeframe]}**"] if len(levels_by_timeframe) > 1 else []
+        for level_name in ['R3', 'R2', 'R1', 'Pivot', 'S1', 'S2', 'S3']:
+            if level_name in levels:
+                emoji = "🎯" if level_name == 'Pivot' else "⬆️" if 'R' in level_name else "⬇️"
+                lines.append(f"{emoji} **{level_name}**: ${levels[level_name]:.2f}")
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks) + "\n"
+
+def alert_description(level, crossed, timeframe='1Day', action=None):
+    label = 'the main pivot point' if level == 'Pivot' else level
+    if timeframe != '1Day':
+        timeframe_label = TIMEFRAME_LABELS[timeframe].lower()
+        label = f"the {timeframe_label} pivot point" if level == 'Pivot' else f"{timeframe_label} {level}"
+    if action == 'bounce':
+        return f"↩️ Price bounced off {label}"
+    if crossed:
+        return f"⚡ Price crossed {label}"
+    if action == 'break':
+        return f"⚡ Price broke through {label}"
+    if level == 'Pivot':
+        return f"🎯 Price is near {label}"
+    if 'R' in level:
+        return f"⬆️ Price is approaching resistance level {label}"
+    return f"⬇️ Price is approaching support level {label}"
+
+def speed_text(alert):
+    """Approach speed in $/min from the tick history, or '' without one"""
+    if alert.velocity is None:
+        return ""
+    return f"{'📈' if alert.velocity >= 0 else '📉'} ${alert.velocity * 60:+.2f}/min"
+
+def render_alerts(alerts):
+    """
+    Dispatcher renderer: one alert keeps the classic single-alert embed, a
+    burst becomes multi-field embeds (25 fields each, as Discord allows).
+    Returns (content, embeds).
+    """
+    if len(alerts) == 1:
+        alert = alerts[0]
         embed = discord.Embed(
             title="📊 Pivot Level Alert",
-            color=0x00ff00 if 'R' in pivot_level else 0xff0000,
-            timestamp=datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+            description=alert_description(alert.level, alert.crossed, alert.timeframe, alert.action),
+            color=0x00ff00 if 'R' in alert.level else 0xff0000,
+            timestamp=alert.tick_time or alert.created_at
         )
-        
-        embed.add_field(name="Symbol", value=f"**{symbol}**", inline=True)
-        embed.add_field(name="Pivot Level", value=f"**{pivot_level}**", inline=True)
-        embed.add_field(name="Price", value=f"**${price:.2f}**", inline=True)
-        
-        if pivot_level == 'Pivot':
-            embed.description = "🎯 Price is near the main pivot point"
-        elif 'R' in pivot_level:
-            embed.description = f"⬆️ Price is approaching resistance level {pivot_level}"
-        elif 'S' in pivot_level:
-            embed.description = f"⬇️ Price is approaching support level {pivot_level}"
-        
-        print(f"📤 Sending alert to Discord channel: #{discord_channel_obj.name}")
-        await discord_channel_obj.send(embed=embed)
-        print(f"✅ Discord alert sent successfully for {symbol} {pivot_level}")
-        
-    except Exception as e:
-        print(f"❌ Error sending Discord alert for {symbol}: {e}")
-        import traceback
-        print(f"📋 Full traceback:\n{traceback.format_exc()}")
+        embed.add_field(name="Symbol", value=f"**{alert.symbol}**", inline=True)
+        embed.add_field(name="Pivot Level", value=f"**{alert.level}** ({TIMEFRAME_LABELS[alert.timeframe]})", inline=True)
+        embed.add_field(name="Price", value=f"**${alert.price:.2f}**", inline=True)
+        vwap = bar_aggregator.vwap(alert.symbol)
+        if vwap is not None:
+            embed.add_field(name="VWAP", value=f"${vwap:.2f}", inline=True)
+        if alert.velocity is not None:
+            embed.add_field(name="Speed", value=speed_text(alert), inline=True)
+        return None, [embed]
+    
+    embeds = []
+    for start in range(0, len(alerts), 25):
+        chunk = alerts[start:start + 25]
+        embed = discord.Embed(
+            title=f"📊 Pivot Level Alerts ({len(alerts)})" if start == 0 else None,
+            color=0xffaa00,
+            timestamp=max(a.tick_time or a.created_at for a in chunk)
+        )
+        for alert in chunk:
+            embed.add_field(name=f"{alert.symbol} {TIMEFRAME_LABELS[alert.timeframe]} {alert.level}",
+                            value=f"**${alert.price:.2f}** {alert_description(alert.level, alert.crossed, alert.timeframe, alert.action)} {speed_text(alert)}".rstrip(),
+                            inline=True)
+        embeds.append(embed)
+    return None, embeds
+
+async def post_to_channel(content, embeds):
+    """Dispatcher sender for the alert channel"""
+    if not discord_channel_obj:
+        print(f"❌ No Discord channel available, dropping message")
+        return None
+    await discord_channel_obj.send(content=content, embeds=embeds or [])
+    return None
+
+if alert_routes:
+    # Every round is queued to each webhook's own worker; rounds are paced at one webhook's limit
+    webhooks = WebhookFanout(alert_routes, render_alerts, max_connections=WEBHOOK_CONNECTIONS, username=WEBHOOK_USERNAME)
+    dispatcher = Dispatcher(webhooks.send, render_alerts, window=ALERT_BATCH_WINDOW, send_alerts=webhooks.send_alerts,
+                            bucket=RateLimitBucket(WEBHOOK_RATE_LIMIT, WEBHOOK_RATE_PERIOD))
+else:
+    webhooks = None
+    dispatcher = Dispatcher(post_to_channel, render_alerts, window=ALERT_BATCH_WINDOW)
 
-def calculate_pivot_points(high, low, close):
+def calculate_pivot_points(high, low, close, open_=None, method=None):
     """
-    Calculate traditional pivot points based on previous day's High, Low, Close.
+    Calculate pivot points for a single symbol from the previous day's bar.
     
-    Traditional Pivot Point Rules:
-    - Pivot = (High + Low + Close) / 3
-    - R1 = Pivot + (Pivot - Low) = Above pivot at distance equal to pivot-to-low
-    - S1 = Pivot - (High - Pivot) = Below pivot at distance equal to high-to-pivot  
-    - R2 = Pivot + (High - Low) = Above pivot at distance equal to trading range
-    - S2 = Pivot - (High - Low) = Below pivot at distance equal to trading range
-    - R3 = R2 + (High - Low) = Above second resistance at distance equal to trading range
-    - S3 = S2 - (High - Low) = Below second support at distance equal to trading range
+    Thin wrapper over pivot_engine.compute_pivots(); `method` defaults to
+    PIVOT_METHOD. See pivot_engine for the formulas of each method.
     """
-    print(f"🧮 Starting pivot calculation with inputs:")
-    print(f"   High: ${high:.2f}")
-    print(f"   Low: ${low:.2f}")
-    print(f"   Close: ${close:.2f}")
-    
-    # Calculate pivot point
-    pivot = (high + low + close) / 3
-    print(f"🧮 Pivot = (${high:.2f} + ${low:.2f} + ${close:.2f}) / 3 = ${pivot:.2f}")
-    
-    # Calculate trading range
-    trading_range = high - low
-    print(f"🧮 Trading Range = ${high:.2f} - ${low:.2f} = ${trading_range:.2f}")
-    
-    # First level resistance and support
-    r1 = pivot + (pivot - low)  # Above pivot at distance equal to pivot-to-low
-    s1 = pivot - (high - pivot)  # Below pivot at distance equal to high-to-pivot
-    
-    print(f"🧮 R1 = ${pivot:.2f} + (${pivot:.2f} - ${low:.2f}) = ${pivot:.2f} + ${(pivot - low):.2f} = ${r1:.2f}")
-    print(f"🧮 S1 = ${pivot:.2f} - (${high:.2f} - ${pivot:.2f}) = ${pivot:.2f} - ${(high - pivot):.2f} = ${s1:.2f}")
-    
-    # Second level resistance and support  
-    r2 = pivot + trading_range  # Above pivot at distance equal to trading range
-    s2 = pivot - trading_range  # Below pivot at distance equal to trading range
-    
-    print(f"🧮 R2 = ${pivot:.2f} + ${trading_range:.2f} = ${r2:.2f}")
-    print(f"🧮 S2 = ${pivot:.2f} - ${trading_range:.2f} = ${s2:.2f}")
-    
-    # Third level resistance and support
-    r3 = r2 + trading_range  # Above second resistance at distance equal to trading range
-    s3 = s2 - trading_range  # Below second support at distance equal to trading range
+    levels = compute_pivots([high], [low], [close], method or PIVOT_METHOD,
+                            None if open_ is None else [open_])
+    return levels_to_dict(levels[0])
+
+def get_last_trading_day():
+    """Return the last exchange session before today (market time), skipping weekends and holidays"""
+    return trading_calendar.previous_session(market_today())
+
+async def init_trading_calendar():
+    global trading_calendar
+    try:
+        trading_calendar = await load_calendar(API_KEY, API_SECRET, BASE_URL, CALENDAR_CACHE)
+        print(f"📅 Trading calendar loaded: last session {get_last_trading_day()}, "
+              f"market {'open' if trading_calendar.is_open() else 'closed'}")
+    except Exception as e:
+        log.warning("⚠️ Could not load the trading calendar, holidays will not be skipped: %s", e)
+
+def arm_pivot_levels(levels_by_symbol, day):
+    pivot_table.put_many(levels_by_symbol, day)
+    rows = {symbol: pivot_table.row(symbol) for symbol in levels_by_symbol}
+    for symbol, row in rows.items():
+        level_book.arm_row(symbol, row, PIVOT_TIMEFRAMES)
+    if sharded_ingest is not None:
+        # Queued rows are pickled later, so send copies rather than live table views
+        sharded_ingest.arm({symbol: row.copy() for symbol, row in rows.items()})
+
+def store_method(timeframe):
+    """Pivot store method key; daily levels keep the plain method name used before timeframes existed"""
+    return PIVOT_METHOD if timeframe == '1Day' else f"{PIVOT_METHOD}:{timeframe}"
+
+def next_session_after(session):
+    try:
+        return trading_calendar.next_session(session)
+    except ValueError:
+        return session + timedelta(days=1)
+
+def history_start(session):
+    """First day of bar history the PIVOT_TIMEFRAMES levels following `session` need"""
+    target = next_session_after(session)
+    return min(pivot_period(tf, target, session)[0] for tf in PIVOT_TIMEFRAMES)
+
+async def update_bar_history(symbols, session):
+    """
+    Append the daily bars `symbols` are missing up to `session` to the bar
+    history. Only days outside each symbol's fetched range are requested,
+    batched by start day, so a routine update is one bulk request per 200
+    symbols. Returns the number of HTTP requests made.
+    """
+    since = history_start(session)
+    coverage = bar_history.coverage(symbols)
+    by_start = {}
+    for symbol in symbols:
+        first, through = coverage.get(symbol, (None, None))
+        start = since if first is None or first > since else max(since, through + timedelta(days=1))
+        if start <= session:
+            by_start.setdefault(start, []).append(symbol)
+    if not by_start:
+        return 0
+    async with AlpacaDataClient(API_KEY, API_SECRET, DATA_URL, on_request=record_rest_call) as client:
+        for start, group in sorted(by_start.items()):
+            print(f"📅 Fetching daily bars for {len(group)} symbols from {start} to {session}...")
+            bars = await client.get_bars(group, '1Day', start.isoformat(), session.isoformat())
+            written = bar_history.append(bars, group, start, session)
+            print(f"📡 Stored {written} daily bars for {len(bars)}/{len(group)} symbols")
+        return client.request_count
+
+def history_levels(symbols, session):
+    """
+    {symbol: {timeframe: levels}} for the session after `session`, computed
+    from the bar history in one vectorized pass per timeframe. Timeframes
+    without bars for a symbol map to an empty dict.
+    """
+    target = next_session_after(session)
+    levels = {symbol: {timeframe: {} for timeframe in PIVOT_TIMEFRAMES} for symbol in symbols}
+    for timeframe in PIVOT_TIMEFRAMES:
+        first, last = pivot_period(timeframe, target, session)
+        found, open_, high, low, close = bar_history.ohlc(symbols, first, last)
+        if not found:
+            continue
+        rows = compute_pivots(high, low, close, PIVOT_METHOD, open_)
+        for symbol, row in zip(found, rows):
+            levels[symbol][timeframe] = levels_to_dict(row)
+    return levels
+
+async def load_pivot_levels(symbols, session=None, arm=True):
+    """
+    Load the PIVOT_TIMEFRAMES levels derived from `session` (default: the
+    last trading day): symbols with every timeframe in the pivot store come
+    from disk. For the rest, missing daily bars are appended to the local bar
+    history, daily/weekly/monthly levels are aggregated from it and written
+    back to the store for the symbols that have every timeframe. With `arm`
+    the levels also replace the live ones.
+    Returns {symbol: {timeframe: levels}} for the symbols that had data.
+    """
+    last_trading_day = session or get_last_trading_day()
+    day = last_trading_day.strftime('%Y-%m-%d')
     
-    print(f"🧮 R3 = ${r2:.2f} + ${trading_range:.2f} = ${r3:.2f}")
-    print(f"🧮 S3 = ${s2:.2f} - ${trading_range:.2f} = ${s3:.2f}")
+    stored = {tf: pivot_store.get_many(day, store_method(tf), symbols) for tf in PIVOT_TIMEFRAMES}
+    loaded = {s: {tf: stored[tf][s] for tf in PIVOT_TIMEFRAMES}
+              for s in symbols if all(s in stored[tf] for tf in PIVOT_TIMEFRAMES)}
+    if arm:
+        arm_pivot_levels(loaded, last_trading_day)
+    to_compute = [s for s in symbols if s not in loaded]
+    if loaded:
+        print(f"💾 Loaded {len(loaded)}/{len(symbols)} symbols from the pivot store for {last_trading_day}")
     
-    result = {'Pivot': pivot, 'R1': r1, 'S1': s1, 'R2': r2, 'S2': s2, 'R3': r3, 'S3': s3}
-    print(f"🎯 Final pivot levels: {result}")
+    if to_compute:
+        requests = await update_bar_history(to_compute, last_trading_day)
+        computed = history_levels(to_compute, last_trading_day)
+        # Symbols without a single bar get no levels; only symbols with every timeframe get store rows,
+        # so partial ones (a late daily bar, a new listing) are armed with what they have and tried again
+        computed = {s: levels for s, levels in computed.items() if any(levels.values())}
+        complete = {s: levels for s, levels in computed.items() if all(levels.values())}
+        missing = [s for s in to_compute if s not in computed]
+        if missing:
+            print(f"❌ No data returned on {last_trading_day} for: {', '.join(missing)}")
+        partial = [s for s in computed if s not in complete]
+        if partial:
+            print(f"⚠️ Missing some {', '.join(PIVOT_TIMEFRAMES)} levels on {last_trading_day} for: {', '.join(partial)}")
+        print(f"🧮 Computed {', '.join(PIVOT_TIMEFRAMES)} pivots for {len(complete)}/{len(to_compute)} symbols "
+              f"({requests} REST request(s))")
+        
+        for timeframe in PIVOT_TIMEFRAMES:
+            pivot_store.put_many(day, store_method(timeframe), {s: levels[timeframe] for s, levels in complete.items()})
+        if arm:
+            arm_pivot_levels(computed, last_trading_day)
+        loaded.update(computed)
     
-    return result
+    print(f"📊 Total stocks with pivot data: {sum(1 for s in STOCKS if s in pivot_table)}/{len(STOCKS)}")
+    return loaded
 
 async def fetch_pivot_data_for_stock(stock):
-    try:
-        print(f"📊 Fetching pivot data for {stock}...")
-        
-        # Get the last trading day (skip weekends)
-        from datetime import datetime, timedelta
-        def get_last_trading_day():
-            today = datetime.utcnow().date()
-            offset = 1
-            while True:
-                candidate = today - timedelta(days=offset)
-                if candidate.weekday() < 5:  # Mon-Fri are 0-4
-                    return candidate
-                offset += 1
-        
-        last_trading_day = get_last_trading_day()
-        print(f"📅 Fetching data for {stock} on {last_trading_day}...")
-        
-        # Use the working market data API approach
-        headers = {
-            'APCA-API-KEY-ID': API_KEY,
-            'APCA-API-SECRET-KEY': API_SECRET
-        }
-        
-        params = {
-            'timeframe': '1Day',
-            'start': last_trading_day.strftime('%Y-%m-%d'),
-            'end': last_trading_day.strftime('%Y-%m-%d'),
-            'limit': 1
-        }
-        
-        url = f"{DATA_URL}/stocks/{stock}/bars"
-        
-        response = requests.get(url, headers=headers, params=params)
-        print(f"📡 API response status: {response.status_code}")
-        
-        if response.status_code != 200:
-            print(f"❌ API error: {response.status_code} {response.text}")
-            return None
-        
-        data = response.json()
-        bars = data.get('bars', [])
-        
-        if not bars:
-            print(f"❌ No data returned for {stock} on {last_trading_day}")
-            return None
-        
-        bar = bars[0]
-        high = bar['h']
-        low = bar['l']
-        close = bar['c']
-        
-        print(f"📈 Data extracted for {stock} (last trading day - {last_trading_day}):")
-        print(f"   High: ${high:.2f}")
-        print(f"   Low: ${low:.2f}")
-        print(f"   Close: ${close:.2f}")
-        
-        pivot_data = calculate_pivot_points(high, low, close)
-        pivot_levels[stock] = pivot_data
-        
+    print(f"📊 Fetching pivot data for {stock}...")
+    pivot_data = await pivot_loader.get(stock)
+    if pivot_data:
         print(f"✅ Updated pivot levels for {stock}: {pivot_data}")
-        print(f"📊 Total stocks with pivot data: {len([s for s in STOCKS if pivot_levels.get(s)])}/{len(STOCKS)}")
-        return pivot_data
-        
-    except Exception as e:
-        print(f"❌ Error fetching pivot data for {stock}: {e}")
-        print(f"❌ Error type: {type(e)}")
-        import traceback
-        print(f"❌ Full traceback:\n{traceback.format_exc()}")
-        return None
+    return pivot_data
 
-def update_pivot_levels():
-    for stock in STOCKS:
-        try:
-            print(f"🔄 Updating pivot levels for {stock}...")
-            
-            # Get the last trading day (skip weekends)
-            from datetime import datetime, timedelta
-            def get_last_trading_day():
-                today = datetime.utcnow().date()
-                offset = 1
-                while True:
-                    candidate = today - timedelta(days=offset)
-                    if candidate.weekday() < 5:  # Mon-Fri are 0-4
-                        return candidate
-                    offset += 1
-            
-            last_trading_day = get_last_trading_day()
-            print(f"📅 Fetching data for {stock} on {last_trading_day}...")
-            
-            # Use the working market data API approach
-            headers = {
-                'APCA-API-KEY-ID': API_KEY,
-                'APCA-API-SECRET-KEY': API_SECRET
-            }
-            
-            params = {
-                'timeframe': '1Day',
-                'start': last_trading_day.strftime('%Y-%m-%d'),
-                'end': last_trading_day.strftime('%Y-%m-%d'),
-                'limit': 1
-            }
-            
-            url = f"{DATA_URL}/stocks/{stock}/bars"
-            
-            response = requests.get(url, headers=headers, params=params)
-            
-            if response.status_code != 200:
-                print(f"❌ API error for {stock}: {response.status_code}")
-                continue
-            
-            data = response.json()
-            bars = data.get('bars', [])
-            
-            if not bars:
-                print(f"❌ No data returned for {stock} on {last_trading_day}")
-                continue
-            
-            bar = bars[0]
-            high = bar['h']
-            low = bar['l']
-            close = bar['c']
-            
-            print(f"📈 Using data for {stock} from {last_trading_day}:")
-            print(f"   High: ${high:.2f}")
-            print(f"   Low: ${low:.2f}")
-            print(f"   Close: ${close:.2f}")
-            
-            pivot_levels[stock] = calculate_pivot_points(high, low, close)
-            print(f"✅ Updated pivot levels for {stock} (last trading day): {pivot_levels[stock]}")
-        except Exception as e:
-            print(f"❌ Error updating pivot levels for {stock}: {e}")
-    
-    if discord_channel_obj:
-        asyncio.create_task(send_daily_pivots_update())
-    
-    threading.Timer(86400, update_pivot_levels).start()
+def prune_pivot_store():
+    pruned = pivot_store.prune((get_last_trading_day() - timedelta(days=PIVOT_DB_RETENTION_DAYS)).isoformat())
+    if pruned:
+        log.info("🧹 Pruned %d old pivot rows from %s", pruned, PIVOT_DB)
+    # Never prune bars the next levels are still aggregated from
+    session = get_last_trading_day()
+    pruned = bar_history.prune(min(session - timedelta(days=HISTORY_RETENTION_DAYS), history_start(session)))
+    if pruned:
+        log.info("🧹 Pruned %d old daily bars from %s", pruned, HISTORY_DB)
+
+# Session whose pivots are armed, and whether run_trading_bot's startup load has finished
+armed_session = None
+startup_armed = asyncio.Event()
+
+async def update_pivot_levels():
+    """Pre-open job: arm pivots from the last session and post the daily summary"""
+    global armed_session
+    # A catch-up run at startup must not race the startup load for the same session
+    await startup_armed.wait()
+    session = get_last_trading_day()
+    symbols = STOCKS if session != armed_session else [s for s in STOCKS if s not in pivot_table]
+    print(f"🔄 Updating pivot levels for {len(symbols)}/{len(STOCKS)} stocks...")
+    if symbols:
+        await load_pivot_levels(symbols, session=session)
+        armed_session = session
+    print(f"✅ Pivot levels armed for {sum(1 for s in STOCKS if s in pivot_table)}/{len(STOCKS)} stocks ({session})")
+    await send_daily_pivots_update()
+
+async def rollover_after_close():
+    """Post-close job: store the next session's pivots from the session that just closed, so the pre-open run is a cache hit"""
+    today = market_today()
+    hours = trading_calendar.session(today)
+    # A catch-up run during a session rolls over the previous, completed one
+    session = today if hours and hours[1] <= datetime.now(timezone.utc) else trading_calendar.previous_session(today)
+    stored = await load_pivot_levels(STOCKS, session=session, arm=False)
+    print(f"🌙 Precomputed next-session pivots for {len(stored)}/{len(STOCKS)} stocks from {session}")
+    alert_cooldowns.purge()
+    prune_pivot_store()
+    log.info("📊 Session totals: %d alerts sent, %d suppressed by cooldown", alert_engine.alerts, alert_engine.suppressed,
+             extra={'alerts': alert_engine.alerts, 'suppressed': alert_engine.suppressed})
+
+async def closed_day_maintenance():
+    """Weekend/holiday job: refresh the trading calendar and prune old pivots; nothing else runs on closed days"""
+    await init_trading_calendar()
+    prune_pivot_store()
 
 async def send_daily_pivots_update():
-    if not discord_channel_obj:
+    # Catch-up runs at startup can fire before Discord has connected
+    for _ in range(120):
+        if discord_client.is_ready():
+            break
+        await asyncio.sleep(1)
+    if not (webhooks or discord_channel_obj):
         return
     
     try:
@@ -740,331 +1020,266 @@ async def send_daily_pivots_update():
             timestamp=datetime.now()
         )
         
-        for stock, levels in pivot_levels.items():
+        for stock, levels in pivot_table.items():
             if levels:
-                level_text = "\n".join([f"{k}: ${v:.2f}" for k, v in levels.items()])
+                level_text = "\n".join(f"{TIMEFRAME_LABELS[tf]} {k}: ${v:.2f}" if len(levels) > 1 else f"{k}: ${v:.2f}"
+                                       for tf, tf_levels in levels.items() for k, v in tf_levels.items())
                 embed.add_field(name=f"**{stock}**", value=level_text, inline=True)
         
         embed.set_footer(text="Pivot levels recalculated based on previous day's data")
-        await discord_channel_obj.send(embed=embed)
+        dispatcher.submit_message(embeds=[embed], priority=PRIORITY_SUMMARY)
         
     except Exception as e:
         print(f"Error sending daily pivot update: {e}")
 
-def on_websocket_message(ws, message):
+def on_websocket_message(message):
     try:
         if REAL_TIME_DEBUG:
-            print(f"📨 WebSocket message received: {message[:200]}...")
-        data = json.loads(message)
-        
-        if isinstance(data, list):
-            if REAL_TIME_DEBUG:
-                print(f"📋 Processing {len(data)} messages from WebSocket")
-            for i, msg in enumerate(data):
-                if REAL_TIME_DEBUG:
-                    print(f"📨 Processing message {i+1}/{len(data)}")
-                process_websocket_message(msg)
-        else:
-            if REAL_TIME_DEBUG:
-                print(f"📨 Processing single WebSocket message")
-            process_websocket_message(data)
+            tick_log.debug("📨 WebSocket message received: %.200s", message)
+        started = time.perf_counter()
+        count = tick_pipeline.feed(message)
+        frame_seconds.observe(time.perf_counter() - started)
+        if REAL_TIME_DEBUG:
+            tick_log.debug("📋 Processed %d messages from WebSocket", count)
             
     except json.JSONDecodeError as e:
-        print(f"❌ Failed to parse WebSocket message: {e}")
-        print(f"📨 Raw message: {message[:200]}...")
-    except Exception as e:
-        print(f"❌ Error processing WebSocket message: {e}")
-        import traceback
-        print(f"📋 Full traceback:\n{traceback.format_exc()}")
+        log.error("❌ Failed to parse WebSocket message: %s", e, extra={'raw': message[:200]})
+    except Exception:
+        log.exception("❌ Error processing WebSocket message")
 
-def process_websocket_message(msg):
-    try:
-        msg_type = msg.get('T')
-        stock = msg.get('S')
-        
-        if REAL_TIME_DEBUG:
-            print(f"🔍 Processing message: Type={msg_type}, Stock={stock}")
-        
-        if not stock or stock not in STOCKS:
-            if REAL_TIME_DEBUG:
-                print(f"⏭️ Skipping {stock} - not in monitored stocks: {STOCKS}")
-            return
-            
-        price = 0
-        
-        if msg_type == 'q':  # Quote
-            ask_price = msg.get('ap', 0)
-            bid_price = msg.get('bp', 0)
-            if REAL_TIME_DEBUG:
-                print(f"💬 Quote for {stock}: Ask=${ask_price}, Bid=${bid_price}")
-            if ask_price > 0 and bid_price > 0:
-                price = (ask_price + bid_price) / 2
-                if REAL_TIME_DEBUG:
-                    print(f"💰 Calculated quote price for {stock}: ${price:.2f}")
-            else:
-                if REAL_TIME_DEBUG:
-                    print(f"⚠️ Invalid quote prices for {stock}: Ask=${ask_price}, Bid=${bid_price}")
-        elif msg_type == 't':  # Trade
-            price = msg.get('p', 0)
-            if REAL_TIME_DEBUG:
-                print(f"💱 Trade for {stock}: ${price:.2f}")
-        else:
-            if REAL_TIME_DEBUG:
-                print(f"❓ Unknown message type: {msg_type}")
-            return
-        
-        if price > 0:
-            if REAL_TIME_DEBUG:
-                print(f"🎯 Calling check_pivot_crossing for {stock} at ${price:.2f}")
-            check_pivot_crossing(stock, price)
-        else:
-            if REAL_TIME_DEBUG:
-                print(f"⚠️ Invalid price for {stock}: ${price}")
-            
-    except Exception as e:
-        print(f"❌ Error processing individual message: {e}")
-        import traceback
-        print(f"📋 Full traceback:\n{traceback.format_exc()}")
+def on_control_message(msg):
+    """Handle non-market-data stream messages (auth/subscription acks, errors)"""
+    if msg.get('T') == 'error':
+        log.error("❌ WebSocket error message: %s", msg, extra={'stream_msg': msg})
+    elif REAL_TIME_DEBUG:
+        tick_log.debug("📨 WebSocket control message: %s", msg)
 
-def check_pivot_crossing(stock, price):
+def load_pivots_on_demand(stock, price):
+    """Fetch pivots in the background for a symbol that ticked before it was armed; the latest tick is re-checked once they load"""
     if REAL_TIME_DEBUG:
-        print(f"🔍 Checking pivot crossing for {stock} at ${price:.2f}")
+        tick_log.debug("⏳ No pivot data available for %s, fetching on-demand...", stock)
     
-    if stock not in pivot_levels or not pivot_levels[stock]:
-        if REAL_TIME_DEBUG:
-            print(f"⏳ No pivot data available for {stock}, fetching on-demand...")
-            print(f"📊 Available pivot data: {list(pivot_levels.keys())}")
-        
-        # Fetch pivot data lazily
-        try:
-            if REAL_TIME_DEBUG:
-                print(f"📈 Fetching pivot data for {stock}...")
-            pivot_data = asyncio.run(fetch_pivot_data_for_stock(stock))
-            if pivot_data:
-                if REAL_TIME_DEBUG:
-                    print(f"✅ Successfully loaded pivot data for {stock}: {pivot_data}")
-                # Now check the crossing again with the loaded data
-                check_pivot_crossing(stock, price)
-            else:
-                if REAL_TIME_DEBUG:
-                    print(f"❌ Failed to load pivot data for {stock}")
-        except Exception as e:
-            if REAL_TIME_DEBUG:
-                print(f"❌ Error fetching pivot data for {stock}: {e}")
+    try:
+        on_loop = asyncio.get_running_loop() is event_loop
+    except RuntimeError:
+        on_loop = False
+    if on_loop:
+        pivot_loader.request(stock, price)
+    else:
+        event_loop.call_soon_threadsafe(pivot_loader.request, stock, price)
+
+async def load_pivots_for(symbols):
+    """PivotLoader backend: one bulk load for every symbol requested in the batch window"""
+    loaded = await load_pivot_levels(symbols)
+    missing = [s for s in symbols if s not in loaded]
+    if missing:
+        log.warning("❌ No pivot data for %s; not retrying for %.0fs", ', '.join(missing), PIVOT_NEGATIVE_TTL,
+                    extra={'symbols': missing})
+    return loaded
+
+def recheck_after_load(stock, price):
+    # Ingest workers check their own next tick; re-checking here too could alert twice
+    if sharded_ingest is None:
+        check_pivot_crossing(stock, price)
+
+pivot_loader = PivotLoader(load_pivots_for, lambda: get_last_trading_day().isoformat(),
+                           on_loaded=recheck_after_load, negative_ttl=PIVOT_NEGATIVE_TTL)
+
+def check_pivot_crossing(stock, price):
+    if stock not in level_book:
+        load_pivots_on_demand(stock, price)
         return
     
-    if REAL_TIME_DEBUG:
-        print(f"📊 Pivot levels for {stock}: {pivot_levels[stock]}")
-    
-    current_time = datetime.utcnow().isoformat() + 'Z'
+    tick_history.record(stock, price, time.time())
+    # Most ticks exit here: the price stayed inside the symbol's no-op band
+    hit = level_book.check(stock, price)
+    if hit is not None:
+        alert_engine.on_hit(stock, price, hit)
+
+def deliver_alert(alert):
+    """AlertEngine sink: log the alert and hand it to Discord; returns False if it could not be sent"""
+    fields = {'symbol': alert.symbol, 'pivot_level': alert.level, 'level_value': alert.level_value,
+              'price': alert.price, 'direction': alert.direction, 'crossed': alert.crossed, 'motion': alert.motion}
+    if alert.crossed:
+        log.info("🎯 PIVOT CROSSING DETECTED! %s at $%.2f crossed %s $%.2f going %s",
+                 alert.symbol, alert.price, alert.level, alert.level_value, alert.direction, extra=fields)
+    else:
+        log.info("🎯 PIVOT CROSSING DETECTED! %s at $%.2f approaching %s $%.2f from %s",
+                 alert.symbol, alert.price, alert.level, alert.level_value, alert.direction, extra=fields)
     
-    # Find the closest pivot level that the price is approaching
-    closest_level = None
-    closest_distance = float('inf')
-    approaching_direction = None
+    if alert.tick_time is not None:
+        tick_to_alert_seconds.observe((alert.created_at - alert.tick_time).total_seconds())
     
-    for level_name, level_value in pivot_levels[stock].items():
-        distance = abs(price - level_value)
-        
-        if REAL_TIME_DEBUG:
-            print(f"📏 {stock} ${price:.2f} vs {level_name} ${level_value:.2f} = distance ${distance:.2f} (threshold: ${CROSSING_THRESHOLD})")
-        
-        # Only consider levels within threshold
-        if distance < CROSSING_THRESHOLD:
-            # Determine if price is approaching from above or below
-            if price > level_value:
-                direction = "down"  # Price is above level, approaching from above
-            else:
-                direction = "up"    # Price is below level, approaching from below
-            
-            if REAL_TIME_DEBUG:
-                print(f"🎯 {stock} at ${price:.2f} is approaching {level_name} ${level_value:.2f} from {direction}")
-            
-            # Keep track of the closest level within threshold
-            if distance < closest_distance:
-                closest_distance = distance
-                closest_level = level_name
-                approaching_direction = direction
+    if not discord_client.is_ready():
+        log.error("❌ Discord client not ready, cannot send alert", extra=fields)
+        return False
     
-    # If we found a level to alert on
-    if closest_level:
-        level_value = pivot_levels[stock][closest_level]
-        
-        # Create a unique key for this specific crossing to prevent duplicates
-        # Round price to 1 decimal place to prevent spam from tiny price fluctuations
-        crossing_key = f"{stock}_{closest_level}_{price:.1f}"
-        
-        # Check if we've already processed this exact crossing recently
-        current_time_seconds = time.time()
-        if crossing_key in last_alert and current_time_seconds - last_alert[crossing_key] < ALERT_COOLDOWN:
-            if REAL_TIME_DEBUG:
-                print(f"⏳ Duplicate crossing detected for {crossing_key}, skipping alert")
-            return
-        
-        print(f"🎯 PIVOT CROSSING DETECTED! {stock} at ${price:.2f} approaching {closest_level} ${level_value:.2f} from {approaching_direction}")
-        
-        print(f"📤 Sending Discord alert for {stock} {closest_level} at ${price:.2f}")
-        
-        if discord_client.is_ready():
-            # Schedule the alert in the main event loop
-            loop = discord_client.loop
-            if loop and loop.is_running():
-                loop.call_soon_threadsafe(
-                    lambda level=closest_level, p=price, t=current_time: asyncio.create_task(send_discord_alert(stock, level, p, t))
-                )
-                # Mark this crossing as processed
-                last_alert[crossing_key] = current_time_seconds
-                print(f"✅ Alert scheduled and cooldown set for {crossing_key}")
-            else:
-                print(f"❌ Discord event loop not available, cannot send alert")
-        else:
-            print(f"❌ Discord client not ready, cannot send alert")
-    else:
-        if REAL_TIME_DEBUG:
-            print(f"➡️ No pivot level crossings detected for {stock} at ${price:.2f}")
+    dispatcher.submit_alert(alert)
+    return True
 
-websocket_reconnect_count = 0
-MAX_RECONNECT_ATTEMPTS = 5
-RECONNECT_DELAY = 30
+alert_engine = AlertEngine(level_book, alert_cooldowns, deliver_alert, history=tick_history, motion_window=MOTION_WINDOW)
 
-def on_error(ws, error):
-    print(f"WebSocket error: {error}")
-    global websocket_reconnect_count
-    websocket_reconnect_count += 1
+# Trades only build bars and VWAP: crossings, motion and the price cache follow quote midpoints either way
+tick_pipeline = TickPipeline(level_book, watched_symbols, alert_engine.on_hit,
+                             on_unarmed=load_pivots_on_demand, on_control=on_control_message,
+                             price_cache=price_cache, bars=bar_aggregator, bar_quotes=not STREAM_TRADES,
+                             history=tick_history, trade_prices=False)
 
-def on_close(ws, close_status_code, close_msg):
-    global websocket_reconnect_count
-    if REAL_TIME_DEBUG:
-        print(f"WebSocket closed (code: {close_status_code}, msg: {close_msg})")
-    
-    if websocket_reconnect_count < MAX_RECONNECT_ATTEMPTS:
-        if REAL_TIME_DEBUG:
-            print(f"🔄 Reconnecting... (attempt {websocket_reconnect_count + 1}/{MAX_RECONNECT_ATTEMPTS})")
-        time.sleep(RECONNECT_DELAY)
-        start_websocket()
-    else:
-        print(f"❌ Max reconnection attempts reached ({MAX_RECONNECT_ATTEMPTS}). Stopping WebSocket reconnection.")
-        print("💡 You can restart the bot to re-enable real-time alerts.")
+def on_stream_gap(seconds):
+    log.warning("⚠️ Missed %.1fs of market data while the stream was down; crossings in that window were not alerted", seconds,
+                extra={'gap_seconds': seconds})
 
-def on_open(ws):
-    global websocket_reconnect_count
-    websocket_reconnect_count = 0
-    if REAL_TIME_DEBUG:
-        print("✅ WebSocket opened successfully")
-    
-    try:
-        auth_message = {"action": "auth", "key": API_KEY, "secret": API_SECRET}
-        ws.send(json.dumps(auth_message))
-        if REAL_TIME_DEBUG:
-            print("🔐 WebSocket authentication sent")
-        
-        for stock in STOCKS:
-            subscribe_message = {"action": "subscribe", "quotes": [stock]}
-            ws.send(json.dumps(subscribe_message))
-        if REAL_TIME_DEBUG:
-            print(f"📡 Subscribed to quotes for {len(STOCKS)} stocks")
-        
-    except Exception as e:
-        print(f"❌ Error during WebSocket setup: {e}")
+scheduler = SessionScheduler(lambda: trading_calendar, SCHEDULER_STATE)
+scheduler.at_open('preopen_pivots', update_pivot_levels, timedelta(minutes=-PREOPEN_MINUTES), jitter=SCHEDULER_JITTER)
+scheduler.at_close('postclose_rollover', rollover_after_close, timedelta(minutes=POSTCLOSE_MINUTES), jitter=SCHEDULER_JITTER)
+scheduler.on_closed_days('closed_day_maintenance', closed_day_maintenance, jitter=SCHEDULER_JITTER)
+
+market_stream = AlpacaStream(API_KEY, API_SECRET, STOCKS, on_websocket_message,
+                             url=STREAM_URL, on_gap=on_stream_gap,
+                             channels=('quotes', 'trades') if STREAM_TRADES else ('quotes',))
+
+# With INGEST_WORKERS the stream and crossing checks run in worker processes
+# instead; they send back alerts, pivot requests and recent prices
+sharded_ingest = None
+if INGEST_WORKERS > 0:
+    sharded_ingest = ShardedIngest(INGEST_WORKERS, API_KEY, API_SECRET, STOCKS, STREAM_URL, CROSSING_THRESHOLD,
+                                   ALERT_COOLDOWN, cooldown_max_entries=ALERT_COOLDOWN_MAX_ENTRIES,
+                                   on_alert=deliver_alert, on_unarmed=pivot_loader.request,
+                                   on_prices=price_cache.update_many, on_gap=on_stream_gap,
+                                   timeframes=PIVOT_TIMEFRAMES, history_depth=TICK_HISTORY_DEPTH,
+                                   motion_window=MOTION_WINDOW)
+ingest = sharded_ingest or market_stream
+
+def ingest_stats():
+    """Stream and tick pipeline counters, summed over the ingest workers when sharded"""
+    if sharded_ingest is not None:
+        return sharded_ingest.stats()
+    return {'messages': tick_pipeline.messages, 'frames': tick_pipeline.frames, 'reconnects': market_stream.reconnects,
+            'alerts': alert_engine.alerts, 'suppressed': alert_engine.suppressed}
+
+def stream_age():
+    """Seconds since the last stream message, or None before the first one"""
+    return time.time() - ingest.last_message_at if ingest.last_message_at else None
+
+def readiness():
+    """(ok, reason) for /ready: Discord is connected and market data is flowing"""
+    if not discord_client.is_ready():
+        return False, "discord not connected"
+    if not ingest.connected:
+        return False, "market data stream disconnected"
+    # Outside market hours a quiet stream is normal
+    age = stream_age()
+    if trading_calendar.is_open() and (age is None or age > STREAM_STALE_SECONDS):
+        return False, f"market data stream stale ({'no data yet' if age is None else f'{age:.0f}s'})"
+    return True, "ok"
 
-def start_websocket():
-    """Start WebSocket for real-time quotes"""
+async def poll_latest_prices(symbols):
+    """FailoverController fetch: latest trade prices in one batched request per chunk of symbols"""
+    trades = await data_client.get_latest_trades(symbols)
+    return {symbol: trade['p'] for symbol, trade in trades.items() if trade.get('p')}
+
+# REST polling for quiet symbols, and for everything while the stream is down
+failover = FailoverController(poll_latest_prices, check_pivot_crossing, lambda: [s for s in STOCKS if s in level_book],
+                              price_cache, connected=lambda: ingest.connected, stream_age=stream_age,
+                              is_open=lambda: trading_calendar.is_open(), requests_for=data_client.requests_for,
+                              max_age=PRICE_MAX_AGE, idle_interval=POLL_INTERVAL, fast_interval=FAILOVER_POLL_INTERVAL,
+                              stale_after=STREAM_STALE_SECONDS, rate_limit=REST_RATE_LIMIT)
+
+metrics.counter_func('ticks_received_total', 'Stream messages received', lambda: ingest_stats()['messages'])
+metrics.counter_func('frames_processed_total', 'Stream frames decoded and evaluated', lambda: ingest_stats()['frames'])
+metrics.counter_func('stream_reconnects_total', 'Stream reconnects', lambda: ingest_stats()['reconnects'])
+metrics.counter_func('alerts_raised_total', 'Alerts raised by the alert engine', lambda: ingest_stats()['alerts'])
+metrics.counter_func('alerts_suppressed_total', 'Level hits suppressed by cooldown', lambda: ingest_stats()['suppressed'])
+metrics.counter_func('alerts_sent_total', 'Alerts posted to Discord', lambda: dispatcher.stats()['alerts_sent'])
+metrics.counter_func('discord_send_failures_total', 'Discord posts that failed', lambda: dispatcher.stats()['failed'])
+metrics.gauge_func('stream_connected', '1 if the market data stream is connected', lambda: int(ingest.connected))
+metrics.gauge_func('stream_last_message_age_seconds', 'Seconds since the last stream message', stream_age)
+metrics.gauge_func('dispatcher_queue_depth', 'Messages waiting to be posted to Discord', lambda: dispatcher.stats()['queued'])
+metrics.counter_func('discord_rate_limited_seconds_total', 'Time spent waiting on Discord rate limits', lambda: dispatcher.stats()['rate_limited_seconds'])
+if webhooks:
+    metrics.gauge_func('alert_routes', 'Webhook alert destinations', lambda: webhooks.stats()['routes'])
+    metrics.counter_func('webhook_posts_total', 'Webhook executions Discord accepted', lambda: webhooks.stats()['sent'])
+    metrics.counter_func('webhook_failures_total', 'Webhook executions that failed', lambda: webhooks.stats()['failed'])
+    metrics.counter_func('webhook_alerts_delivered_total', 'Alerts delivered to routed channels, summed over channels',
+                         lambda: webhooks.stats()['alerts_delivered'])
+    metrics.gauge_func('webhook_pending', 'Webhook posts queued behind slow or rate-limited channels',
+                       lambda: webhooks.stats()['pending'])
+    metrics.counter_func('webhook_rate_limited_seconds_total', 'Time webhooks spent waiting on their rate limits',
+                         lambda: webhooks.stats()['rate_limited_seconds'])
+metrics.gauge_func('cooldown_entries', 'Active (symbol, level) alert cooldowns', lambda: len(alert_cooldowns))
+metrics.gauge_func('symbols_watched', 'Symbols in the monitored universe', lambda: len(STOCKS))
+metrics.gauge_func('symbols_armed', 'Symbols with pivot levels loaded', lambda: len(pivot_table))
+metrics.gauge_func('price_cache_entries', 'Symbols with a cached last price', lambda: len(price_cache))
+metrics.counter_func('bar_ticks_total', 'Ticks folded into intraday bars', lambda: bar_aggregator.ticks)
+metrics.gauge_func('bar_memory_bytes', 'Memory held by the intraday bar rings', lambda: bar_aggregator.nbytes)
+metrics.gauge_func('failover_active', '1 while prices are polled because the stream is down', lambda: int(failover.active))
+metrics.counter_func('failovers_total', 'Times polling failover started', lambda: failover.failovers)
+metrics.counter_func('failover_seconds_total', 'Time spent in polling failover', failover.failover_seconds)
+metrics.counter_func('poll_requests_total', 'REST requests made by the polling failover', lambda: failover.requests)
+metrics.counter_func('polled_prices_total', 'Prices received from REST polling', lambda: failover.prices_polled)
+
+async def watch_symbols(symbols):
+    """Add symbols to the universe: subscribe on the live stream and bulk-load their pivots; returns (added, loaded)"""
+    added = [s for s in symbols if s not in watched_symbols]
+    if not added:
+        return [], {}
+    STOCKS.extend(added)
+    watched_symbols.update(added)
+    save_watchlist()
+    await ingest.subscribe(added)
     try:
-        ws_url = "wss://stream.data.alpaca.markets/v2/iex"  # IEX for paper trading
-        ws = websocket.WebSocketApp(ws_url,
-                                    on_message=on_websocket_message,
-                                    on_error=on_error,
-                                    on_close=on_close,
-                                    on_open=on_open)
-        ws_thread = threading.Thread(target=ws.run_forever)
-        ws_thread.daemon = True
-        ws_thread.start()
-        if REAL_TIME_DEBUG:
-            print("✅ WebSocket connection started for real-time data")
+        loaded = await load_pivot_levels(added)
     except Exception as e:
-        print(f"❌ Error starting WebSocket: {e}")
+        # The symbols stay watched; on-demand loading retries when they tick
+        log.warning("⚠️ Bulk pivot load for %d added symbols failed: %s", len(added), e)
+        loaded = {}
+    log.info("➕ Watching %d more symbols (%d total)", len(added), len(STOCKS), extra={'symbols': added})
+    return added, loaded
+
+async def unwatch_symbols(symbols):
+    """Remove symbols from the universe and the live stream; returns the removed symbols"""
+    removed = [s for s in symbols if s in watched_symbols]
+    if not removed:
+        return []
+    watched_symbols.difference_update(removed)
+    gone = set(removed)
+    STOCKS[:] = [s for s in STOCKS if s not in gone]
+    for symbol in removed:
+        pivot_table.remove(symbol)
+        level_book.disarm(symbol)
+        bar_aggregator.forget(symbol)
+        tick_history.forget(symbol)
+    save_watchlist()
+    await ingest.unsubscribe(removed)
+    log.info("➖ Stopped watching %d symbols (%d total)", len(removed), len(STOCKS), extra={'symbols': removed})
+    return removed
 
 async def run_discord_bot():
     """Run the Discord bot"""
     await discord_client.start(DISCORD_TOKEN)
 
-def run_trading_bot():
+async def run_trading_bot():
     """Run the trading bot logic"""
+    global armed_session
     print("🤖 Starting trading bot...")
     
-    # Don't initialize pivot levels at startup - load them on-demand
-    print("📊 Pivot levels will be loaded on-demand when requested")
-    
-    # Start WebSocket for real-time data
-    if REAL_TIME_DEBUG:
-        print("🔗 Starting real-time data connection...")
-    start_websocket()
-    
-    # Start polling as backup if WebSocket fails
-    if REAL_TIME_DEBUG:
-        print("🔄 Starting polling backup system...")
-    polling_thread = threading.Thread(target=run_polling_backup, daemon=True)
-    polling_thread.start()
+    # Arm every symbol before the stream connects; cached days come straight from the pivot store
+    started = time.perf_counter()
+    try:
+        prune_pivot_store()
+        session = get_last_trading_day()
+        loaded = await load_pivot_levels(STOCKS, session=session)
+        armed_session = session
+        log.info("📊 Armed %d/%d symbols in %.1f ms", len(loaded), len(STOCKS), (time.perf_counter() - started) * 1000,
+                 extra={'armed': len(loaded), 'symbols': len(STOCKS)})
+    except Exception as e:
+        log.warning("⚠️ Startup pivot load failed, falling back to on-demand loading: %s", e)
+    finally:
+        startup_armed.set()
     
-    # Keep script running
+    # Stream real-time data on this event loop; reconnects forever
     print("✅ Trading bot is now monitoring pivot levels!")
-    try:
-        while True:
-            time.sleep(1)
-    except KeyboardInterrupt:
-        print("🛑 Shutting down trading bot...")
-
-def run_polling_backup():
-    """Poll for price updates as backup to WebSocket"""
-    if REAL_TIME_DEBUG:
-        print("📡 Polling backup system started")
-    poll_count = 0
-    while True:
-        try:
-            time.sleep(60)  # Poll every minute
-            poll_count += 1
-            if REAL_TIME_DEBUG:
-                print(f"📡 Polling backup cycle #{poll_count}")
-            
-            # Only poll if we have pivot data loaded
-            if not any(pivot_levels.values()):
-                if REAL_TIME_DEBUG:
-                    print(f"⏭️ Skipping poll cycle #{poll_count} - no pivot data loaded")
-                    print(f"📊 Available pivot data: {list(pivot_levels.keys())}")
-                continue
-                
-            stocks_with_pivots = [s for s in STOCKS if pivot_levels.get(s)]
-            if REAL_TIME_DEBUG:
-                print(f"📊 Polling {len(stocks_with_pivots)} stocks with pivot data: {stocks_with_pivots}")
-                
-            for stock in stocks_with_pivots:
-                try:
-                    if REAL_TIME_DEBUG:
-                        print(f"📡 Polling {stock}...")
-                    # Get latest trade
-                    trades = api.get_trades(stock, limit=1)
-                    if trades and len(trades) > 0:
-                        latest_trade = trades[0]
-                        price = latest_trade.price
-                        if REAL_TIME_DEBUG:
-                            print(f"💰 Polled {stock} price: ${price:.2f}")
-                        if price > 0:
-                            check_pivot_crossing(stock, price)
-                        else:
-                            if REAL_TIME_DEBUG:
-                                print(f"⚠️ Invalid price for {stock}: ${price}")
-                    else:
-                        if REAL_TIME_DEBUG:
-                            print(f"❌ No trades found for {stock}")
-                except Exception as e:
-                    if REAL_TIME_DEBUG:
-                        print(f"❌ Error polling {stock}: {e}")
-                    
-        except Exception as e:
-            print(f"❌ Error in polling backup: {e}")
-            import traceback
-            print(f"📋 Full traceback:\n{traceback.format_exc()}")
-            time.sleep(60)
+    await ingest.run()
 
 async def test_alpaca_connection():
     try:
@@ -1099,7 +1314,8 @@ async def main():
     """Main function to run both Discord bot and trading functionality"""
     print("🚀 Starting Market Structure Bot...")
     print(f"📊 Monitoring stocks: {STOCKS}")
-    print(f"🎯 Pivot timeframe: {PIVOT_TIMEFRAME}")
+    print(f"🎯 Pivot timeframes: {', '.join(PIVOT_TIMEFRAMES)}")
+    print(f"🧮 Pivot method: {PIVOT_METHOD}")
     print(f"💰 Alert threshold: ${CROSSING_THRESHOLD}")
     print(f"⏰ Alert cooldown: {ALERT_COOLDOWN} seconds")
     
@@ -1108,20 +1324,44 @@ async def main():
     except Exception as e:
         print(f"❌ Failed to test Alpaca connection: {e}")
     
-    # Create tasks for Discord bot
-    discord_task = asyncio.create_task(run_discord_bot())
+    global event_loop
+    event_loop = asyncio.get_running_loop()
     
-    # Run trading bot in a separate thread
-    trading_thread = threading.Thread(target=run_trading_bot)
-    trading_thread.daemon = True
-    trading_thread.start()
+    await init_trading_calendar()
+    
+    # Discord, the alert dispatcher and the market data stream share this event loop
+    metrics_runner = None
+    if METRICS_PORT:
+        try:
+            metrics_runner = await start_metrics_server(metrics, port=METRICS_PORT, ready=readiness)
+        except OSError as e:
+            log.warning("⚠️ Could not start the metrics endpoint on port %d: %s", METRICS_PORT, e)
+    
+    dispatch_task = asyncio.create_task(dispatcher.run())
+    scheduler_task = asyncio.create_task(scheduler.run())
+    failover_task = asyncio.create_task(failover.run())
+    discord_task = asyncio.create_task(run_discord_bot())
+    trading_task = asyncio.create_task(run_trading_bot())
     
     try:
         # Wait for Discord bot to finish (which should be never)
         await discord_task
-    except KeyboardInterrupt:
+    except (KeyboardInterrupt, asyncio.CancelledError):
         print("🛑 Shutting down...")
+    finally:
+        await ingest.stop()
+        trading_task.cancel()
+        dispatch_task.cancel()
+        scheduler_task.cancel()
+        failover_task.cancel()
         await discord_client.close()
+        await data_client.close()
+        if webhooks:
+            await webhooks.close()
+        pivot_store.close()
+        bar_history.close()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
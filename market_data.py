@@ -0,0 +1,172 @@
+import asyncio
+import time
+
+import aiohttp
+
+DATA_URL = 'https://data.alpaca.markets/v2'
+
+# The multi-symbol endpoints take the symbol list in the query string, so keep
+# each request comfortably below common URL length limits.
+SYMBOLS_PER_REQUEST = 200
+MAX_IN_FLIGHT = 4
+PAGE_LIMIT = 10000
+
+
+class AlpacaDataError(Exception):
+    """Raised when the Alpaca market data API returns a non-200 response"""
+
+    def __init__(self, status, text):
+        super().__init__(f"Alpaca data API error {status}: {text}")
+        self.status = status
+        self.text = text
+
+
+def chunked(items, size):
+    """Split a list into consecutive chunks of at most `size` items"""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+class AlpacaDataClient:
+    """
+    Async client for the Alpaca market data REST API.
+
+    Multi-symbol requests are split into chunks of `symbols_per_request`
+    symbols, each chunk follows `next_page_token` until exhausted, and at most
+    `max_in_flight` HTTP requests run at the same time. If given,
+    `on_request(path, seconds, status)` is called after every request
+    (status is None when the request failed without a response).
+    """
+
+    def __init__(self, api_key, api_secret, data_url=DATA_URL,
+                 symbols_per_request=SYMBOLS_PER_REQUEST, max_in_flight=MAX_IN_FLIGHT, on_request=None):
+        self.data_url = data_url.rstrip('/')
+        self.headers = {
+            'APCA-API-KEY-ID': api_key,
+            'APCA-API-SECRET-KEY': api_secret
+        }
+        self.symbols_per_request = symbols_per_request
+        self.max_in_flight = max_in_flight
+        self.on_request = on_request
+        self.request_count = 0
+        self._session = None
+        self._semaphore = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _ensure_session(self):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(headers=self.headers)
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _get(self, path, params):
+        session = self._ensure_session()
+        async with self._semaphore:
+            self.request_count += 1
+            started = time.perf_counter()
+            status = None
+            try:
+                async with session.get(f"{self.data_url}{path}", params=params) as response:
+                    status = response.status
+                    if response.status != 200:
+                        raise AlpacaDataError(response.status, await response.text())
+                    return await response.json()
+            finally:
+                if self.on_request:
+                    self.on_request(path, time.perf_counter() - started, status)
+
+    async def _get_bars_chunk(self, symbols, timeframe, start, end):
+        bars = {}
+        params = {
+            'symbols': ','.join(symbols),
+            'timeframe': timeframe,
+            'start': start,
+            'end': end,
+            'limit': PAGE_LIMIT
+        }
+        while True:
+            data = await self._get('/stocks/bars', params)
+            for symbol, symbol_bars in (data.get('bars') or {}).items():
+                bars.setdefault(symbol, []).extend(symbol_bars)
+            page_token = data.get('next_page_token')
+            if not page_token:
+                return bars
+            params['page_token'] = page_token
+
+    async def get_bars(self, symbols, timeframe, start, end):
+        """
+        Fetch bars for many symbols through `/v2/stocks/bars?symbols=...`.
+
+        Returns a dict of symbol -> list of raw bar dicts (`t`, `o`, `h`, `l`,
+        `c`, `v`, ...). Symbols without bars in the range are absent.
+        """
+        symbols = list(dict.fromkeys(s for s in symbols if s))
+        if not symbols:
+            return {}
+        chunks = chunked(symbols, self.symbols_per_request)
+        results = await asyncio.gather(
+            *(self._get_bars_chunk(chunk, timeframe, start, end) for chunk in chunks)
+        )
+        bars = {}
+        for chunk_bars in results:
+            bars.update(chunk_bars)
+        return bars
+
+    async def get_snapshots(self, symbols):
+        """
+        Fetch snapshots for many symbols through `/v2/stocks/snapshots?symbols=...`.
+
+        Returns a dict of symbol -> raw snapshot (`latestTrade`, `latestQuote`,
+        `minuteBar`, `dailyBar`, `prevDailyBar`). Unknown symbols are absent.
+        """
+        symbols = list(dict.fromkeys(s for s in symbols if s))
+        if not symbols:
+            return {}
+        results = await asyncio.gather(
+            *(self._get('/stocks/snapshots', {'symbols': ','.join(chunk)})
+              for chunk in chunked(symbols, self.symbols_per_request))
+        )
+        snapshots = {}
+        for chunk_snapshots in results:
+            snapshots.update({s: snap for s, snap in chunk_snapshots.items() if snap})
+        return snapshots
+
+    async def get_latest_trades(self, symbols):
+        """
+        Fetch the latest trade for many symbols through `/v2/stocks/trades/latest?symbols=...`.
+
+        Returns a dict of symbol -> raw trade (`t`, `p`, `s`, ...). Symbols without trades are absent.
+        """
+        symbols = list(dict.fromkeys(s for s in symbols if s))
+        if not symbols:
+            return {}
+        results = await asyncio.gather(
+            *(self._get('/stocks/trades/latest', {'symbols': ','.join(chunk)})
+              for chunk in chunked(symbols, self.symbols_per_request))
+        )
+        trades = {}
+        for data in results:
+            trades.update({s: trade for s, trade in (data.get('trades') or {}).items() if trade})
+        return trades
+
+    def requests_for(self, symbols):
+        """Number of HTTP requests a multi-symbol call for `symbols` takes (one page each)"""
+        return -(-len(symbols) // self.symbols_per_request)
+
+
+def snapshot_price(snapshot):
+    """Current price from a snapshot: the latest trade, else the latest minute bar's close"""
+    trade = (snapshot or {}).get('latestTrade') or {}
+    if trade.get('p'):
+        return trade['p']
+    bar = (snapshot or {}).get('minuteBar') or {}
+    return bar.get('c')
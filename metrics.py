@@ -0,0 +1,179 @@
+"""
+Minimal Prometheus text-format metrics and an embedded HTTP endpoint.
+
+Counters and histograms are updated in place by the code that owns the
+event; values that already exist elsewhere (pipeline counters, queue depths,
+cooldown store size) are registered as callbacks and read at scrape time, so
+the tick path pays nothing for them.
+"""
+import logging
+import math
+from bisect import bisect_left
+
+from aiohttp import web
+
+log = logging.getLogger('pivotbot.metrics')
+
+# Seconds; covers sub-millisecond frame evaluation up to slow REST calls
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if isinstance(value, int):
+        return str(value)
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value))
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self.kind = 'counter'
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(_label_key(labels), 0)
+
+    def total(self):
+        """Sum over every label set"""
+        return sum(self._values.values())
+
+    def samples(self):
+        for key, value in self._values.items():
+            yield self.name, key, value
+
+
+class Histogram:
+    """Cumulative-bucket histogram; `observe` is one bisect and two additions"""
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.kind = 'histogram'
+        self.buckets = tuple(buckets)
+        self._series = {}  # label key -> [per-bucket counts..., overflow, sum, count]
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0] * (len(self.buckets) + 3)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def count(self, **labels):
+        series = self._series.get(_label_key(labels))
+        return series[-1] if series else 0
+
+    def total_count(self):
+        """Observations over every label set"""
+        return sum(series[-1] for series in self._series.values())
+
+    def samples(self):
+        for key, series in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, series):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket", key + (('le', _format_value(bound)),), cumulative
+            yield f"{self.name}_bucket", key + (('le', '+Inf'),), series[-1]
+            yield f"{self.name}_sum", key, series[-2]
+            yield f"{self.name}_count", key, series[-1]
+
+
+class Callback:
+    """A counter or gauge whose value is read from `func()` at scrape time"""
+
+    def __init__(self, name, help_text, func, kind='gauge'):
+        self.name = name
+        self.help = help_text
+        self.func = func
+        self.kind = kind
+
+    def samples(self):
+        value = self.func()
+        if value is not None:
+            yield self.name, (), value
+
+
+class Registry:
+    def __init__(self, prefix='pivotbot_'):
+        self.prefix = prefix
+        self._metrics = []
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text):
+        return self._add(Counter(self.prefix + name, help_text))
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(self.prefix + name, help_text, buckets))
+
+    def gauge_func(self, name, help_text, func):
+        return self._add(Callback(self.prefix + name, help_text, func))
+
+    def counter_func(self, name, help_text, func):
+        return self._add(Callback(self.prefix + name, help_text, func, kind='counter'))
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics:
+            try:
+                samples = list(metric.samples())
+            except Exception:
+                log.exception("❌ Error collecting metric %s", metric.name)
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, key, value in samples:
+                lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+async def start_metrics_server(registry, host='0.0.0.0', port=9100, ready=None):
+    """
+    Serve /metrics (Prometheus text), /healthz (the event loop is alive) and
+    /ready. `ready()` returns (ok, reason); /ready answers 503 with the reason
+    when it is not ok. Returns the AppRunner; call its cleanup() to stop.
+    """
+    async def metrics_handler(request):
+        return web.Response(text=registry.render(), content_type='text/plain', charset='utf-8',
+                            headers={'X-Content-Type-Options': 'nosniff'})
+
+    async def health_handler(request):
+        return web.Response(text='ok\n')
+
+    async def ready_handler(request):
+        ok, reason = ready() if ready else (True, 'ok')
+        return web.Response(text=f"{reason}\n", status=200 if ok else 503)
+
+    app = web.Application()
+    app.router.add_get('/metrics', metrics_handler)
+    app.router.add_get('/healthz', health_handler)
+    app.router.add_get('/ready', ready_handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    log.info("📈 Metrics endpoint listening on %s:%d", host, port)
+    return runner
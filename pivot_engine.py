@@ -0,0 +1,141 @@
+import math
+from datetime import timedelta
+
+import numpy as np
+
+# Column order of every level array produced by this module. It matches the
+# key order of the dicts the bot has always stored in `pivot_levels`.
+LEVEL_NAMES = ('Pivot', 'R1', 'S1', 'R2', 'S2', 'R3', 'S3')
+LEVEL_COUNT = len(LEVEL_NAMES)
+LEVEL_IDS = {name: i for i, name in enumerate(LEVEL_NAMES)}
+
+PIVOT_METHODS = ('traditional', 'fibonacci', 'woodie', 'camarilla', 'demark')
+
+# Pivot timeframes: levels derived from the previous session, week or month.
+# Level arrays holding several timeframes are LEVEL_COUNT columns per
+# timeframe, in the order of the timeframes they were built for.
+TIMEFRAMES = ('1Day', '1Week', '1Month')
+TIMEFRAME_LABELS = {'1Day': 'Daily', '1Week': 'Weekly', '1Month': 'Monthly'}
+# Stable small-integer id of every (timeframe, level), e.g. for cooldown keys
+LEVEL_KEYS = {(timeframe, name): t * LEVEL_COUNT + i
+              for t, timeframe in enumerate(TIMEFRAMES) for i, name in enumerate(LEVEL_NAMES)}
+
+
+def _traditional(high, low, close, open_):
+    """
+    Traditional floor pivots:
+    - Pivot = (High + Low + Close) / 3
+    - R1 = 2 * Pivot - Low, S1 = 2 * Pivot - High
+    - R2/S2 = Pivot +/- (High - Low)
+    - R3/S3 = R2/S2 +/- (High - Low)
+    """
+    pivot = (high + low + close) / 3
+    trading_range = high - low
+    r2 = pivot + trading_range
+    s2 = pivot - trading_range
+    return (pivot, 2 * pivot - low, 2 * pivot - high,
+            r2, s2, r2 + trading_range, s2 - trading_range)
+
+
+def _fibonacci(high, low, close, open_):
+    """Pivot +/- 0.382, 0.618 and 1.000 of the trading range"""
+    pivot = (high + low + close) / 3
+    trading_range = high - low
+    return (pivot,
+            pivot + 0.382 * trading_range, pivot - 0.382 * trading_range,
+            pivot + 0.618 * trading_range, pivot - 0.618 * trading_range,
+            pivot + trading_range, pivot - trading_range)
+
+
+def _woodie(high, low, close, open_):
+    """Close-weighted pivot: Pivot = (High + Low + 2 * Close) / 4"""
+    pivot = (high + low + 2 * close) / 4
+    trading_range = high - low
+    return (pivot, 2 * pivot - low, 2 * pivot - high,
+            pivot + trading_range, pivot - trading_range,
+            high + 2 * (pivot - low), low - 2 * (high - pivot))
+
+
+def _camarilla(high, low, close, open_):
+    """Levels around the close at 1.1/12, 1.1/6 and 1.1/4 of the trading range"""
+    pivot = (high + low + close) / 3
+    trading_range = (high - low) * 1.1
+    return (pivot,
+            close + trading_range / 12, close - trading_range / 12,
+            close + trading_range / 6, close - trading_range / 6,
+            close + trading_range / 4, close - trading_range / 4)
+
+
+def _demark(high, low, close, open_):
+    """
+    DeMark pivots depend on where the session closed relative to its open and
+    only define Pivot, R1 and S1. The remaining levels are NaN.
+    """
+    if open_ is None:
+        raise ValueError("DeMark pivots require the session open")
+    x = np.where(close < open_, high + 2 * low + close,
+                 np.where(close > open_, 2 * high + low + close, high + low + 2 * close))
+    missing = np.full_like(x, np.nan)
+    return (x / 4, x / 2 - low, x / 2 - high, missing, missing, missing, missing)
+
+
+_METHODS = {
+    'traditional': _traditional,
+    'fibonacci': _fibonacci,
+    'woodie': _woodie,
+    'camarilla': _camarilla,
+    'demark': _demark,
+}
+
+
+def compute_pivots(high, low, close, method='traditional', open_=None):
+    """
+    Compute pivot levels for a whole universe in one pass.
+
+    `high`, `low`, `close` (and `open_` for DeMark) are equally sized arrays
+    with one entry per symbol. Returns a float64 array of shape
+    (n_symbols, LEVEL_COUNT) whose columns follow LEVEL_NAMES; levels a method
+    does not define are NaN.
+    """
+    try:
+        calculate = _METHODS[method]
+    except KeyError:
+        raise ValueError(f"Unknown pivot method '{method}'. Choose one of: {', '.join(PIVOT_METHODS)}")
+
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    if open_ is not None:
+        open_ = np.asarray(open_, dtype=np.float64)
+
+    levels = np.empty((high.shape[0], LEVEL_COUNT), dtype=np.float64)
+    for column, values in enumerate(calculate(high, low, close, open_)):
+        levels[:, column] = values
+    return levels
+
+
+def levels_to_dict(row):
+    """Convert one row of a level array to the {name: value} form, skipping NaN levels"""
+    return {name: float(value) for name, value in zip(LEVEL_NAMES, row) if not math.isnan(value)}
+
+
+def levels_to_row(levels):
+    """Inverse of levels_to_dict: {name: value} to a LEVEL_NAMES-ordered row with NaN gaps"""
+    return np.array([levels.get(name, np.nan) for name in LEVEL_NAMES], dtype=np.float64)
+
+
+def pivot_period(timeframe, target, session):
+    """
+    (first, last) dates of the completed period whose bars give `timeframe`
+    pivots for the session on `target`: the previous session (`session`) for
+    daily pivots, the previous calendar week (Monday-Sunday) or month otherwise.
+    """
+    if timeframe == '1Day':
+        return session, session
+    if timeframe == '1Week':
+        week_start = target - timedelta(days=target.weekday())
+        return week_start - timedelta(days=7), week_start - timedelta(days=1)
+    if timeframe == '1Month':
+        last = target.replace(day=1) - timedelta(days=1)
+        return last.replace(day=1), last
+    raise ValueError(f"Unknown pivot timeframe '{timeframe}'. Choose from: {', '.join(TIMEFRAMES)}")
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import time
+
+log = logging.getLogger('pivotbot.pivots')
+
+
+class PivotLoader:
+    """
+    Single-flight, negative-cached on-demand pivot loading.
+
+    `request(symbol, price)` is what the tick path calls for a symbol
+    without pivots: it never blocks, and however many ticks arrive there is
+    at most one load per (symbol, trading day) in flight. Symbols requested
+    within `batch_window` seconds share one bulk `load(symbols)` call. Only
+    the latest pending price per symbol is kept and handed to
+    `on_loaded(symbol, price)` once its pivots arrive; earlier ticks are
+    dropped. Symbols that come back without data are negative-cached for
+    `negative_ttl` seconds (and at most until the trading day changes); a
+    failed load backs off for the shorter `error_ttl` so an API outage does
+    not turn every tick into a request.
+
+    `load(symbols)` is a coroutine function returning {symbol: levels} for
+    the symbols that had data; `day()` returns the current trading day key.
+    Requests are batched per trading day, so a day rollover inside the
+    batch window starts a separate load. Everything runs on the event loop.
+    """
+
+    def __init__(self, load, day, on_loaded=None, batch_window=0.05, negative_ttl=3600.0, error_ttl=30.0,
+                 clock=time.monotonic):
+        self.load = load
+        self.day = day
+        self.on_loaded = on_loaded
+        self.batch_window = batch_window
+        self.negative_ttl = negative_ttl
+        self.error_ttl = error_ttl
+        self.clock = clock
+        self.requests = 0
+        self.deduped = 0
+        self.negative_hits = 0
+        self.loads = 0
+        self.failures = 0
+        self._inflight = {}  # (symbol, day) -> future of levels or None
+        self._queued = {}  # day -> symbols waiting for that day's flush
+        self._pending_prices = {}
+        self._negative = {}  # symbol -> expiry, for self._negative_day
+        self._negative_day = None
+        self._flush_tasks = {}  # day -> flush task
+
+    def _negative_cached(self, symbol, day):
+        if day != self._negative_day:
+            self._negative.clear()
+            self._negative_day = day
+        expiry = self._negative.get(symbol)
+        if expiry is None:
+            return False
+        if expiry <= self.clock():
+            del self._negative[symbol]
+            return False
+        return True
+
+    def _enqueue(self, symbol, day):
+        key = (symbol, day)
+        future = self._inflight.get(key)
+        if future is not None:
+            self.deduped += 1
+            return future
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self._queued.setdefault(day, []).append(symbol)
+        if day not in self._flush_tasks:
+            self._flush_tasks[day] = asyncio.get_running_loop().create_task(self._flush(day))
+        return future
+
+    def request(self, symbol, price=None):
+        """Tick path: make sure `symbol`'s pivots are loading; never blocks"""
+        self.requests += 1
+        day = self.day()
+        if self._negative_cached(symbol, day):
+            self.negative_hits += 1
+            return
+        if price is not None:
+            self._pending_prices[symbol] = price
+        self._enqueue(symbol, day)
+
+    async def get(self, symbol):
+        """Load `symbol`'s pivots (sharing any in-flight load) and return them, or None if it has no data"""
+        day = self.day()
+        if self._negative_cached(symbol, day):
+            self.negative_hits += 1
+            return None
+        return await asyncio.shield(self._enqueue(symbol, day))
+
+    async def _flush(self, day):
+        await asyncio.sleep(self.batch_window)
+        symbols = self._queued.pop(day)
+        del self._flush_tasks[day]
+        self.loads += 1
+        try:
+            loaded = await self.load(symbols)
+        except Exception as e:
+            self.failures += 1
+            log.warning("❌ Pivot load failed for %d symbols: %s", len(symbols), e, extra={'symbols': len(symbols)})
+            loaded = None
+
+        expiry = self.clock() + (self.negative_ttl if loaded is not None else self.error_ttl)
+        for symbol in symbols:
+            future = self._inflight.pop((symbol, day), None)
+            levels = loaded.get(symbol) if loaded is not None else None
+            if not levels and day == self._negative_day:
+                self._negative[symbol] = expiry
+            price = self._pending_prices.pop(symbol, None)
+            if future is not None and not future.done():
+                future.set_result(levels or None)
+            if levels and price is not None and self.on_loaded:
+                try:
+                    self.on_loaded(symbol, price)
+                except Exception:
+                    log.exception("❌ Error re-checking %s after loading pivots", symbol)
+
+    def stats(self):
+        return {'requests': self.requests, 'deduped': self.deduped, 'negative_hits': self.negative_hits,
+                'negative_cached': len(self._negative), 'in_flight': len(self._inflight),
+                'loads': self.loads, 'failures': self.failures}
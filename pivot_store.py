@@ -0,0 +1,61 @@
+import os
+import sqlite3
+import threading
+
+from pivot_engine import LEVEL_NAMES
+
+_COLUMNS = ', '.join(f'"{name}"' for name in LEVEL_NAMES)
+_PLACEHOLDERS = ', '.join('?' for _ in LEVEL_NAMES)
+
+
+class PivotStore:
+    """
+    On-disk cache of computed pivot levels keyed by (symbol, trading day, method).
+
+    Backed by SQLite in WAL mode, so a restart re-arms every symbol from
+    local disk instead of waiting for a REST round trip per symbol. `day` is
+    the session the levels were derived from, as an ISO date string.
+    """
+
+    def __init__(self, path):
+        if path != ':memory:' and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+            self._db.execute(
+                f'CREATE TABLE IF NOT EXISTS pivots (symbol TEXT NOT NULL, day TEXT NOT NULL, method TEXT NOT NULL, '
+                + ', '.join(f'"{name}" REAL' for name in LEVEL_NAMES)
+                + ', PRIMARY KEY (day, method, symbol)) WITHOUT ROWID'
+            )
+
+    def put_many(self, day, method, levels_by_symbol):
+        """Store {symbol: {level name: value}} for one day and method, replacing existing rows"""
+        rows = [(symbol, day, method, *(levels.get(name) for name in LEVEL_NAMES))
+                for symbol, levels in levels_by_symbol.items()]
+        with self._lock, self._db:
+            self._db.executemany(
+                f'INSERT OR REPLACE INTO pivots (symbol, day, method, {_COLUMNS}) '
+                f'VALUES (?, ?, ?, {_PLACEHOLDERS})', rows)
+        return len(rows)
+
+    def get_many(self, day, method, symbols=None):
+        """Return {symbol: levels} cached for `day`/`method`, optionally limited to `symbols`"""
+        with self._lock:
+            rows = self._db.execute(
+                f'SELECT symbol, {_COLUMNS} FROM pivots WHERE day = ? AND method = ?', (day, method)).fetchall()
+        wanted = None if symbols is None else set(symbols)
+        return {row[0]: {name: value for name, value in zip(LEVEL_NAMES, row[1:]) if value is not None}
+                for row in rows if wanted is None or row[0] in wanted}
+
+    def prune(self, before_day):
+        """Delete every row derived from a session before `before_day`; returns the number deleted"""
+        with self._lock, self._db:
+            return self._db.execute('DELETE FROM pivots WHERE day < ?', (before_day,)).rowcount
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,116 @@
+import threading
+from datetime import date
+
+import numpy as np
+
+from pivot_engine import LEVEL_COUNT, LEVEL_NAMES, levels_to_dict
+
+
+class PivotTable:
+    """
+    Live pivot levels of the whole universe in columnar form.
+
+    Each symbol owns a row of `values`, a float64 array with LEVEL_COUNT
+    columns per entry of `timeframes` (in LEVEL_NAMES order within each; NaN =
+    level not defined by the method or timeframe not loaded), and of `days`,
+    the ordinal of the session the row was derived from (0 = not loaded).
+    `row(symbol)` is a view, so readers never copy; `get(symbol)` builds the
+    {timeframe: {name: value}} dict for display code. 10k symbols take about
+    600 KB per timeframe. Ingest workers get copies of rows (see
+    sharded_ingest), not the table itself.
+    """
+
+    def __init__(self, capacity=64, timeframes=('1Day',)):
+        self.timeframes = tuple(timeframes)
+        self.width = LEVEL_COUNT * len(self.timeframes)
+        self._rows = {}
+        self._symbols = []
+        self._lock = threading.Lock()
+        self.values = np.full((capacity, self.width), np.nan)
+        self.days = np.zeros(capacity, dtype=np.int32)
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + self.days.nbytes
+
+    def __contains__(self, symbol):
+        """True if `symbol` has levels loaded"""
+        row = self._rows.get(symbol)
+        return row is not None and self.days[row] != 0
+
+    def __len__(self):
+        return int(np.count_nonzero(self.days[:len(self._symbols)]))
+
+    def symbols(self):
+        """Symbols with levels loaded, in the order they were first added"""
+        return [self._symbols[i] for i in np.flatnonzero(self.days[:len(self._symbols)])]
+
+    def _allocate(self, symbol):
+        row = self._rows.get(symbol)
+        if row is not None:
+            return row
+        with self._lock:
+            row = self._rows.get(symbol)
+            if row is None:
+                row = len(self._symbols)
+                if row == len(self.days):
+                    self.values = np.concatenate([self.values, np.full((row, self.width), np.nan)])
+                    self.days = np.concatenate([self.days, np.zeros(row, dtype=np.int32)])
+                self._symbols.append(symbol)
+                self._rows[symbol] = row
+            return row
+
+    def put(self, symbol, levels, day):
+        """
+        Store {timeframe: {name: value}} levels derived from session `day` (a
+        date or ISO string). Timeframes missing from `levels` are left empty.
+        """
+        self.put_many({symbol: levels}, day)
+
+    def put_many(self, levels_by_symbol, day):
+        if not levels_by_symbol:
+            return
+        ordinal = (date.fromisoformat(day) if isinstance(day, str) else day).toordinal()
+        rows = [self._allocate(symbol) for symbol in levels_by_symbol]
+        self.values[rows] = [[levels.get(timeframe, {}).get(name, np.nan)
+                              for timeframe in self.timeframes for name in LEVEL_NAMES]
+                             for levels in levels_by_symbol.values()]
+        self.days[rows] = ordinal
+
+    def remove(self, symbol):
+        """Forget `symbol`'s levels; its row is kept for reuse"""
+        row = self._rows.get(symbol)
+        if row is not None:
+            self.days[row] = 0
+            self.values[row] = np.nan
+
+    def row(self, symbol):
+        """The symbol's levels as a view of the table (see the class docstring), or None"""
+        row = self._rows.get(symbol)
+        if row is None or not self.days[row]:
+            return None
+        return self.values[row]
+
+    def get(self, symbol):
+        """{timeframe: {name: value}} for `symbol`, or None if it has no levels loaded"""
+        row = self.row(symbol)
+        return self._levels(row) if row is not None else None
+
+    def _levels(self, row):
+        levels = {}
+        for t, timeframe in enumerate(self.timeframes):
+            block = levels_to_dict(row[t * LEVEL_COUNT:(t + 1) * LEVEL_COUNT])
+            if block:
+                levels[timeframe] = block
+        return levels
+
+    def day(self, symbol):
+        """Session date the symbol's levels were derived from, or None"""
+        row = self._rows.get(symbol)
+        if row is None or not self.days[row]:
+            return None
+        return date.fromordinal(int(self.days[row]))
+
+    def items(self):
+        """(symbol, {timeframe: {name: value}}) for every symbol with levels loaded"""
+        return [(symbol, self._levels(self.values[self._rows[symbol]])) for symbol in self.symbols()]
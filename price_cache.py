@@ -0,0 +1,97 @@
+import threading
+import time
+
+import numpy as np
+
+
+class PriceCache:
+    """
+    Last known price per symbol, written by the stream ingest path.
+
+    Prices and receive times live in preallocated float64 arrays indexed by a
+    per-symbol slot, so a frame's worth of updates is one fancy-indexed
+    assignment and staleness checks over the whole watchlist are vectorized.
+    The exchange timestamp of each price is kept alongside as received.
+    Readers use `fresh()` for prices they can trust and `stale()` for the
+    symbols that still need a REST lookup.
+    """
+
+    def __init__(self, capacity=64, clock=time.time):
+        self.clock = clock
+        self.updates = 0
+        self._slots = {}
+        self._symbols = []
+        self._prices = np.full(capacity, np.nan)
+        self._received = np.zeros(capacity)  # unix seconds, 0 = never
+        self._tick_times = [None] * capacity
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, symbol):
+        return symbol in self._slots
+
+    def _slot(self, symbol):
+        slot = self._slots.get(symbol)
+        if slot is not None:
+            return slot
+        with self._lock:
+            slot = self._slots.get(symbol)
+            if slot is None:
+                slot = len(self._symbols)
+                if slot == len(self._prices):
+                    self._prices = np.concatenate([self._prices, np.full(slot, np.nan)])
+                    self._received = np.concatenate([self._received, np.zeros(slot)])
+                    self._tick_times.extend([None] * slot)
+                self._symbols.append(symbol)
+                self._slots[symbol] = slot
+            return slot
+
+    def update(self, symbol, price, tick_time=None, now=None):
+        slot = self._slot(symbol)
+        self._prices[slot] = price
+        self._received[slot] = self.clock() if now is None else now
+        self._tick_times[slot] = tick_time
+        self.updates += 1
+
+    def update_many(self, prices, times=None, now=None):
+        """Store {symbol: price} (and {symbol: stream timestamp}) received at `now`"""
+        if not prices:
+            return
+        slots = [self._slot(symbol) for symbol in prices]
+        self._prices[slots] = list(prices.values())
+        self._received[slots] = self.clock() if now is None else now
+        if times:
+            tick_times = self._tick_times
+            for slot, symbol in zip(slots, prices):
+                tick_times[slot] = times.get(symbol)
+        self.updates += len(slots)
+
+    def get(self, symbol, now=None):
+        """(price, age in seconds, stream timestamp) or None if the symbol was never priced"""
+        slot = self._slots.get(symbol)
+        if slot is None or not self._received[slot]:
+            return None
+        now = self.clock() if now is None else now
+        return float(self._prices[slot]), now - self._received[slot], self._tick_times[slot]
+
+    def _ages(self, symbols, now):
+        slots = np.array([self._slots.get(s, -1) for s in symbols], dtype=np.int64)
+        known = slots >= 0
+        ages = np.full(len(slots), np.inf)
+        received = self._received[slots[known]]
+        ages[known] = np.where(received > 0, (self.clock() if now is None else now) - received, np.inf)
+        return slots, ages
+
+    def fresh(self, symbols, max_age, now=None):
+        """{symbol: price} for the symbols priced within the last `max_age` seconds"""
+        symbols = list(symbols)
+        slots, ages = self._ages(symbols, now)
+        return {symbols[i]: float(self._prices[slots[i]]) for i in np.flatnonzero(ages <= max_age)}
+
+    def stale(self, symbols, max_age, now=None):
+        """Symbols not priced within the last `max_age` seconds, in input order"""
+        symbols = list(symbols)
+        _, ages = self._ages(symbols, now)
+        return [symbols[i] for i in np.flatnonzero(ages > max_age)]
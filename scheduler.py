@@ -0,0 +1,200 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from datetime import datetime, time as dt_time, timedelta, timezone
+
+from trading_calendar import MARKET_TZ
+
+log = logging.getLogger('pivotbot.scheduler')
+
+# Never sleep longer than this in one go, so wall-clock jumps (suspend,
+# NTP corrections) delay a job by at most this much
+MAX_SLEEP = 300.0
+# How far to search for the next/previous occurrence of a session job
+SEARCH_DAYS = 14
+# A failed run is retried this many times, 1, 2, 4... minutes apart
+MAX_RETRIES = 3
+RETRY_DELAY = 60.0
+
+
+class SessionJob:
+    """
+    A coroutine function run at a point relative to exchange sessions.
+
+    kind 'open'/'close' fires `offset` after each session's open/close
+    (negative offsets fire before); kind 'closed' fires at `at` market time
+    on days without a session (weekends, holidays).
+    """
+
+    def __init__(self, name, func, kind, offset=timedelta(0), at=None, jitter=0.0, catch_up=True):
+        self.name = name
+        self.func = func
+        self.kind = kind
+        self.offset = offset
+        self.at = at
+        self.jitter = jitter
+        self.catch_up = catch_up
+        self.next_at = None
+        self.last_run = None
+        self.runs = 0
+        self.failures = 0
+        self.retries = 0
+        self.last_duration = 0.0
+        self.max_duration = 0.0
+        self.total_duration = 0.0
+
+    def _occurrence(self, calendar, day):
+        if self.kind == 'closed':
+            if calendar.is_session(day):
+                return None
+            return datetime.combine(day, self.at, MARKET_TZ).astimezone(timezone.utc)
+        hours = calendar.session(day)
+        if hours is None:
+            return None
+        return (hours[0] if self.kind == 'open' else hours[1]) + self.offset
+
+    def next_after(self, calendar, now):
+        """First occurrence strictly after unix time `now`"""
+        day = datetime.fromtimestamp(now, MARKET_TZ).date() - timedelta(days=1)
+        for _ in range(SEARCH_DAYS):
+            occurrence = self._occurrence(calendar, day)
+            if occurrence is not None and occurrence.timestamp() > now:
+                return occurrence.timestamp()
+            day += timedelta(days=1)
+        return now + 86400  # calendar ran out; look again tomorrow
+
+    def previous_at_or_before(self, calendar, now):
+        """Most recent occurrence at or before unix time `now`, or None"""
+        day = datetime.fromtimestamp(now, MARKET_TZ).date() + timedelta(days=1)
+        for _ in range(SEARCH_DAYS):
+            occurrence = self._occurrence(calendar, day)
+            if occurrence is not None and occurrence.timestamp() <= now:
+                return occurrence.timestamp()
+            day -= timedelta(days=1)
+        return None
+
+    def stats(self):
+        return {'runs': self.runs, 'failures': self.failures, 'last_run': self.last_run,
+                'next_at': self.next_at, 'last_duration': round(self.last_duration, 3),
+                'max_duration': round(self.max_duration, 3),
+                'avg_duration': round(self.total_duration / self.runs, 3) if self.runs else 0.0}
+
+
+class SessionScheduler:
+    """
+    Runs SessionJobs on the event loop, timed off the trading calendar.
+
+    `calendar` is a callable returning the current TradingCalendar, so a
+    refreshed calendar is picked up without restarting the scheduler. Each
+    job's last run time is persisted to `state_path`; on start, a job whose
+    most recent occurrence was missed (the bot was down) runs once right
+    away. Jobs never overlap: they run one at a time in due order.
+
+    Only successful runs count as run: a job that raised keeps its previous
+    last run time (so a restart catches it up) and is retried up to
+    `max_retries` times with exponential backoff from `retry_delay`.
+    """
+
+    def __init__(self, calendar, state_path=None, clock=time.time, sleep=asyncio.sleep, rng=random.random,
+                 max_retries=MAX_RETRIES, retry_delay=RETRY_DELAY):
+        self.calendar = calendar
+        self.state_path = state_path
+        self.clock = clock
+        self.sleep = sleep
+        self.rng = rng
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.jobs = []
+
+    def at_open(self, name, func, offset=timedelta(0), jitter=0.0, catch_up=True):
+        self.jobs.append(SessionJob(name, func, 'open', offset, jitter=jitter, catch_up=catch_up))
+
+    def at_close(self, name, func, offset=timedelta(0), jitter=0.0, catch_up=True):
+        self.jobs.append(SessionJob(name, func, 'close', offset, jitter=jitter, catch_up=catch_up))
+
+    def on_closed_days(self, name, func, at=dt_time(12, 0), jitter=0.0, catch_up=True):
+        self.jobs.append(SessionJob(name, func, 'closed', at=at, jitter=jitter, catch_up=catch_up))
+
+    def _load_state(self):
+        if not self.state_path:
+            return {}
+        try:
+            with open(self.state_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self):
+        if not self.state_path:
+            return
+        if os.path.dirname(self.state_path):
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({job.name: job.last_run for job in self.jobs}, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _schedule(self, job, after):
+        job.next_at = job.next_after(self.calendar(), after) + job.jitter * self.rng()
+
+    def start(self):
+        """Compute first run times, queueing catch-up runs for missed occurrences"""
+        state = self._load_state()
+        now = self.clock()
+        for job in self.jobs:
+            job.last_run = state.get(job.name)
+            self._schedule(job, now)
+            missed = job.previous_at_or_before(self.calendar(), now)
+            if job.catch_up and missed is not None and (job.last_run is None or job.last_run < missed):
+                log.info("⏪ Catching up missed %s run from %s", job.name,
+                         datetime.fromtimestamp(missed, timezone.utc).isoformat(), extra={'job': job.name})
+                job.next_at = now
+
+    async def run_job(self, job):
+        """Run a job once; returns False if it raised"""
+        started = self.clock()
+        perf_started = time.perf_counter()
+        try:
+            await job.func()
+            ok = True
+        except Exception:
+            job.failures += 1
+            log.exception("❌ Scheduled job %s failed", job.name, extra={'job': job.name})
+            ok = False
+        duration = time.perf_counter() - perf_started
+        job.runs += 1
+        if ok:
+            job.last_run = started
+        job.last_duration = duration
+        job.max_duration = max(job.max_duration, duration)
+        job.total_duration += duration
+        log.info("⏱️ Job %s finished in %.2fs", job.name, duration,
+                 extra={'job': job.name, 'duration': duration})
+        self._save_state()
+        return ok
+
+    async def run(self):
+        if not self.jobs:
+            return
+        self.start()
+        while True:
+            job = min(self.jobs, key=lambda j: j.next_at)
+            delay = job.next_at - self.clock()
+            if delay > 0:
+                await self.sleep(min(delay, MAX_SLEEP))
+                continue
+            if await self.run_job(job) or job.retries >= self.max_retries:
+                job.retries = 0
+                self._schedule(job, max(self.clock(), job.next_at))
+            else:
+                delay = self.retry_delay * 2 ** job.retries
+                job.retries += 1
+                job.next_at = self.clock() + delay
+                log.warning("🔁 Retrying %s in %.0fs (retry %d/%d)", job.name, delay, job.retries, self.max_retries,
+                            extra={'job': job.name})
+
+    def stats(self):
+        return {job.name: job.stats() for job in self.jobs}
@@ -38,7 +38,7 @@ DISCORD_CHANNEL=pivots
 
 # Trading Configuration (OPTIONAL - has defaults)
 STOCKS=AAPL,MSFT,TSLA
-PIVOT_TIMEFRAME=1Day
+PIVOT_TIMEFRAMES=1Day
 CROSSING_THRESHOLD=0.01
 ALERT_COOLDOWN=300
 EOF
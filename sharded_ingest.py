@@ -0,0 +1,328 @@
+"""
+Sharded market data ingestion: the symbol universe is split across worker
+processes, each with its own stream connection, LevelBook, cooldowns and
+crossing evaluation. Workers send back only small events (alerts, pivot
+requests, periodic stats and prices), so ingest throughput is no longer
+bounded by the one GIL the Discord client also needs.
+
+Each worker opens its own websocket, so the Alpaca subscription must allow
+that many concurrent stream connections. Workers are spawned, not forked
+(forking a process with a running event loop is unsafe). A spawned child
+normally re-runs the launching script, which for main.py would open the
+log files, SQLite stores and Discord client again in every worker, so
+workers are started with this module standing in for __main__ instead.
+"""
+import asyncio
+import contextlib
+import logging
+import multiprocessing
+import queue
+import sys
+import threading
+import time
+import zlib
+
+log = logging.getLogger('pivotbot.shards')
+
+# How often workers report stats and fresh prices, and restart-check interval
+STATS_INTERVAL = 1.0
+
+
+def shard_of(symbol, shards):
+    """Stable shard number for a symbol (the same in every process and run)"""
+    return zlib.crc32(symbol.encode()) % shards
+
+
+@contextlib.contextmanager
+def _worker_main_module(frame_source):
+    """
+    Present this module as __main__ while a worker is being spawned.
+
+    multiprocessing imports the parent's __main__ in spawned children; with
+    this module in its place the child imports nothing but sharded_ingest.
+    A frame source defined in the launching script (bench_sharded.py) still
+    needs the real __main__ to unpickle, so it is left alone then.
+    """
+    source = getattr(frame_source, 'func', frame_source)  # functools.partial
+    if getattr(source, '__module__', None) == '__main__':
+        yield
+        return
+    main_module = sys.modules['__main__']
+    sys.modules['__main__'] = sys.modules[__name__]
+    try:
+        yield
+    finally:
+        sys.modules['__main__'] = main_module
+
+
+def shard_worker(shard_id, config, symbols, levels, events, commands, frame_source=None):
+    """Worker process entry point"""
+    # Drop any handlers an imported parent script set up: workers log to stderr only
+    bot_logger = logging.getLogger('pivotbot')
+    for handler in bot_logger.handlers[:]:
+        bot_logger.removeHandler(handler)
+    bot_logger.propagate = True
+    logging.basicConfig(level=config.get('log_level', 'INFO'), force=True,
+                        format=f"%(asctime)s shard-{shard_id} %(levelname)s %(message)s")
+    try:
+        asyncio.run(_worker_main(shard_id, config, symbols, levels, events, commands, frame_source))
+    except KeyboardInterrupt:
+        pass
+
+
+async def _worker_main(shard_id, config, symbols, levels, events, commands, frame_source):
+    # Imported here so the parent does not pay for them until workers start
+    from alerts import AlertEngine
+    from cooldown import CooldownStore
+    from level_index import LevelBook
+    from price_cache import PriceCache
+    from stream import AlpacaStream
+    from tick_history import TickHistory
+    from tick_pipeline import TickPipeline
+
+    loop = asyncio.get_running_loop()
+    book = LevelBook(config['threshold'], capacity=max(64, len(symbols)))
+    for symbol, row in levels.items():
+        book.arm_row(symbol, row, config['timeframes'])
+    watched = set(symbols)
+    prices = PriceCache(capacity=max(64, len(symbols)))
+    requested = set()
+
+    def sink(alert):
+        events.put(('alert', shard_id, alert))
+        return True
+
+    def on_unarmed(symbol, price):
+        if symbol not in requested:
+            requested.add(symbol)
+            events.put(('unarmed', shard_id, symbol, price))
+
+    history = TickHistory(capacity=max(64, len(symbols)), depth=config['history_depth'],
+                          spacing=config['motion_window'] / config['history_depth'])
+    engine = AlertEngine(book, CooldownStore(config['cooldown'], max_entries=config.get('cooldown_max_entries')), sink,
+                         history=history, motion_window=config['motion_window'])
+    pipeline = TickPipeline(book, watched, engine.on_hit, on_unarmed=on_unarmed, price_cache=prices, history=history)
+
+    if frame_source is not None:
+        # Benchmark mode: replay generated frames as fast as possible, no network
+        frames = frame_source(shard_id, symbols)
+        started = time.perf_counter()
+        messages = sum(pipeline.feed(frame) for frame in frames)
+        events.put(('replayed', shard_id, messages, time.perf_counter() - started, engine.alerts))
+        return
+
+    stream = AlpacaStream(config['api_key'], config['api_secret'], symbols, pipeline.feed, url=config['url'],
+                          on_gap=lambda seconds: events.put(('gap', shard_id, seconds)))
+
+    def handle(command):
+        kind = command[0]
+        if kind == 'arm':
+            for symbol, row in command[1].items():
+                book.arm_row(symbol, row, config['timeframes'])
+                requested.discard(symbol)
+        elif kind == 'subscribe':
+            watched.update(command[1])
+            loop.create_task(stream.subscribe(command[1]))
+        elif kind == 'unsubscribe':
+            watched.difference_update(command[1])
+            for symbol in command[1]:
+                book.disarm(symbol)
+            loop.create_task(stream.unsubscribe(command[1]))
+        elif kind == 'stop':
+            loop.create_task(stream.stop())
+
+    def read_commands():
+        while True:
+            command = commands.get()
+            loop.call_soon_threadsafe(handle, command)
+            if command[0] == 'stop':
+                return
+
+    async def report():
+        while True:
+            await asyncio.sleep(config.get('stats_interval', STATS_INTERVAL))
+            # Symbols that could not be armed are asked for again, at most once per interval
+            requested.clear()
+            stats = {'connected': stream.connected, 'reconnects': stream.reconnects,
+                     'last_message_at': stream.last_message_at, 'messages': pipeline.messages,
+                     'frames': pipeline.frames, 'alerts': engine.alerts, 'suppressed': engine.suppressed,
+                     'symbols': len(watched), 'armed': len(book)}
+            events.put(('stats', shard_id, stats, prices.fresh(watched, config.get('stats_interval', STATS_INTERVAL))))
+
+    threading.Thread(target=read_commands, daemon=True).start()
+    reporter = loop.create_task(report())
+    try:
+        await stream.run()
+    finally:
+        reporter.cancel()
+
+
+class ShardedIngest:
+    """
+    Parent-side controller for `workers` ingest processes.
+
+    Symbols are assigned to shards with shard_of(). Worker events arrive on
+    the event loop through the callbacks:
+    - on_alert(alert) for every alert a worker raised
+    - on_unarmed(symbol, price) when a worker sees a symbol without pivots;
+      answer by calling arm()
+    - on_prices({symbol: price}) with each worker's recently seen prices
+    - on_gap(seconds) after a worker's stream reconnects
+    Crashed workers are restarted with their current symbols and levels.
+    Levels travel as PivotTable rows laid out for `timeframes`.
+    """
+
+    def __init__(self, workers, api_key, api_secret, symbols, url, threshold, cooldown,
+                 cooldown_max_entries=None, on_alert=None, on_unarmed=None, on_prices=None, on_gap=None,
+                 stats_interval=STATS_INTERVAL, frame_source=None, context='spawn', timeframes=('1Day',),
+                 history_depth=32, motion_window=60.0):
+        self.workers = workers
+        self.config = {'api_key': api_key, 'api_secret': api_secret, 'url': url, 'threshold': threshold,
+                       'cooldown': cooldown, 'cooldown_max_entries': cooldown_max_entries,
+                       'stats_interval': stats_interval, 'timeframes': tuple(timeframes),
+                       'history_depth': history_depth, 'motion_window': motion_window,
+                       'log_level': logging.getLevelName(logging.getLogger('pivotbot').getEffectiveLevel())}
+        self.on_alert = on_alert
+        self.on_unarmed = on_unarmed
+        self.on_prices = on_prices
+        self.on_gap = on_gap
+        self.frame_source = frame_source
+        self.shard_symbols = [dict() for _ in range(workers)]  # symbol -> level row or None
+        for symbol in symbols:
+            self.shard_symbols[shard_of(symbol, workers)][symbol] = None
+        self.shard_stats = [{} for _ in range(workers)]
+        self.replayed = {}
+        self.restarts = 0
+        self._ctx = multiprocessing.get_context(context)
+        self._events = self._ctx.Queue()
+        self._commands = [None] * workers
+        self._processes = [None] * workers
+        self._loop = None
+        self._stopping = False
+
+    def _start_worker(self, shard_id):
+        symbols = list(self.shard_symbols[shard_id])
+        levels = {s: row for s, row in self.shard_symbols[shard_id].items() if row is not None}
+        self._commands[shard_id] = self._ctx.Queue()
+        process = self._ctx.Process(target=shard_worker, name=f"ingest-shard-{shard_id}", daemon=True,
+                                    args=(shard_id, self.config, symbols, levels, self._events,
+                                          self._commands[shard_id], self.frame_source))
+        with _worker_main_module(self.frame_source):
+            process.start()
+        self._processes[shard_id] = process
+
+    def _read_events(self):
+        while not self._stopping:
+            try:
+                event = self._events.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                return
+            self._loop.call_soon_threadsafe(self._handle_event, event)
+
+    def _handle_event(self, event):
+        kind, shard_id = event[0], event[1]
+        if kind == 'alert':
+            if self.on_alert:
+                self.on_alert(event[2])
+        elif kind == 'unarmed':
+            if self.on_unarmed:
+                self.on_unarmed(event[2], event[3])
+        elif kind == 'stats':
+            self.shard_stats[shard_id] = event[2]
+            if self.on_prices and event[3]:
+                self.on_prices(event[3])
+        elif kind == 'gap':
+            if self.on_gap:
+                self.on_gap(event[2])
+        elif kind == 'replayed':
+            self.replayed[shard_id] = event[2:]
+
+    def arm(self, rows_by_symbol):
+        """Send pivot level rows ({symbol: row}, see PivotTable.row) to the shards that own the symbols"""
+        batches = [{} for _ in range(self.workers)]
+        for symbol, row in rows_by_symbol.items():
+            shard_id = shard_of(symbol, self.workers)
+            if symbol in self.shard_symbols[shard_id]:
+                self.shard_symbols[shard_id][symbol] = row
+                batches[shard_id][symbol] = row
+        for shard_id, batch in enumerate(batches):
+            if batch and self._commands[shard_id] is not None:
+                self._commands[shard_id].put(('arm', batch))
+
+    def _route(self, kind, symbols):
+        batches = [[] for _ in range(self.workers)]
+        for symbol in symbols:
+            batches[shard_of(symbol, self.workers)].append(symbol)
+        for shard_id, batch in enumerate(batches):
+            if batch and self._commands[shard_id] is not None:
+                self._commands[shard_id].put((kind, batch))
+
+    async def subscribe(self, symbols):
+        added = [s for s in symbols if s not in self.shard_symbols[shard_of(s, self.workers)]]
+        for symbol in added:
+            self.shard_symbols[shard_of(symbol, self.workers)][symbol] = None
+        self._route('subscribe', added)
+        return added
+
+    async def unsubscribe(self, symbols):
+        removed = [s for s in symbols if s in self.shard_symbols[shard_of(s, self.workers)]]
+        for symbol in removed:
+            del self.shard_symbols[shard_of(symbol, self.workers)][symbol]
+        self._route('unsubscribe', removed)
+        return removed
+
+    @property
+    def connected(self):
+        return all(stats.get('connected') for stats in self.shard_stats)
+
+    @property
+    def last_message_at(self):
+        """Oldest per-shard last message time: the feed is only as fresh as its stalest shard"""
+        times = [stats.get('last_message_at') for stats in self.shard_stats]
+        return None if None in times else min(times)
+
+    def stats(self):
+        totals = {}
+        for stats in self.shard_stats:
+            for key in ('messages', 'frames', 'alerts', 'suppressed', 'symbols', 'armed', 'reconnects'):
+                totals[key] = totals.get(key, 0) + stats.get(key, 0)
+        totals['workers'] = self.workers
+        totals['alive'] = sum(1 for p in self._processes if p is not None and p.is_alive())
+        totals['restarts'] = self.restarts
+        return totals
+
+    async def run(self):
+        """Start every worker and keep them running until stop()"""
+        self._loop = asyncio.get_running_loop()
+        self._stopping = False
+        for shard_id in range(self.workers):
+            self._start_worker(shard_id)
+        reader = threading.Thread(target=self._read_events, name="ingest-events", daemon=True)
+        reader.start()
+        log.info("🧩 Started %d ingest workers for %d symbols", self.workers,
+                 sum(len(s) for s in self.shard_symbols))
+        while not self._stopping:
+            await asyncio.sleep(self.config['stats_interval'])
+            for shard_id, process in enumerate(self._processes):
+                if self.frame_source is None and not self._stopping and not process.is_alive():
+                    log.error("❌ Ingest worker %d exited (code %s), restarting", shard_id, process.exitcode)
+                    self.restarts += 1
+                    self._start_worker(shard_id)
+            if self.frame_source is not None and len(self.replayed) == self.workers:
+                break
+
+    async def stop(self, timeout=5.0):
+        self._stopping = True
+        for commands in self._commands:
+            if commands is not None:
+                commands.put(('stop',))
+        deadline = time.monotonic() + timeout
+        for process in self._processes:
+            if process is None:
+                continue
+            while process.is_alive() and time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+            if process.is_alive():
+                process.terminate()
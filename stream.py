@@ -0,0 +1,178 @@
+import asyncio
+import json
+import logging
+import random
+import time
+
+import websockets
+
+from tick_pipeline import decode_frame
+
+STREAM_URL = 'wss://stream.data.alpaca.markets/v2/iex'  # IEX for paper trading
+# Symbols per subscribe/unsubscribe message, keeping frames small for large universes
+SUBSCRIBE_BATCH = 1000
+
+log = logging.getLogger('pivotbot.stream')
+
+
+class StreamAuthError(Exception):
+    """Raised when the stream rejects our credentials or connection"""
+
+
+class AlpacaStream:
+    """
+    asyncio client for the Alpaca market data websocket.
+
+    `run()` connects, authenticates, subscribes to `channels` (quotes, and
+    trades if asked for) for `symbols` and
+    hands every raw frame to `on_frame(raw)` on the event loop. When the
+    connection drops it reconnects forever with jittered exponential backoff
+    ("full jitter": a random delay up to base * 2**attempt, capped at
+    `max_delay`), resubscribes, and reports how long the feed was silent
+    through `on_gap(seconds)`. The backoff only starts over once a connection
+    has stayed up for `stable_after` seconds, so a server that accepts and
+    then drops us at once (connection limit, auth limit) is not hammered.
+
+    The subscription can change while connected: `subscribe()` and
+    `unsubscribe()` update the symbol set and send the difference to the live
+    connection in batches of `subscribe_batch` symbols.
+    """
+
+    def __init__(self, api_key, api_secret, symbols, on_frame, url=STREAM_URL, on_gap=None,
+                 base_delay=1.0, max_delay=60.0, connect=websockets.connect, subscribe_batch=SUBSCRIBE_BATCH,
+                 channels=('quotes',), stable_after=30.0):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.symbols = dict.fromkeys(symbols)  # insertion-ordered set
+        self.on_frame = on_frame
+        self.url = url
+        self.on_gap = on_gap
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.connect = connect
+        self.subscribe_batch = subscribe_batch
+        self.channels = tuple(channels)
+        self.stable_after = stable_after
+        self.connected = False
+        self.reconnects = 0
+        self.last_message_at = None
+        self.last_gap = None
+        self._attempt = 0
+        self._connected_at = None
+        self._stopping = False
+        self._ws = None
+
+    def backoff_delay(self):
+        """Full-jitter exponential backoff for the current attempt number"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** min(self._attempt, 16)))
+
+    async def _send(self, ws, message):
+        await ws.send(json.dumps(message))
+
+    async def _authenticate(self, ws):
+        await self._send(ws, {"action": "auth", "key": self.api_key, "secret": self.api_secret})
+        while True:
+            for msg in decode_frame(await ws.recv()):
+                if msg.get('T') == 'error':
+                    raise StreamAuthError(f"{msg.get('code')}: {msg.get('msg')}")
+                if msg.get('T') == 'success' and msg.get('msg') == 'authenticated':
+                    return
+
+    async def _send_batched(self, ws, action, symbols):
+        for i in range(0, len(symbols), self.subscribe_batch):
+            batch = symbols[i:i + self.subscribe_batch]
+            await self._send(ws, {"action": action, **{channel: batch for channel in self.channels}})
+
+    async def _subscribe(self, ws):
+        """Subscribe to the symbol set, following changes made while the messages were being sent"""
+        sent = {}
+        while True:
+            added = [s for s in self.symbols if s not in sent]
+            removed = [s for s in sent if s not in self.symbols]
+            if not added and not removed:
+                return
+            if added:
+                await self._send_batched(ws, "subscribe", added)
+            if removed:
+                await self._send_batched(ws, "unsubscribe", removed)
+            sent.update(dict.fromkeys(added))
+            for symbol in removed:
+                del sent[symbol]
+
+    async def subscribe(self, symbols):
+        """Add quote subscriptions, live if connected; returns the symbols that were not already subscribed"""
+        added = [s for s in dict.fromkeys(symbols) if s not in self.symbols]
+        self.symbols.update(dict.fromkeys(added))
+        ws = self._ws
+        if added and ws is not None and self.connected:
+            await self._send_batched(ws, "subscribe", added)
+            log.info("➕ Subscribed to %d more symbols (%d total)", len(added), len(self.symbols))
+        return added
+
+    async def unsubscribe(self, symbols):
+        """Drop quote subscriptions, live if connected; returns the symbols that were subscribed"""
+        removed = [s for s in dict.fromkeys(symbols) if s in self.symbols]
+        for symbol in removed:
+            del self.symbols[symbol]
+        ws = self._ws
+        if removed and ws is not None and self.connected:
+            await self._send_batched(ws, "unsubscribe", removed)
+            log.info("➖ Unsubscribed from %d symbols (%d total)", len(removed), len(self.symbols))
+        return removed
+
+    async def _session(self):
+        async with self.connect(self.url) as ws:
+            self._ws = ws
+            await self._authenticate(ws)
+            await self._subscribe(ws)
+            self.connected = True
+            self._connected_at = time.monotonic()
+            log.info("📡 Stream connected and subscribed to %s for %d symbols", '/'.join(self.channels),
+                     len(self.symbols))
+
+            now = time.time()
+            if self.last_message_at is not None:
+                self.last_gap = now - self.last_message_at
+                log.warning("⚠️ Stream gap of %.1fs after reconnect #%d", self.last_gap, self.reconnects,
+                            extra={'gap_seconds': self.last_gap, 'reconnects': self.reconnects})
+                if self.on_gap:
+                    self.on_gap(self.last_gap)
+            self.last_message_at = now
+
+            async for raw in ws:
+                self.last_message_at = time.time()
+                self.on_frame(raw)
+
+    async def run(self):
+        """Keep the stream connected until stop() is called"""
+        self._stopping = False
+        while not self._stopping:
+            try:
+                await self._session()
+                if not self._stopping:
+                    log.warning("WebSocket closed by server")
+            except asyncio.CancelledError:
+                raise
+            except StreamAuthError as e:
+                log.error("❌ Stream rejected authentication: %s", e)
+            except Exception as e:
+                log.warning("WebSocket error: %s", e)
+            finally:
+                self.connected = False
+                self._ws = None
+                if self._connected_at is not None and time.monotonic() - self._connected_at >= self.stable_after:
+                    self._attempt = 0
+                self._connected_at = None
+
+            if self._stopping:
+                break
+            delay = self.backoff_delay()
+            self._attempt += 1
+            self.reconnects += 1
+            log.info("🔄 Reconnecting in %.1fs (attempt %d)", delay, self._attempt)
+            await asyncio.sleep(delay)
+
+    async def stop(self):
+        self._stopping = True
+        if self._ws is not None:
+            await self._ws.close()
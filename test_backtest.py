@@ -0,0 +1,58 @@
+from datetime import date
+
+import numpy as np
+
+from alerts import AlertEngine
+from backtest import (SimulatedClock, load_bars, run_backtest, save_bars, session_index,
+                      session_pivots, synthetic_bars)
+from cooldown import CooldownStore
+from level_index import LevelBook
+from pivot_engine import levels_to_dict
+
+
+def replay_every_tick(symbol, bars, threshold, cooldown):
+    """Reference replay without the vectorized candidate filter"""
+    keep, sessions, dates = session_index(bars['t'])
+    bars = {k: v[keep] for k, v in bars.items()}
+    levels = session_pivots(bars, sessions, len(dates), 'traditional')
+    clock = SimulatedClock()
+    book = LevelBook(threshold)
+    alerts = []
+    engine = AlertEngine(book, CooldownStore(cooldown, clock=clock), alerts.append, clock=clock)
+    armed = 0
+    for i, session in enumerate(sessions.tolist()):
+        if session == 0:
+            continue
+        if session != armed:
+            book.arm(symbol, levels_to_dict(levels[session]))
+            armed = session
+        clock.now = float(bars['t'][i] + 60)
+        hit = book.check(symbol, float(bars['c'][i]))
+        if hit is not None:
+            engine.on_hit(symbol, float(bars['c'][i]), hit)
+    return alerts
+
+
+def test_backtest_matches_tick_by_tick_replay(tmp_path):
+    for symbol in ('AAA', 'BBB'):
+        save_bars(tmp_path, symbol, synthetic_bars(symbol, date(2024, 3, 4), 10))
+
+    alerts, replayed, missing = run_backtest(['AAA', 'BBB', 'CCC'], tmp_path, 0.05, 300, 'traditional')
+
+    assert missing == ['CCC']
+    assert replayed == 2 * 9 * 390  # the first session only seeds pivots
+    expected = replay_every_tick('AAA', load_bars(tmp_path, 'AAA'), 0.05, 300) + \
+        replay_every_tick('BBB', load_bars(tmp_path, 'BBB'), 0.05, 300)
+    assert alerts and alerts == expected
+
+
+def test_session_pivots_use_previous_session():
+    bars = synthetic_bars('AAA', date(2024, 3, 8), 2)  # Friday and Monday
+    keep, sessions, dates = session_index(bars['t'])
+    assert [str(d) for d in dates] == ['2024-03-08', '2024-03-11']
+
+    levels = session_pivots(bars, sessions, len(dates), 'traditional')
+    friday = sessions == 0
+    high, low, close = bars['h'][friday].max(), bars['l'][friday].min(), bars['c'][friday][-1]
+    assert np.isnan(levels[0]).all()
+    assert levels[1][0] == (high + low + close) / 3
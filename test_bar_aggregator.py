@@ -0,0 +1,76 @@
+import json
+from datetime import datetime, timezone
+
+from bar_aggregator import BarAggregator
+from level_index import LevelBook
+from tick_pipeline import TickPipeline
+
+# 2024-01-02 15:00 UTC = 10:00 New York
+NOON_NY = datetime(2024, 1, 2, 17, 0, tzinfo=timezone.utc).timestamp()
+
+
+def test_trades_build_1m_and_5m_bars_and_vwap():
+    bars = BarAggregator(capacity=1, clock=lambda: NOON_NY)
+    bars.add('AAPL', 100.0, 10, '2024-01-02T15:00:01.5Z')
+    bars.add('AAPL', 102.0, 30, '2024-01-02T15:00:40Z')
+    bars.add('AAPL', 99.0, 10, '2024-01-02T15:00:59.999999999Z')
+    bars.add('AAPL', 101.0, 50, '2024-01-02T15:03:00Z')
+    bars.add('MSFT', 50.0, 5, '2024-01-02T15:03:00Z')  # grows past capacity
+
+    one = bars.bars('AAPL', '1Min')
+    assert [(b.start.minute, b.open, b.high, b.low, b.close, b.volume) for b in one] == [
+        (0, 100.0, 102.0, 99.0, 99.0, 50.0), (3, 101.0, 101.0, 101.0, 101.0, 50.0)]
+    five = bars.bar('AAPL', '5Min')
+    assert (five.start, five.open, five.high, five.low, five.close, five.volume) == (
+        datetime(2024, 1, 2, 15, 0, tzinfo=timezone.utc), 100.0, 102.0, 99.0, 101.0, 100.0)
+    assert bars.vwap('AAPL') == (100 * 10 + 102 * 30 + 99 * 10 + 101 * 50) / 100
+    assert bars.vwap('MSFT') == 50.0
+    assert bars.vwap('AAPL', now=NOON_NY + 86400) is None
+
+
+def test_memory_is_bounded_by_the_ring_and_vwap_resets_daily():
+    bars = BarAggregator(history={'1Min': 3, '5Min': 2})
+    size = bars.nbytes
+    for minute in range(30):
+        bars.add('AAPL', 100.0 + minute, 1, f'2024-01-02T15:{minute:02d}:00Z')
+    assert bars.nbytes == size
+    assert [b.close for b in bars.bars('AAPL', '1Min')] == [127.0, 128.0, 129.0]
+    assert [b.start.minute for b in bars.bars('AAPL', '5Min')] == [20, 25]
+
+    bars.add('AAPL', 90.0, 1, '2024-01-03T15:00:00Z')
+    assert bars.vwap('AAPL', now=NOON_NY + 86400) == 90.0
+    bars.add('AAPL', 500.0, 1, '2024-01-02T15:59:00Z')  # late tick from the previous day
+    assert bars.late == 1 and bars.vwap('AAPL', now=NOON_NY + 86400) == 90.0
+
+    bars.forget('AAPL')
+    assert bars.bars('AAPL') == [] and bars.vwap('AAPL') is None
+
+
+def test_pipeline_folds_trades_into_bars():
+    bars = BarAggregator()
+    book = LevelBook(0.05)
+    pipeline = TickPipeline(book, {'AAPL'}, lambda *hit: None, bars=bars)
+    pipeline.feed(json.dumps([{'T': 'q', 'S': 'AAPL', 'bp': 99.0, 'ap': 101.0, 't': '2024-01-02T15:00:00Z'},
+                              {'T': 't', 'S': 'AAPL', 'p': 100.5, 's': 200, 't': '2024-01-02T15:00:01Z'},
+                              {'T': 't', 'S': 'TSLA', 'p': 200.0, 's': 1, 't': '2024-01-02T15:00:01Z'}]))
+    assert bars.ticks == 1 and 'TSLA' not in bars
+    assert bars.bar('AAPL').volume == 200
+
+    quote_bars = BarAggregator()
+    pipeline = TickPipeline(book, {'AAPL'}, lambda *hit: None, bars=quote_bars, bar_quotes=True)
+    pipeline.feed(json.dumps([{'T': 'q', 'S': 'AAPL', 'bp': 99.0, 'ap': 101.0, 't': '2024-01-02T15:00:00Z'}]))
+    assert quote_bars.bar('AAPL').close == 100.0 and quote_bars.vwap('AAPL') is None
+
+
+def test_trades_can_feed_bars_without_moving_the_alert_price():
+    hits = []
+    bars = BarAggregator()
+    book = LevelBook(0.05)
+    book.arm('AAPL', {'Pivot': 100.0, 'R1': 110.0, 'S1': 90.0})
+    pipeline = TickPipeline(book, {'AAPL'}, lambda *hit: hits.append(hit), bars=bars, trade_prices=False)
+    # The trade prints at the pivot, but the quote midpoint that follows it is far away
+    pipeline.feed(json.dumps([{'T': 't', 'S': 'AAPL', 'p': 100.0, 's': 10, 't': '2024-01-02T15:00:00Z'},
+                              {'T': 'q', 'S': 'AAPL', 'bp': 104.9, 'ap': 105.1, 't': '2024-01-02T15:00:00Z'}]))
+    pipeline.feed(json.dumps([{'T': 't', 'S': 'AAPL', 'p': 100.01, 's': 5, 't': '2024-01-02T15:00:01Z'}]))
+    assert hits == []
+    assert bars.bar('AAPL').volume == 15 and bars.vwap('AAPL', now=NOON_NY) is not None
@@ -0,0 +1,73 @@
+from datetime import date
+
+import bar_history
+from bar_history import DailyBarHistory
+from pivot_engine import pivot_period
+
+
+def bar(day, o, h, l, c):
+    return {'t': f"{day}T04:00:00Z", 'o': o, 'h': h, 'l': l, 'c': c, 'v': 1000}
+
+
+def test_ohlc_aggregates_a_period_per_symbol(tmp_path):
+    history = DailyBarHistory(str(tmp_path / 'history.db'))
+    history.append({
+        'AAPL': [bar('2024-01-08', 10, 12, 9, 11), bar('2024-01-09', 11, 15, 10, 14), bar('2024-01-12', 14, 14, 8, 9)],
+        'MSFT': [bar('2024-01-10', 50, 51, 49, 50.5)],
+    }, ['AAPL', 'MSFT', 'NVDA'], date(2024, 1, 8), date(2024, 1, 12))
+
+    symbols, open_, high, low, close = history.ohlc(['AAPL', 'MSFT', 'NVDA'], date(2024, 1, 8), date(2024, 1, 14))
+    assert symbols == ['AAPL', 'MSFT']
+    assert open_.tolist() == [10, 50]
+    assert high.tolist() == [15, 51]
+    assert low.tolist() == [8, 49]
+    assert close.tolist() == [9, 50.5]
+
+    assert history.ohlc(['AAPL'], date(2024, 1, 9), date(2024, 1, 9))[4].tolist() == [14]
+    assert history.ohlc(['AAPL'], date(2024, 2, 1), date(2024, 2, 29))[0] == []
+    history.close()
+
+
+def test_coverage_ends_at_the_last_bar_returned(tmp_path):
+    path = str(tmp_path / 'history.db')
+    history = DailyBarHistory(path)
+    history.append({'AAPL': [bar('2024-01-08', 1, 2, 1, 2)]}, ['AAPL', 'NVDA'], date(2024, 1, 8), date(2024, 1, 8))
+    history.append({'AAPL': [bar('2024-01-09', 2, 3, 2, 3)]}, ['AAPL'], date(2024, 1, 9), date(2024, 1, 9))
+    # The 2024-01-10 bar is late: AAPL must be asked for it again
+    history.append({'AAPL': [], 'MSFT': [bar('2024-01-09', 5, 6, 4, 5)]}, ['AAPL', 'MSFT'],
+                   date(2024, 1, 8), date(2024, 1, 10))
+    history.close()
+
+    history = DailyBarHistory(path)
+    assert history.coverage(['AAPL', 'NVDA', 'MSFT']) == {'AAPL': (date(2024, 1, 8), date(2024, 1, 9)),
+                                                          'MSFT': (date(2024, 1, 8), date(2024, 1, 9))}
+    assert history.prune(date(2024, 1, 9)) == 1
+    assert history.coverage(['AAPL'])['AAPL'] == (date(2024, 1, 9), date(2024, 1, 9))
+    history.close()
+
+
+def test_lookups_only_read_the_requested_symbols(tmp_path, monkeypatch):
+    monkeypatch.setattr(bar_history, 'SYMBOLS_PER_QUERY', 2)
+    history = DailyBarHistory(str(tmp_path / 'history.db'))
+    symbols = [f"SYM{i}" for i in range(7)]
+    history.append({s: [bar('2024-01-08', i, i + 2, i - 1, i + 1)] for i, s in enumerate(symbols)}, symbols,
+                   date(2024, 1, 8), date(2024, 1, 8))
+
+    wanted = ['SYM5', 'SYM1', 'SYM3', 'SYM6', 'SYM1']
+    names, open_, _, _, close = history.ohlc(wanted, date(2024, 1, 1), date(2024, 1, 31))
+    assert names == ['SYM1', 'SYM3', 'SYM5', 'SYM6'] and close.tolist() == [2, 4, 6, 7]
+    assert sorted(history.coverage(wanted)) == ['SYM1', 'SYM3', 'SYM5', 'SYM6']
+
+    plan = history._db.execute('EXPLAIN QUERY PLAN SELECT symbol, day, o, h, l, c FROM daily_bars '
+                               "WHERE symbol IN ('SYM1') AND day BETWEEN 0 AND 1000000").fetchall()
+    assert 'daily_bars_symbol' in str(plan)
+    history.close()
+
+
+def test_pivot_periods():
+    friday, monday = date(2024, 3, 1), date(2024, 3, 4)
+    assert pivot_period('1Day', monday, friday) == (friday, friday)
+    assert pivot_period('1Week', monday, friday) == (date(2024, 2, 26), date(2024, 3, 3))
+    assert pivot_period('1Week', date(2024, 3, 6), date(2024, 3, 5)) == (date(2024, 2, 26), date(2024, 3, 3))
+    assert pivot_period('1Month', monday, friday) == (date(2024, 2, 1), date(2024, 2, 29))
+    assert pivot_period('1Month', date(2024, 1, 2), date(2023, 12, 29)) == (date(2023, 12, 1), date(2023, 12, 31))
@@ -0,0 +1,43 @@
+import json
+import logging
+
+from bot_logging import SampleFilter, setup_logging, shutdown_logging
+
+
+def test_records_are_written_as_json_lines_with_extra_fields(tmp_path):
+    log = setup_logging('INFO', str(tmp_path), console=False)
+    log.info("🎯 %s crossed %s", 'AAPL', 'R1', extra={'symbol': 'AAPL', 'price': 101.5})
+    log.debug("hidden")
+    shutdown_logging()
+
+    lines = (tmp_path / 'pivotbot.jsonl').read_text(encoding='utf-8').splitlines()
+    assert len(lines) == 1
+    entry = json.loads(lines[0])
+    assert entry['msg'] == "🎯 AAPL crossed R1"
+    assert entry['level'] == 'INFO'
+    assert (entry['symbol'], entry['price']) == ('AAPL', 101.5)
+
+
+def test_tick_debug_is_off_by_default_and_sampled_when_enabled(tmp_path):
+    setup_logging('INFO', str(tmp_path), tick_debug=False, console=False)
+    assert not logging.getLogger('pivotbot.tick').isEnabledFor(logging.DEBUG)
+
+    setup_logging('INFO', str(tmp_path), tick_debug=True, debug_sample_every=10, console=False)
+    tick = logging.getLogger('pivotbot.tick')
+    for i in range(100):
+        tick.debug("tick %d", i)
+    tick.warning("always kept")
+    shutdown_logging()
+
+    lines = (tmp_path / 'pivotbot.jsonl').read_text(encoding='utf-8').splitlines()
+    messages = [json.loads(line)['msg'] for line in lines]
+    assert messages[:10] == [f"tick {i}" for i in range(0, 100, 10)]
+    assert messages[-1] == "always kept"
+
+
+def test_sample_filter_counts_per_template():
+    sample = SampleFilter(3)
+    make = lambda msg: logging.makeLogRecord({'msg': msg, 'levelno': logging.DEBUG})
+    kept = [sample.filter(make('a')) for _ in range(6)]
+    assert kept == [True, False, False, True, False, False]
+    assert sample.filter(make('b'))
@@ -0,0 +1,87 @@
+import random
+import resource
+import tracemalloc
+
+from cooldown import CooldownStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_key_cools_down_then_expires():
+    clock = FakeClock()
+    store = CooldownStore(300, clock=clock)
+    assert store.allow((0, 1))
+    assert not store.allow((0, 1))
+    assert store.allow((0, 2))
+    clock.now = 299.9
+    assert (0, 1) in store
+    assert not store.allow((0, 1))
+    clock.now = 300.0
+    assert store.allow((0, 1))
+    assert store.stats() == {'size': 1, 'expirations': 2, 'evictions': 0}
+
+
+def test_memory_bounded_mode_evicts_soonest_expiring():
+    clock = FakeClock()
+    store = CooldownStore(300, max_entries=3, clock=clock)
+    for i in range(3):
+        clock.now = i
+        store.allow((i, 0))
+    clock.now = 10
+    assert store.allow((9, 0))
+    assert len(store) == 3
+    assert store.evictions == 1
+    assert (0, 0) not in store
+    assert (1, 0) in store
+
+
+def test_size_and_memory_stay_flat_over_a_simulated_week_of_quotes():
+    clock = FakeClock()
+    store = CooldownStore(300, max_entries=2000, clock=clock)
+    rng = random.Random(1)
+    symbols, levels = 500, 7
+
+    def trade_day(day):
+        # One level hit somewhere in the universe second of a 6.5h session
+        start = day * 86400 + 9.5 * 3600
+        for step in range(int(6.5 * 3600)):
+            clock.now = start + step
+            key = (rng.randrange(symbols), rng.randrange(levels))
+            if store.allow(key) and step % 4 == 0:
+                store.discard(key)  # the alert could not be delivered
+            # Hot keys that alert and fail again and again
+            hot = (step % 3, 0)
+            if store.allow(hot):
+                store.discard(hot)
+
+    tracemalloc.start()
+    trade_day(0)
+    baseline_traced = tracemalloc.get_traced_memory()[0]
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    for day in range(1, 7):
+        trade_day(day)
+        assert len(store) <= 2000
+        assert len(store._heap) <= 2 * len(store) + 65
+    final_traced = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    final_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    assert store.expirations > 0
+    # Six more days of quotes must not grow memory beyond noise
+    assert final_traced - baseline_traced < 256 * 1024
+    assert final_rss - baseline_rss < 16 * 1024  # ru_maxrss is in KiB on Linux
+    # Eviction still drops the live entry closest to expiring, not a stale one
+    clock.now += 86400
+    for i in range(2000):
+        store.allow(('full', i))
+        clock.now += 0.001
+    store.discard(('full', 0))
+    store.allow(('full', 'a'))
+    store.allow(('full', 'b'))
+    assert ('full', 1) not in store and ('full', 2) in store and len(store) == 2000
@@ -0,0 +1,119 @@
+import asyncio
+
+from dispatcher import PRIORITY_CHATTER, PRIORITY_SUMMARY, Dispatcher, RateLimitBucket
+from fake_alpaca import DiscordSink
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.now += seconds
+
+
+def render(alerts):
+    return f"{len(alerts)} alerts", list(alerts)
+
+
+def test_alert_burst_is_coalesced_and_jumps_the_queue():
+    sink = DiscordSink()
+    dispatcher = Dispatcher(sink.send, render, window=0.05)
+
+    async def scenario():
+        task = asyncio.create_task(dispatcher.run())
+        await asyncio.sleep(0)
+        dispatcher.submit_message("hello", priority=PRIORITY_CHATTER)
+        dispatcher.submit_message("daily pivots", priority=PRIORITY_SUMMARY)
+        for i in range(30):
+            dispatcher.submit_alert(f"alert{i}")
+        while len(sink.messages) < 3:
+            await asyncio.sleep(0.01)
+        task.cancel()
+
+    asyncio.run(scenario())
+    assert [content for _, content, _ in sink.messages] == ["30 alerts", "daily pivots", "hello"]
+    assert sink.messages[0][2] == [f"alert{i}" for i in range(30)]
+    stats = dispatcher.stats()
+    assert stats['alerts_sent'] == 30 and stats['sent'] == 3 and stats['queued'] == 0
+    assert stats['delay_max'] >= 0.05
+
+
+def test_bucket_paces_to_limit_and_follows_headers():
+    clock = FakeClock()
+    bucket = RateLimitBucket(limit=5, period=5.0, clock=clock, sleep=clock.sleep)
+
+    async def take(n):
+        return [await bucket.acquire() for _ in range(n)]
+
+    waits = asyncio.run(take(6))
+    assert waits == [0, 0, 0, 0, 0, 5.0]
+    assert clock.now == 5.0
+
+    bucket.update({'X-RateLimit-Limit': '5', 'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset-After': '2.5'})
+    assert asyncio.run(take(1)) == [2.5]
+
+    bucket.pause(1.0)
+    assert asyncio.run(take(1)) == [1.0]
+
+
+def test_rate_limited_send_is_retried():
+    class RateLimited(Exception):
+        retry_after = 0.01
+
+    sent = []
+    attempts = []
+
+    async def send(content, embeds):
+        attempts.append(content)
+        if len(attempts) == 1:
+            raise RateLimited()
+        sent.append(content)
+
+    dispatcher = Dispatcher(send, render, window=0)
+
+    async def scenario():
+        task = asyncio.create_task(dispatcher.run())
+        await asyncio.sleep(0)
+        dispatcher.submit_message("summary", priority=PRIORITY_SUMMARY)
+        while not sent:
+            await asyncio.sleep(0.01)
+        task.cancel()
+
+    asyncio.run(scenario())
+    assert attempts == ["summary", "summary"] and sent == ["summary"]
+
+
+def test_oversized_batches_are_split_to_fit_discord_limits():
+    class Rejected(Exception):
+        status = 400
+
+    def render_big(alerts):
+        return None, [{'title': 'alerts', 'fields': [{'name': a, 'value': 'x' * 994} for a in alerts]}]
+
+    messages = []
+
+    async def send(content, embeds):
+        fields = embeds[0]['fields']
+        if not messages and len(fields) > 3:
+            raise Rejected("Invalid Form Body")  # the first batch is refused despite fitting the size cap
+        messages.append([f['name'] for f in fields])
+
+    dispatcher = Dispatcher(send, render_big, window=0.01, bucket=RateLimitBucket(limit=100))
+
+    async def scenario():
+        task = asyncio.create_task(dispatcher.run())
+        await asyncio.sleep(0)
+        for i in range(20):
+            dispatcher.submit_alert(f"a{i:02d}")
+        while dispatcher.stats()['alerts_sent'] < 20:
+            await asyncio.sleep(0.01)
+        task.cancel()
+
+    asyncio.run(scenario())
+    assert [len(m) for m in messages][:2] == [3, 6]  # 6 alerts fit the cap; refused once, then halved
+    assert sorted(name for m in messages for name in m) == [f"a{i:02d}" for i in range(20)]
+    assert all(len(m) <= 6 for m in messages) and dispatcher.stats()['failed'] == 0
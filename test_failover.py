@@ -0,0 +1,149 @@
+import asyncio
+
+from failover import FailoverController
+from price_cache import PriceCache
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.now += seconds
+        await asyncio.sleep(0)
+
+
+class Feed:
+    """Stream health as the controller sees it"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.connected = True
+        self.last_message_at = clock()
+        self.open = True
+
+    def age(self):
+        return self.clock() - self.last_message_at if self.last_message_at is not None else None
+
+
+def make_controller(symbols, clock, feed, **kwargs):
+    fetched = []
+    seen = []
+
+    async def fetch(batch):
+        fetched.append((clock(), list(batch)))
+        return {s: 100.0 for s in batch}
+
+    controller = FailoverController(fetch, lambda s, p: seen.append(s), lambda: symbols,
+                                    PriceCache(clock=clock), lambda: feed.connected, feed.age, lambda: feed.open,
+                                    clock=clock, sleep=clock.sleep, **kwargs)
+    return controller, fetched, seen
+
+
+def run_until(controller, clock, end, during=None):
+    async def scenario():
+        task = asyncio.create_task(controller.run())
+        while clock.now < end:
+            if during:
+                during(clock.now)
+            await asyncio.sleep(0)
+        task.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_healthy_stream_only_polls_stale_symbols():
+    clock = FakeClock()
+    feed = Feed(clock)
+    controller, fetched, seen = make_controller(['AAPL', 'MSFT'], clock, feed, idle_interval=60, max_age=30)
+    controller.price_cache.update('AAPL', 190.0)
+
+    def stream_alive(now):
+        feed.last_message_at = now
+        controller.price_cache.update('AAPL', 190.0)
+
+    run_until(controller, clock, 1200, during=stream_alive)
+    assert controller.failovers == 0
+    assert fetched[0] == (1000.0, ['MSFT'])
+    # MSFT goes stale between cycles, so it is polled once per idle interval
+    assert all(batch == ['MSFT'] for _, batch in fetched)
+    assert [t for t, _ in fetched] == [1000.0, 1060.0, 1120.0, 1180.0]
+    assert set(seen) == {'MSFT'}
+
+
+def test_dead_stream_fails_over_to_fast_polling_and_recovers():
+    clock = FakeClock()
+    feed = Feed(clock)
+    controller, fetched, _ = make_controller(['AAPL', 'MSFT'], clock, feed, idle_interval=60, fast_interval=5,
+                                             stale_after=30, recover_after=10)
+    controller.price_cache.update_many({'AAPL': 1.0, 'MSFT': 1.0})
+
+    def timeline(now):
+        if now < 1100:
+            feed.last_message_at = now
+            controller.price_cache.update_many({'AAPL': 1.0, 'MSFT': 1.0})
+        elif now < 1200:
+            feed.connected = False
+        else:
+            feed.connected = True
+            feed.last_message_at = now
+            controller.price_cache.update_many({'AAPL': 1.0, 'MSFT': 1.0})
+
+    run_until(controller, clock, 1400, during=timeline)
+    assert controller.failovers == 1
+    assert not controller.active
+    started, seconds = controller.periods[0]
+    assert 1100 <= started <= 1105
+    assert 100 <= seconds <= 120
+    during = [t for t, batch in fetched if 1100 <= t < 1200]
+    assert len(during) >= 15
+    assert all(batch == ['AAPL', 'MSFT'] for t, batch in fetched if 1100 <= t < 1200)
+    assert not [t for t, _ in fetched if t > 1230]
+    assert controller.failover_seconds() == seconds
+
+
+def test_failover_interval_respects_rest_rate_limit():
+    clock = FakeClock()
+    feed = Feed(clock)
+    feed.connected = False
+    symbols = [f"SYM{i}" for i in range(10_000)]
+    controller, fetched, _ = make_controller(symbols, clock, feed, fast_interval=5, rate_limit=180,
+                                             requests_for=lambda batch: -(-len(batch) // 200))
+    run_until(controller, clock, 1100)
+    times = [t for t, _ in fetched]
+    # 50 requests per cycle at 180/minute: one cycle every ~16.7s instead of every 5s
+    assert all(b - a >= 16.6 for a, b in zip(times, times[1:]))
+    assert controller.requests == 50 * len(fetched)
+
+
+def test_closed_market_never_polls_or_fails_over():
+    clock = FakeClock()
+    feed = Feed(clock)
+    feed.open = False
+    feed.connected = False
+    controller, fetched, _ = make_controller(['AAPL'], clock, feed)
+    run_until(controller, clock, 2000)
+    assert fetched == []
+    assert controller.failovers == 0
+
+
+def test_recovery_is_not_delayed_by_a_stretched_interval():
+    clock = FakeClock()
+    feed = Feed(clock)
+    feed.connected = False
+    symbols = [f"SYM{i}" for i in range(10_000)]
+    controller, fetched, _ = make_controller(symbols, clock, feed, fast_interval=5, rate_limit=180, recover_after=10,
+                                             requests_for=lambda batch: -(-len(batch) // 200))
+
+    def timeline(now):
+        if now >= 1020:
+            feed.connected = True
+            feed.last_message_at = now
+
+    run_until(controller, clock, 1200, during=timeline)
+    started, seconds = controller.periods[0]
+    # Healthy from 1020: recovered within recover_after plus one check, not 2 x the 16.7s polling interval
+    assert started + seconds <= 1020 + 10 + 5
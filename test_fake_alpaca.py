@@ -0,0 +1,100 @@
+import asyncio
+import contextlib
+
+from alerts import AlertEngine
+from cooldown import CooldownStore
+from fake_alpaca import DiscordSink, FakeAlpacaServer, base_price
+from level_index import LevelBook
+from stream import AlpacaStream
+from tick_pipeline import TickPipeline, decode_frame
+
+
+def test_ingest_path_alerts_through_fake_stream_and_survives_reconnect():
+    symbols = ['AAPL', 'MSFT', 'TSLA']
+
+    async def scenario():
+        book = LevelBook(0.01)
+        for symbol in symbols:
+            price = base_price(symbol)
+            book.arm(symbol, {'Pivot': price, 'R1': price * 1.002, 'S1': price * 0.998})
+        sink = DiscordSink()
+        engine = AlertEngine(book, CooldownStore(0.05), sink)
+        pipeline = TickPipeline(book, set(symbols), engine.on_hit)
+
+        async with FakeAlpacaServer(symbols, rate=3000, api_key='key', api_secret='secret') as server:
+            stream = AlpacaStream('key', 'secret', symbols, pipeline.feed, url=server.url,
+                                  base_delay=0.01, max_delay=0.05)
+            task = asyncio.create_task(stream.run())
+            while len(sink.alerts) < 5:
+                await asyncio.sleep(0.01)
+            await server.drop_connections()
+            before = pipeline.messages
+            while pipeline.messages <= before + 100 or not stream.connected:
+                await asyncio.sleep(0.01)
+            await stream.stop()
+            await task
+        return server, stream, sink
+
+    server, stream, sink = asyncio.run(asyncio.wait_for(scenario(), 10))
+    assert server.connections == 2
+    assert stream.reconnects == 1
+    assert [m['action'] for m in server.subscription_messages] == ['subscribe', 'subscribe']
+    assert {alert.symbol for _, alert in sink.alerts} <= set(symbols)
+    assert all(latency >= 0 for latency in sink.latencies())
+
+
+def test_rejects_bad_credentials():
+    async def scenario():
+        async with FakeAlpacaServer(['AAPL'], api_key='key', api_secret='secret') as server:
+            stream = AlpacaStream('key', 'wrong', ['AAPL'], lambda raw: None, url=server.url,
+                                  base_delay=10)
+            task = asyncio.create_task(stream.run())
+            while stream.reconnects == 0:
+                await asyncio.sleep(0.01)
+            await stream.stop()
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+            return stream
+
+    stream = asyncio.run(asyncio.wait_for(scenario(), 5))
+    assert not stream.connected
+
+
+def test_live_subscription_changes_with_thousands_of_symbols():
+    universe = [f"SYM{i}" for i in range(5000)]
+    initial, added, removed = universe[:3000], universe[3000:], universe[:1000]
+
+    async def scenario():
+        acks = []
+        quoted = set()
+
+        def on_frame(raw):
+            for msg in decode_frame(raw):
+                if msg['T'] == 'subscription':
+                    acks.append(set(msg['quotes']))
+                elif msg['T'] == 'q':
+                    quoted.add(msg['S'])
+
+        async with FakeAlpacaServer(universe, rate=20000) as server:
+            stream = AlpacaStream('key', 'secret', initial, on_frame, url=server.url)
+            task = asyncio.create_task(stream.run())
+            while len(acks) < 3:
+                await asyncio.sleep(0.01)
+
+            assert await stream.subscribe(added + initial[:10]) == added
+            assert await stream.unsubscribe(removed + ['NOPE']) == removed
+            while len(acks) < 3 + 2 + 1:
+                await asyncio.sleep(0.01)
+            quoted.clear()
+            while not quoted & set(added):
+                await asyncio.sleep(0.01)
+            await stream.stop()
+            await task
+        return server, stream, acks, quoted
+
+    server, stream, acks, quoted = asyncio.run(asyncio.wait_for(scenario(), 20))
+    assert [len(m['quotes']) for m in server.subscription_messages] == [1000] * 3 + [1000] * 2 + [1000]
+    assert [m['action'] for m in server.subscription_messages][-1] == 'unsubscribe'
+    assert acks[-1] == set(universe[1000:]) == set(stream.symbols)
+    assert not quoted & set(removed)
@@ -1,14 +1,16 @@
+import asyncio
 import os
 import sys
 import requests
-from datetime import datetime, timedelta
 from dotenv import load_dotenv
 import pandas as pd
+from trading_calendar import CALENDAR_CACHE, load_calendar, market_today
 
 load_dotenv()
 
 API_KEY = os.getenv('ALPACA_API_KEY')
 API_SECRET = os.getenv('ALPACA_API_SECRET')
+BASE_URL = os.getenv('ALPACA_BASE_URL', 'https://paper-api.alpaca.markets/v2')
 DATA_URL = 'https://data.alpaca.markets/v2'
 
 if len(sys.argv) < 2:
@@ -17,17 +19,9 @@ if len(sys.argv) < 2:
 
 ticker = sys.argv[1].upper()
 
-# Helper: Find last trading day (skip weekends)
-def get_last_trading_day():
-    today = datetime.utcnow().date()
-    offset = 1
-    while True:
-        candidate = today - timedelta(days=offset)
-        if candidate.weekday() < 5:  # Mon-Fri are 0-4
-            return candidate
-        offset += 1
-
-last_trading_day = get_last_trading_day()
+# Last exchange session before today, skipping weekends and holidays
+calendar = asyncio.run(load_calendar(API_KEY, API_SECRET, BASE_URL, os.getenv('CALENDAR_CACHE', CALENDAR_CACHE)))
+last_trading_day = calendar.previous_session(market_today())
 
 headers = {
     'APCA-API-KEY-ID': API_KEY,
@@ -0,0 +1,59 @@
+from level_index import LevelBook, LevelIndex
+
+LEVELS = {'Pivot': 100.0, 'R1': 110.0, 'S1': 90.0, 'R2': 120.0, 'S2': 80.0, 'R3': 140.0, 'S3': 60.0}
+
+
+def test_proximity_picks_closest_level_within_threshold():
+    # Same scenario as test_pivot_logic.py: R1 is the closest level to 58.21
+    labu = {'Pivot': 60.00, 'R1': 58.50, 'S1': 61.50, 'R2': 57.00, 'S2': 63.00, 'R3': 55.50, 'S3': 64.50}
+    hit = LevelIndex(labu, 0.3).check(58.21)
+    assert hit.name == 'R1'
+    assert hit.direction == 'up'
+    assert not hit.crossed
+
+
+def test_no_hit_outside_threshold_and_band_is_cached():
+    index = LevelIndex(LEVELS, 0.5)
+    assert index.check(104.0) is None
+    assert (index.band_low, index.band_high) == (100.5, 109.5)
+    assert index.check(109.4) is None
+    assert index.check(109.6).name == 'R1'
+
+
+def test_band_is_open_ended_beyond_outer_levels():
+    index = LevelIndex(LEVELS, 0.5)
+    index.check(200.0)
+    assert index.band_low == 140.5
+    assert index.band_high == float('inf')
+
+
+def test_jump_over_threshold_window_reports_a_cross():
+    index = LevelIndex(LEVELS, 0.01)
+    assert index.check(105.0) is None
+    hit = index.check(112.0)
+    assert (hit.name, hit.direction, hit.crossed) == ('R1', 'up', True)
+    hit = index.check(85.0)
+    # Crossed R1, Pivot and S1 on the way down; the alert names the level nearest to the price
+    assert (hit.name, hit.direction, hit.crossed) == ('S1', 'down', True)
+
+
+def test_cross_down_reports_nearest_crossed_level():
+    index = LevelIndex(LEVELS, 0.01)
+    index.check(115.0)
+    hit = index.check(95.0)
+    assert (hit.name, hit.direction, hit.crossed) == ('Pivot', 'down', True)
+
+
+def test_first_tick_never_reports_a_cross():
+    index = LevelIndex(LEVELS, 0.01)
+    assert index.check(125.0) is None
+
+
+def test_book_ignores_unarmed_symbols_and_rearm_resets_history():
+    book = LevelBook(0.01)
+    assert book.check('AAPL', 100.0) is None
+    book.arm('AAPL', LEVELS)
+    assert 'AAPL' in book
+    book.check('AAPL', 105.0)
+    book.arm('AAPL', LEVELS)
+    assert book.check('AAPL', 115.0) is None
@@ -0,0 +1,109 @@
+import asyncio
+
+from aiohttp import web
+
+from market_data import AlpacaDataClient, snapshot_price
+
+
+async def _run_bulk_fetch(symbols, symbols_per_request, page_size):
+    requests_seen = []
+
+    async def bars_handler(request):
+        requests_seen.append(dict(request.query))
+        symbols_in_request = request.query['symbols'].split(',')
+        offset = int(request.query.get('page_token', '0'))
+        page = symbols_in_request[offset:offset + page_size]
+        body = {'bars': {s: [{'h': 11.0, 'l': 9.0, 'c': 10.0}] for s in page}}
+        if offset + page_size < len(symbols_in_request):
+            body['next_page_token'] = str(offset + page_size)
+        return web.json_response(body)
+
+    app = web.Application()
+    app.router.add_get('/v2/stocks/bars', bars_handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    try:
+        async with AlpacaDataClient('key', 'secret', f'http://127.0.0.1:{port}/v2',
+                                    symbols_per_request=symbols_per_request) as client:
+            bars = await client.get_bars(symbols, '1Day', '2024-01-02', '2024-01-02')
+            return bars, client.request_count, requests_seen
+    finally:
+        await runner.cleanup()
+
+
+def test_bulk_fetch_follows_pagination_across_chunks():
+    symbols = [f"SYM{i}" for i in range(1000)]
+    bars, request_count, requests_seen = asyncio.run(_run_bulk_fetch(symbols, 200, 150))
+
+    assert set(bars) == set(symbols)
+    assert bars['SYM42'] == [{'h': 11.0, 'l': 9.0, 'c': 10.0}]
+    # 5 chunks of 200 symbols, each needing 2 pages of at most 150 symbols
+    assert request_count == 10
+    assert all(q['timeframe'] == '1Day' for q in requests_seen)
+
+
+def test_snapshots_are_fetched_in_symbol_chunks():
+    async def run(symbols):
+        requests_seen = []
+
+        async def snapshots_handler(request):
+            requests_seen.append(request.query['symbols'])
+            return web.json_response({s: {'latestTrade': {'p': 100.0}} if s != 'SYM3' else
+                                      {'latestTrade': None, 'minuteBar': {'c': 99.5}}
+                                      for s in request.query['symbols'].split(',') if s != 'SYM7'})
+
+        app = web.Application()
+        app.router.add_get('/v2/stocks/snapshots', snapshots_handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            async with AlpacaDataClient('key', 'secret', f'http://127.0.0.1:{port}/v2',
+                                        symbols_per_request=200) as client:
+                return await client.get_snapshots(symbols), requests_seen
+        finally:
+            await runner.cleanup()
+
+    symbols = [f"SYM{i}" for i in range(450)]
+    snapshots, requests_seen = asyncio.run(run(symbols))
+
+    assert len(requests_seen) == 3
+    assert len(snapshots) == 449 and 'SYM7' not in snapshots
+    assert snapshot_price(snapshots['SYM1']) == 100.0
+    assert snapshot_price(snapshots['SYM3']) == 99.5
+
+
+def test_latest_trades_are_batched_and_report_each_request():
+    async def run(symbols):
+        calls = []
+
+        async def latest_handler(request):
+            return web.json_response({'trades': {s: {'p': 10.0, 's': 100}
+                                                 for s in request.query['symbols'].split(',') if s != 'SYM0'}})
+
+        app = web.Application()
+        app.router.add_get('/v2/stocks/trades/latest', latest_handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            async with AlpacaDataClient('key', 'secret', f'http://127.0.0.1:{port}/v2', symbols_per_request=100,
+                                        on_request=lambda path, seconds, status: calls.append((path, status))) as client:
+                return await client.get_latest_trades(symbols), client.requests_for(symbols), calls
+        finally:
+            await runner.cleanup()
+
+    symbols = [f"SYM{i}" for i in range(250)]
+    trades, expected_requests, calls = asyncio.run(run(symbols))
+
+    assert len(trades) == 249 and 'SYM0' not in trades
+    assert expected_requests == 3
+    assert calls == [('/stocks/trades/latest', 200)] * 3
@@ -0,0 +1,58 @@
+import asyncio
+
+import aiohttp
+
+from metrics import Registry, start_metrics_server
+
+
+def test_render_prometheus_text_format():
+    registry = Registry()
+    errors = registry.counter('rest_errors_total', 'REST errors')
+    latency = registry.histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0))
+    registry.gauge_func('queue_depth', 'Queue depth', lambda: 3)
+    registry.gauge_func('unknown', 'Not known yet', lambda: None)
+
+    errors.inc(endpoint='/stocks/bars')
+    errors.inc(2, endpoint='/stocks/bars')
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value)
+
+    text = registry.render()
+    assert '# TYPE pivotbot_rest_errors_total counter' in text
+    assert 'pivotbot_rest_errors_total{endpoint="/stocks/bars"} 3' in text
+    assert 'pivotbot_latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'pivotbot_latency_seconds_bucket{le="1.0"} 2' in text
+    assert 'pivotbot_latency_seconds_bucket{le="+Inf"} 3' in text
+    assert 'pivotbot_latency_seconds_sum 5.55' in text
+    assert 'pivotbot_latency_seconds_count 3' in text
+    assert 'pivotbot_queue_depth 3' in text
+    assert '\npivotbot_unknown ' not in text
+    assert errors.total() == 3 and latency.total_count() == 3
+
+
+def test_http_endpoints_and_readiness():
+    registry = Registry()
+    registry.gauge_func('up', 'Up', lambda: 1)
+    state = {'ready': (True, 'ok')}
+
+    async def scenario():
+        runner = await start_metrics_server(registry, host='127.0.0.1', port=0, ready=lambda: state['ready'])
+        port = runner.addresses[0][1]
+        results = []
+        try:
+            async with aiohttp.ClientSession() as session:
+                for path in ('/metrics', '/healthz', '/ready'):
+                    async with session.get(f"http://127.0.0.1:{port}{path}") as response:
+                        results.append((response.status, await response.text()))
+                state['ready'] = (False, 'market data stream stale (45s)')
+                async with session.get(f"http://127.0.0.1:{port}/ready") as response:
+                    results.append((response.status, await response.text()))
+        finally:
+            await runner.cleanup()
+        return results
+
+    metrics_page, health, ready, stale = asyncio.run(asyncio.wait_for(scenario(), 10))
+    assert metrics_page[0] == 200 and 'pivotbot_up 1' in metrics_page[1]
+    assert health == (200, 'ok\n')
+    assert ready == (200, 'ok\n')
+    assert stale == (503, 'market data stream stale (45s)\n')
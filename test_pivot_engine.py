@@ -0,0 +1,50 @@
+import math
+
+import numpy as np
+import pytest
+
+from pivot_engine import LEVEL_NAMES, PIVOT_METHODS, compute_pivots, levels_to_dict
+
+
+def test_traditional_matches_scalar_formula():
+    levels = levels_to_dict(compute_pivots([110.0], [90.0], [100.0])[0])
+    assert levels == pytest.approx({
+        'Pivot': 100.0, 'R1': 110.0, 'S1': 90.0,
+        'R2': 120.0, 'S2': 80.0, 'R3': 140.0, 'S3': 60.0
+    })
+
+
+def test_every_method_is_vectorized_over_symbols():
+    high = np.array([110.0, 55.0, 12.0])
+    low = np.array([90.0, 45.0, 10.0])
+    close = np.array([100.0, 52.0, 11.5])
+    open_ = np.array([95.0, 52.0, 11.9])
+    for method in PIVOT_METHODS:
+        levels = compute_pivots(high, low, close, method, open_)
+        assert levels.shape == (3, len(LEVEL_NAMES))
+        for i in range(3):
+            single = compute_pivots(high[i:i + 1], low[i:i + 1], close[i:i + 1], method, open_[i:i + 1])
+            np.testing.assert_allclose(levels[i], single[0])
+
+
+def test_camarilla_and_fibonacci_levels():
+    fib = levels_to_dict(compute_pivots([110.0], [90.0], [100.0], 'fibonacci')[0])
+    assert fib['R1'] == pytest.approx(107.64)
+    assert fib['S3'] == pytest.approx(80.0)
+    cam = levels_to_dict(compute_pivots([110.0], [90.0], [100.0], 'camarilla')[0])
+    assert cam['R3'] == pytest.approx(105.5)
+    assert cam['S1'] == pytest.approx(100.0 - 22.0 / 12)
+
+
+def test_demark_depends_on_open_and_only_defines_first_levels():
+    up_day = compute_pivots([110.0], [90.0], [105.0], 'demark', [95.0])[0]
+    assert up_day[0] == pytest.approx((2 * 110 + 90 + 105) / 4)
+    assert all(math.isnan(v) for v in up_day[3:])
+    assert set(levels_to_dict(up_day)) == {'Pivot', 'R1', 'S1'}
+    with pytest.raises(ValueError):
+        compute_pivots([110.0], [90.0], [105.0], 'demark')
+
+
+def test_unknown_method_is_rejected():
+    with pytest.raises(ValueError):
+        compute_pivots([1.0], [1.0], [1.0], 'bogus')
@@ -0,0 +1,107 @@
+import asyncio
+
+from pivot_loader import PivotLoader
+
+LEVELS = {'Pivot': 100.0, 'R1': 110.0, 'S1': 90.0}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_tick_burst_triggers_one_bulk_load_and_rechecks_latest_price():
+    calls = []
+    rechecked = []
+
+    async def load(symbols):
+        calls.append(list(symbols))
+        await asyncio.sleep(0.01)
+        return {s: LEVELS for s in symbols if s != 'NODATA'}
+
+    loader = PivotLoader(load, lambda: '2024-01-02', on_loaded=lambda s, p: rechecked.append((s, p)),
+                         batch_window=0.01)
+
+    async def scenario():
+        for i in range(1000):
+            loader.request('AAPL', 100.0 + i)
+            loader.request('MSFT', 300.0)
+            loader.request('NODATA', 1.0)
+        assert await loader.get('AAPL') == LEVELS
+        assert await loader.get('NODATA') is None
+
+    asyncio.run(scenario())
+    assert calls == [['AAPL', 'MSFT', 'NODATA']]
+    assert sorted(rechecked) == [('AAPL', 1099.0), ('MSFT', 300.0)]
+    assert loader.stats()['in_flight'] == 0
+
+
+def test_symbols_without_data_are_negative_cached_until_ttl_or_new_day():
+    clock = FakeClock()
+    day = ['2024-01-02']
+    calls = []
+
+    async def load(symbols):
+        calls.append(list(symbols))
+        return {}
+
+    loader = PivotLoader(load, lambda: day[0], batch_window=0, negative_ttl=60, clock=clock)
+
+    async def scenario():
+        assert await loader.get('NODATA') is None
+        loader.request('NODATA', 1.0)
+        assert await loader.get('NODATA') is None
+        clock.now = 61
+        assert await loader.get('NODATA') is None
+        day[0] = '2024-01-03'
+        assert await loader.get('NODATA') is None
+
+    asyncio.run(scenario())
+    assert len(calls) == 3
+    assert loader.stats()['negative_hits'] == 2
+
+
+def test_load_errors_back_off_briefly():
+    calls = []
+
+    async def load(symbols):
+        calls.append(list(symbols))
+        if len(calls) == 1:
+            raise RuntimeError("API down")
+        return {s: LEVELS for s in symbols}
+
+    clock = FakeClock()
+    loader = PivotLoader(load, lambda: '2024-01-02', batch_window=0, error_ttl=30, clock=clock)
+
+    async def scenario():
+        assert await loader.get('AAPL') is None
+        assert await loader.get('AAPL') is None
+        clock.now = 30
+        assert await loader.get('AAPL') == LEVELS
+
+    asyncio.run(scenario())
+    assert len(calls) == 2 and loader.stats()['failures'] == 1
+
+
+def test_day_rollover_inside_the_batch_window_resolves_every_request():
+    day = ['2024-01-02']
+    calls = []
+
+    async def load(symbols):
+        calls.append(list(symbols))
+        return {s: LEVELS for s in symbols}
+
+    loader = PivotLoader(load, lambda: day[0], batch_window=0.01)
+
+    async def scenario():
+        before = asyncio.create_task(loader.get('AAPL'))
+        await asyncio.sleep(0)
+        day[0] = '2024-01-03'
+        after = asyncio.create_task(loader.get('MSFT'))
+        return await asyncio.wait_for(asyncio.gather(before, after), 1)
+
+    assert asyncio.run(scenario()) == [LEVELS, LEVELS]
+    assert calls == [['AAPL'], ['MSFT']] and loader.stats()['in_flight'] == 0
@@ -0,0 +1,35 @@
+import time
+
+from pivot_store import PivotStore
+
+
+def test_round_trip_is_keyed_by_day_and_method(tmp_path):
+    store = PivotStore(str(tmp_path / 'pivots.db'))
+    store.put_many('2024-01-02', 'traditional', {'AAPL': {'Pivot': 10.0, 'R1': 11.0, 'S1': 9.0}})
+    store.put_many('2024-01-02', 'demark', {'AAPL': {'Pivot': 10.5, 'R1': 11.5, 'S1': 9.5}})
+    store.put_many('2024-01-03', 'traditional', {'AAPL': {'Pivot': 12.0}, 'MSFT': {'Pivot': 300.0}})
+
+    assert store.get_many('2024-01-02', 'traditional') == {'AAPL': {'Pivot': 10.0, 'R1': 11.0, 'S1': 9.0}}
+    assert store.get_many('2024-01-02', 'demark')['AAPL']['Pivot'] == 10.5
+    assert store.get_many('2024-01-03', 'traditional', ['MSFT', 'TSLA']) == {'MSFT': {'Pivot': 300.0}}
+
+    assert store.prune('2024-01-03') == 2
+    assert store.get_many('2024-01-02', 'traditional') == {}
+    store.close()
+
+
+def test_warm_start_reads_thousands_of_symbols_in_milliseconds(tmp_path):
+    path = str(tmp_path / 'pivots.db')
+    levels = {'Pivot': 100.0, 'R1': 101.0, 'S1': 99.0, 'R2': 102.0, 'S2': 98.0, 'R3': 103.0, 'S3': 97.0}
+    store = PivotStore(path)
+    store.put_many('2024-01-02', 'traditional', {f"SYM{i}": levels for i in range(5000)})
+    store.close()
+
+    started = time.perf_counter()
+    store = PivotStore(path)
+    cached = store.get_many('2024-01-02', 'traditional')
+    elapsed = time.perf_counter() - started
+    store.close()
+
+    assert len(cached) == 5000 and cached['SYM42'] == levels
+    assert elapsed < 0.5
@@ -0,0 +1,68 @@
+from datetime import date
+
+import numpy as np
+
+from level_index import LevelBook, LevelIndex
+from pivot_engine import compute_pivots, levels_to_dict
+from pivot_table import PivotTable
+
+LEVELS = {'Pivot': 100.0, 'R1': 110.0, 'S1': 90.0, 'R2': 120.0, 'S2': 80.0, 'R3': 140.0, 'S3': 60.0}
+
+
+def test_put_get_and_remove():
+    table = PivotTable(capacity=2)
+    table.put_many({'AAPL': {'1Day': LEVELS}, 'MSFT': {'1Day': {'Pivot': 50.0, 'R1': 51.0, 'S1': 49.0}}}, '2024-01-02')
+    table.put('TSLA', {'1Day': LEVELS}, date(2024, 1, 3))  # grows past capacity
+    assert table.get('AAPL') == {'1Day': LEVELS}
+    assert table.get('MSFT') == {'1Day': {'Pivot': 50.0, 'R1': 51.0, 'S1': 49.0}}
+    assert table.day('TSLA') == date(2024, 1, 3)
+    assert len(table) == 3 and 'AAPL' in table and 'NVDA' not in table
+    assert table.get('NVDA') is None
+
+    table.remove('MSFT')
+    assert 'MSFT' not in table
+    assert table.symbols() == ['AAPL', 'TSLA']
+    assert [symbol for symbol, _ in table.items()] == ['AAPL', 'TSLA']
+
+
+def test_row_is_a_view_and_memory_is_compact():
+    table = PivotTable(capacity=10_000)
+    table.put('AAPL', {'1Day': LEVELS}, '2024-01-02')
+    row = table.row('AAPL')
+    assert np.shares_memory(row, table.values)
+    table.put('AAPL', {'1Day': {**LEVELS, 'Pivot': 101.0}}, '2024-01-03')
+    assert row[0] == 101.0
+    assert table.nbytes <= 600_000
+
+
+def test_level_index_from_row_matches_dict_form():
+    levels = compute_pivots([105.0, 105.0], [95.0, 95.0], [100.0, 97.0], 'demark', [99.0, 99.0])
+    for row in levels:
+        from_dict = LevelIndex(levels_to_dict(row), 0.5)
+        from_row = LevelIndex.from_row(row, 0.5)
+        assert from_row.names == from_dict.names
+        assert from_row.values == from_dict.values
+
+    table = PivotTable()
+    table.put('AAPL', {'1Day': LEVELS}, '2024-01-02')
+    book = LevelBook(0.5)
+    book.arm_row('AAPL', table.row('AAPL'))
+    assert book.check('AAPL', 100.2).name == 'Pivot'
+
+
+def test_timeframes_share_one_row_and_one_lookup():
+    timeframes = ('1Day', '1Week', '1Month')
+    table = PivotTable(timeframes=timeframes)
+    weekly = {'Pivot': 105.0, 'R1': 125.0, 'S1': 85.0}
+    table.put('AAPL', {'1Day': LEVELS, '1Week': weekly}, '2024-01-05')
+    assert table.row('AAPL').shape == (21,)
+    assert table.get('AAPL') == {'1Day': LEVELS, '1Week': weekly}
+
+    book = LevelBook(0.5)
+    book.arm_row('AAPL', table.row('AAPL'), timeframes)
+    assert len(book.get('AAPL').values) == 10
+    hit = book.check('AAPL', 104.8)
+    assert (hit.name, hit.timeframe, hit.crossed) == ('Pivot', '1Week', False)
+    hit = book.check('AAPL', 99.0)
+    assert (hit.name, hit.timeframe, hit.crossed) == ('Pivot', '1Day', True)
+
@@ -0,0 +1,43 @@
+import json
+
+from level_index import LevelBook
+from price_cache import PriceCache
+from tick_pipeline import TickPipeline
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_fresh_and_stale_split_by_age():
+    clock = FakeClock()
+    cache = PriceCache(capacity=2, clock=clock)
+    cache.update_many({'AAPL': 190.5, 'MSFT': 410.0, 'TSLA': 250.0}, {'AAPL': '2024-01-02T15:30:00Z'})
+    clock.now += 30
+    cache.update('MSFT', 411.0)
+
+    assert cache.fresh(['AAPL', 'MSFT', 'NVDA'], max_age=10) == {'MSFT': 411.0}
+    assert cache.stale(['AAPL', 'MSFT', 'NVDA'], max_age=10) == ['AAPL', 'NVDA']
+    assert cache.get('AAPL') == (190.5, 30.0, '2024-01-02T15:30:00Z')
+    assert cache.get('NVDA') is None
+    assert len(cache) == 3 and cache.updates == 4
+
+
+def test_pipeline_feeds_cache_for_armed_and_unarmed_symbols():
+    clock = FakeClock()
+    cache = PriceCache(clock=clock)
+    book = LevelBook(0.05)
+    book.arm('AAPL', {'Pivot': 100.0})
+    pipeline = TickPipeline(book, {'AAPL', 'MSFT'}, lambda *args: None, price_cache=cache, clock=clock)
+
+    pipeline.feed(json.dumps([
+        {'T': 'q', 'S': 'AAPL', 'bp': 120.0, 'ap': 120.2, 't': '2024-01-02T15:30:00Z'},
+        {'T': 't', 'S': 'MSFT', 'p': 410.0, 't': '2024-01-02T15:30:01Z'},
+        {'T': 't', 'S': 'TSLA', 'p': 250.0},
+    ]))
+
+    assert cache.fresh(['AAPL', 'MSFT', 'TSLA'], max_age=1) == {'AAPL': 120.1, 'MSFT': 410.0}
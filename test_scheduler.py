@@ -0,0 +1,127 @@
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+
+from scheduler import SessionScheduler
+from trading_calendar import TradingCalendar
+
+# Thu 2024-11-28 is Thanksgiving; Fri 2024-11-29 closes at 13:00 ET
+CALENDAR = TradingCalendar.from_alpaca(
+    [{'date': d, 'open': '09:30', 'close': '13:00' if d == '2024-11-29' else '16:00'}
+     for d in ('2024-11-25', '2024-11-26', '2024-11-27', '2024-11-29', '2024-12-02', '2024-12-03')],
+    date(2024, 11, 20), date(2024, 12, 10))
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc).timestamp()
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.now += seconds
+        await asyncio.sleep(0)
+
+
+def run_until(scheduler, clock, end):
+    async def scenario():
+        task = asyncio.create_task(scheduler.run())
+        while clock.now < end:
+            await asyncio.sleep(0)
+        task.cancel()
+    asyncio.run(scenario())
+
+
+def test_jobs_follow_sessions_holidays_and_early_closes(tmp_path):
+    clock = FakeClock(utc(2024, 11, 27, 12, 0))  # Wed 07:00 ET
+    runs = []
+
+    def job(name):
+        async def run():
+            runs.append((name, datetime.fromtimestamp(clock.now, timezone.utc)))
+        return run
+
+    scheduler = SessionScheduler(lambda: CALENDAR, str(tmp_path / 'state.json'), clock=clock, sleep=clock.sleep)
+    scheduler.at_open('preopen', job('preopen'), timedelta(minutes=-30))
+    scheduler.at_close('postclose', job('postclose'), timedelta(minutes=20))
+    scheduler.on_closed_days('closed', job('closed'))
+    run_until(scheduler, clock, utc(2024, 12, 2, 23, 0))
+
+    # The first three runs are catch-ups for occurrences missed before "startup"
+    assert [name for name, _ in runs[:3]] == ['preopen', 'postclose', 'closed']
+    assert [(name, at.strftime('%a %H:%M')) for name, at in runs[3:]] == [
+        ('preopen', 'Wed 14:00'),
+        ('postclose', 'Wed 21:20'),
+        ('closed', 'Thu 17:00'),
+        ('preopen', 'Fri 14:00'),
+        ('postclose', 'Fri 18:20'),  # early close
+        ('closed', 'Sat 17:00'),
+        ('closed', 'Sun 17:00'),
+        ('preopen', 'Mon 14:00'),
+        ('postclose', 'Mon 21:20'),
+    ]
+    stats = scheduler.stats()
+    assert stats['preopen']['runs'] == 4 and stats['preopen']['failures'] == 0
+
+
+def test_catch_up_uses_persisted_last_run(tmp_path):
+    state = str(tmp_path / 'state.json')
+    clock = FakeClock(utc(2024, 11, 26, 14, 30))  # Tue 09:30 ET, pre-open already due at 09:00
+    runs = []
+
+    async def preopen():
+        runs.append(clock.now)
+        if len(runs) == 1:
+            raise RuntimeError("boom")
+
+    scheduler = SessionScheduler(lambda: CALENDAR, state, clock=clock, sleep=clock.sleep)
+    scheduler.at_open('preopen', preopen, timedelta(minutes=-30))
+    run_until(scheduler, clock, clock.now + 600)
+    # The failed catch-up is retried a minute later
+    assert runs == [utc(2024, 11, 26, 14, 30), utc(2024, 11, 26, 14, 31)]
+    assert scheduler.stats()['preopen']['failures'] == 1
+
+    # Restarting later the same day: the missed run already happened, nothing to catch up
+    clock.now = utc(2024, 11, 26, 16, 0)
+    restarted = SessionScheduler(lambda: CALENDAR, state, clock=clock, sleep=clock.sleep)
+    restarted.at_open('preopen', preopen, timedelta(minutes=-30))
+    restarted.start()
+    assert restarted.jobs[0].next_at == utc(2024, 11, 27, 14, 0)
+
+
+def test_failed_runs_retry_with_backoff_and_are_caught_up_after_restart(tmp_path):
+    state = str(tmp_path / 'state.json')
+    clock = FakeClock(utc(2024, 11, 26, 14, 30))
+    runs = []
+
+    async def preopen():
+        runs.append(clock.now)
+        raise RuntimeError("Alpaca is down")
+
+    scheduler = SessionScheduler(lambda: CALENDAR, state, clock=clock, sleep=clock.sleep, max_retries=2)
+    scheduler.at_open('preopen', preopen, timedelta(minutes=-30))
+    run_until(scheduler, clock, utc(2024, 11, 26, 20, 0))
+    start = utc(2024, 11, 26, 14, 30)
+    assert runs == [start, start + 60, start + 180]  # then it waits for the next session
+    assert scheduler.jobs[0].next_at == utc(2024, 11, 27, 14, 0) and scheduler.stats()['preopen']['last_run'] is None
+
+    restarted = SessionScheduler(lambda: CALENDAR, state, clock=clock, sleep=clock.sleep)
+    restarted.at_open('preopen', preopen, timedelta(minutes=-30))
+    restarted.start()
+    assert restarted.jobs[0].next_at == clock.now
+
+
+def test_jitter_delays_runs():
+    clock = FakeClock(utc(2024, 11, 26, 12, 0))
+
+    async def noop():
+        pass
+
+    scheduler = SessionScheduler(lambda: CALENDAR, clock=clock, sleep=clock.sleep, rng=lambda: 0.5)
+    scheduler.at_open('preopen', noop, timedelta(minutes=-30), jitter=60, catch_up=False)
+    scheduler.start()
+    assert scheduler.jobs[0].next_at == utc(2024, 11, 26, 14, 0) + 30
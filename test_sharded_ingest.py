@@ -0,0 +1,87 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+from fake_alpaca import FakeAlpacaServer, base_price
+from pivot_engine import levels_to_row
+from sharded_ingest import ShardedIngest, shard_of
+
+
+def levels_near(symbol):
+    price = base_price(symbol)
+    return levels_to_row({'Pivot': price, 'R1': price * 1.002, 'S1': price * 0.998})
+
+
+def test_shard_of_is_stable_and_spreads_symbols():
+    symbols = [f"SYM{i}" for i in range(1000)]
+    shards = [shard_of(s, 4) for s in symbols]
+    assert shards == [shard_of(s, 4) for s in symbols]
+    assert all(200 < shards.count(n) < 300 for n in range(4))
+
+
+def test_workers_stream_alert_and_request_missing_pivots():
+    symbols = ['AAPL', 'MSFT', 'TSLA', 'NVDA', 'AMD', 'META']
+    armed = symbols[:-1]
+
+    async def scenario():
+        alerts = []
+        prices = {}
+        ingest = None
+
+        def on_unarmed(symbol, price):
+            unarmed.append(symbol)
+            ingest.arm({symbol: levels_near(symbol)})
+
+        unarmed = []
+        async with FakeAlpacaServer(symbols, rate=3000, api_key='key', api_secret='secret') as server:
+            ingest = ShardedIngest(2, 'key', 'secret', symbols, server.url, 0.01, cooldown=0.05,
+                                   on_alert=alerts.append, on_unarmed=on_unarmed, on_prices=prices.update,
+                                   stats_interval=0.1)
+            ingest.arm({s: levels_near(s) for s in armed})
+            task = asyncio.create_task(ingest.run())
+            while {a.symbol for a in alerts} != set(symbols) or not ingest.connected:
+                await asyncio.sleep(0.05)
+            await ingest.stop()
+            await task
+        return ingest, alerts, unarmed, prices, server
+
+    ingest, alerts, unarmed, prices, server = asyncio.run(asyncio.wait_for(scenario(), 60))
+    assert server.connections == 2
+    assert unarmed[0] == 'META'
+    assert set(prices) == set(symbols)
+    stats = ingest.stats()
+    assert stats['symbols'] == len(symbols)
+    assert stats['armed'] == len(symbols)
+    assert stats['restarts'] == 0
+
+
+LAUNCHER = '''
+import asyncio, functools, sys
+with open(sys.argv[1] if __name__ == '__main__' else MARKER, 'a') as f:
+    f.write(__name__ + '\\n')
+from bench_sharded import shard_frames
+from sharded_ingest import ShardedIngest
+
+async def run():
+    ingest = ShardedIngest(1, None, None, ['AAPL', 'MSFT'], None, 0.01, cooldown=300, stats_interval=0.1,
+                           frame_source=functools.partial(shard_frames, 5))
+    await ingest.run()
+    await ingest.stop()
+    print(ingest.replayed[0][0])
+
+if __name__ == '__main__':
+    asyncio.run(run())
+'''
+
+
+def test_workers_do_not_rerun_the_launching_script(tmp_path):
+    marker = tmp_path / 'imports.txt'
+    script = tmp_path / 'launcher.py'
+    script.write_text(LAUNCHER.replace('MARKER', repr(str(marker))))
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, str(script), str(marker)], capture_output=True, text=True,
+                            env=env, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert int(result.stdout.split()[-1]) > 0  # the worker replayed its frames
+    assert marker.read_text().split() == ['__main__']
@@ -0,0 +1,123 @@
+import asyncio
+import json
+
+import websockets
+
+from stream import AlpacaStream
+
+
+def test_reconnects_resubscribes_and_reports_gap():
+    subscriptions = []
+    connections = 0
+
+    async def handler(ws, path=None):
+        nonlocal connections
+        connections += 1
+        await ws.send(json.dumps([{'T': 'success', 'msg': 'connected'}]))
+        auth = json.loads(await ws.recv())
+        assert auth['action'] == 'auth'
+        await ws.send(json.dumps([{'T': 'success', 'msg': 'authenticated'}]))
+        subscriptions.append(json.loads(await ws.recv()))
+        await ws.send(json.dumps([{'T': 'q', 'S': 'AAPL', 'bp': 1.0, 'ap': 1.1}]))
+        if connections == 1:
+            return  # drop the first connection
+        await ws.wait_closed()
+
+    async def scenario():
+        frames, gaps = [], []
+        async with websockets.serve(handler, '127.0.0.1', 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            stream = AlpacaStream('key', 'secret', ['AAPL', 'MSFT'], frames.append,
+                                  url=f'ws://127.0.0.1:{port}', on_gap=gaps.append,
+                                  base_delay=0.01, max_delay=0.05)
+            task = asyncio.create_task(stream.run())
+            while len(frames) < 2:
+                await asyncio.sleep(0.01)
+            await stream.stop()
+            await asyncio.wait_for(task, 1)
+        return stream, frames, gaps
+
+    stream, frames, gaps = asyncio.run(scenario())
+    assert connections == 2
+    assert subscriptions == [{'action': 'subscribe', 'quotes': ['AAPL', 'MSFT']}] * 2
+    assert stream.reconnects == 1
+    assert len(gaps) == 1 and gaps[0] >= 0
+
+
+def test_backoff_is_jittered_and_capped():
+    stream = AlpacaStream('key', 'secret', [], lambda raw: None, base_delay=1, max_delay=30)
+    stream._attempt = 50
+    delays = [stream.backoff_delay() for _ in range(200)]
+    assert all(0 <= d <= 30 for d in delays)
+    assert len(set(delays)) > 1
+
+
+def test_backoff_only_resets_after_a_stable_connection():
+    async def handler(ws, path=None):
+        await ws.recv()
+        await ws.send(json.dumps([{'T': 'success', 'msg': 'authenticated'}]))
+        await ws.recv()
+        # Accept the subscription, then drop at once like a connection-limit rejection
+
+    async def scenario(stable_after):
+        async with websockets.serve(handler, '127.0.0.1', 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            stream = AlpacaStream('key', 'secret', ['AAPL'], lambda raw: None, url=f'ws://127.0.0.1:{port}',
+                                  base_delay=0.001, max_delay=0.005, stable_after=stable_after)
+            task = asyncio.create_task(stream.run())
+            while stream.reconnects < 4:
+                await asyncio.sleep(0.005)
+            await stream.stop()
+            task.cancel()
+            return stream._attempt
+
+    assert asyncio.run(scenario(30.0)) >= 4
+    assert asyncio.run(scenario(0.0)) == 1
+
+
+def test_symbols_added_while_subscribing_are_sent():
+    sent = []
+    stream = None
+
+    class FakeSocket:
+        def __init__(self):
+            self.closed = asyncio.Event()
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        async def send(self, message):
+            sent.append(json.loads(message))
+            if len(sent) == 2:  # the first subscribe message is on the wire
+                await stream.subscribe(['TSLA'])
+                await stream.unsubscribe(['MSFT'])
+
+        async def recv(self):
+            return json.dumps([{'T': 'success', 'msg': 'authenticated'}])
+
+        async def close(self):
+            self.closed.set()
+
+        def __aiter__(self):
+            return self
+
+        async def __anext__(self):
+            await self.closed.wait()
+            raise StopAsyncIteration
+
+    async def scenario():
+        nonlocal stream
+        stream = AlpacaStream('key', 'secret', ['AAPL', 'MSFT'], lambda raw: None, connect=lambda url: FakeSocket())
+        task = asyncio.create_task(stream.run())
+        while not stream.connected:
+            await asyncio.sleep(0.001)
+        await stream.stop()
+        await asyncio.wait_for(task, 1)
+
+    asyncio.run(scenario())
+    assert sent[1:] == [{'action': 'subscribe', 'quotes': ['AAPL', 'MSFT']},
+                        {'action': 'subscribe', 'quotes': ['TSLA']},
+                        {'action': 'unsubscribe', 'quotes': ['MSFT']}]
@@ -0,0 +1,75 @@
+import json
+
+from alerts import AlertEngine
+from cooldown import CooldownStore
+from level_index import LevelBook
+from tick_history import Motion, TickHistory
+from tick_pipeline import TickPipeline
+
+
+def test_ring_keeps_spaced_samples_and_the_last_price():
+    history = TickHistory(capacity=1, depth=4, spacing=1.0)
+    for i in range(50):
+        history.record('AAPL', 100.0 + i, 1000.0 + i * 0.25)  # 4 ticks/second
+    history.record('MSFT', 50.0, 1000.0)  # grows past capacity
+    times, prices = history.samples('AAPL')
+    assert len(times) == 4
+    assert prices[-1] == 149.0 and times[-1] == 1012.25
+    assert all(b - a >= 1.0 for a, b in zip(times[:-2], times[1:-1]))
+    assert history.samples('AAPL', window=1.5)[0].tolist() == [1011.0, 1012.0, 1012.25]
+
+    size = history.nbytes
+    for i in range(1000):
+        history.record('AAPL', 100.0, 2000.0 + i)
+    assert history.nbytes == size
+    history.forget('AAPL')
+    assert history.motion('AAPL', 100.0) is None
+
+
+def test_motion_classifies_approach_bounce_and_break():
+    def motion(prices, level=100.0):
+        history = TickHistory(depth=16, spacing=1.0)
+        for i, price in enumerate(prices):
+            history.record('AAPL', price, float(i))
+        return history.motion('AAPL', level)
+
+    approach = motion([98.0, 99.0, 99.9])
+    assert approach.direction == 'up' and approach.action == 'approach'
+    assert abs(approach.velocity - 0.95) < 1e-9
+    assert motion([98.0, 99.95, 99.8]).action == 'bounce'
+    assert motion([102.0, 100.1, 99.9]).action == 'break'
+    assert motion([102.0, 99.5, 100.2]).action == 'bounce'
+
+
+def test_alerts_carry_motion_from_the_pipeline():
+    clock = [0.0]
+    history = TickHistory(spacing=1.0)
+    book = LevelBook(0.5)
+    book.arm('AAPL', {'Pivot': 100.0, 'R1': 110.0, 'S1': 90.0})
+    alerts = []
+    engine = AlertEngine(book, CooldownStore(300), alerts.append, history=history)
+    pipeline = TickPipeline(book, {'AAPL'}, engine.on_hit, history=history, clock=lambda: clock[0])
+    for second, price in enumerate([104.0, 103.0, 101.0, 100.2]):
+        clock[0] = float(second)
+        pipeline.feed(json.dumps([{'T': 't', 'S': 'AAPL', 'p': price}]))
+
+    (alert,) = alerts
+    assert (alert.level, alert.direction, alert.motion, alert.action) == ('Pivot', 'down', 'down', 'approach')
+    assert abs(alert.velocity - (100.2 - 104.0) / 3) < 1e-9
+
+
+def test_alert_direction_stays_the_side_of_the_level():
+    class RisingHistory:
+        def motion(self, symbol, level, window):
+            return Motion('up', 0.5, 'bounce')
+
+    book = LevelBook(0.5)
+    book.arm('AAPL', {'Pivot': 100.0, 'R1': 110.0, 'S1': 90.0})
+    alerts = []
+    engine = AlertEngine(book, CooldownStore(300), alerts.append, history=RisingHistory())
+    # Bouncing up off the pivot from above: the price is still above the level
+    engine.on_hit('AAPL', 100.3, book.check('AAPL', 100.3))
+    engine_without = AlertEngine(book, CooldownStore(300), alerts.append)
+    engine_without.on_hit('AAPL', 100.3, book.check('AAPL', 100.3))
+
+    assert [(a.direction, a.motion, a.action) for a in alerts] == [('down', 'up', 'bounce'), ('down', None, None)]
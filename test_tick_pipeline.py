@@ -0,0 +1,43 @@
+import json
+
+from level_index import LevelBook
+from tick_pipeline import TickPipeline, latest_prices
+
+LEVELS = {'Pivot': 100.0, 'R1': 110.0, 'S1': 90.0}
+
+
+def test_latest_prices_groups_by_symbol_and_filters():
+    messages = [
+        {'T': 'q', 'S': 'AAPL', 'bp': 99.0, 'ap': 101.0},
+        {'T': 't', 'S': 'AAPL', 'p': 102.0, 't': '2024-01-02T15:30:00.5Z'},
+        {'T': 'q', 'S': 'MSFT', 'bp': 0, 'ap': 50.0},
+        {'T': 't', 'S': 'TSLA', 'p': 10.0},
+        {'T': 'subscription', 'quotes': ['AAPL']},
+    ]
+    prices, times, control = latest_prices(messages, {'AAPL', 'MSFT'})
+    assert prices == {'AAPL': 102.0}
+    assert times == {'AAPL': '2024-01-02T15:30:00.5Z'}
+    assert control == [{'T': 'subscription', 'quotes': ['AAPL']}]
+
+
+def test_pipeline_routes_hits_unarmed_symbols_and_control_messages():
+    book = LevelBook(0.05)
+    book.arm('AAPL', LEVELS)
+    book.arm('MSFT', LEVELS)
+    hits, unarmed, control = [], [], []
+    pipeline = TickPipeline(book, {'AAPL', 'MSFT', 'TSLA'},
+                            lambda s, p, h, t: hits.append((s, h.name, h.crossed)),
+                            on_unarmed=lambda s, p: unarmed.append(s),
+                            on_control=control.append)
+
+    pipeline.feed(json.dumps([{'T': 'success', 'msg': 'authenticated'},
+                              {'T': 't', 'S': 'AAPL', 'p': 105.0},
+                              {'T': 't', 'S': 'MSFT', 'p': 90.02},
+                              {'T': 't', 'S': 'TSLA', 'p': 200.0}]))
+    assert hits == [('MSFT', 'S1', False)]
+    assert unarmed == ['TSLA']
+    assert control == [{'T': 'success', 'msg': 'authenticated'}]
+
+    assert pipeline.feed(json.dumps({'T': 't', 'S': 'AAPL', 'p': 111.0})) == 1
+    assert hits[-1] == ('AAPL', 'R1', True)
+    assert (pipeline.frames, pipeline.messages) == (2, 5)
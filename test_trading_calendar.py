@@ -0,0 +1,51 @@
+import asyncio
+from datetime import date, datetime, timezone
+
+from trading_calendar import TradingCalendar, load_calendar
+
+# Thanksgiving week 2024: closed Thursday, early close Friday
+RAW = [
+    {'date': '2024-11-22', 'open': '09:30', 'close': '16:00'},
+    {'date': '2024-11-25', 'open': '09:30', 'close': '16:00'},
+    {'date': '2024-11-26', 'open': '09:30', 'close': '16:00'},
+    {'date': '2024-11-27', 'open': '09:30', 'close': '16:00'},
+    {'date': '2024-11-29', 'open': '09:30', 'close': '13:00'},
+    {'date': '2024-12-02', 'open': '09:30', 'close': '16:00'},
+]
+
+
+def test_sessions_skip_weekends_and_holidays():
+    calendar = TradingCalendar.from_alpaca(RAW)
+    assert calendar.previous_session(date(2024, 11, 29)) == date(2024, 11, 27)
+    assert calendar.previous_session(date(2024, 11, 28)) == date(2024, 11, 27)
+    assert calendar.previous_session(date(2024, 12, 1)) == date(2024, 11, 29)
+    assert calendar.previous_session(date(2024, 12, 2)) == date(2024, 11, 29)
+    assert calendar.next_session(date(2024, 11, 27)) == date(2024, 11, 29)
+    assert not calendar.is_session(date(2024, 11, 28))
+    assert calendar.session(date(2024, 11, 28)) is None
+
+    opens, closes = calendar.session(date(2024, 11, 29))
+    assert opens == datetime(2024, 11, 29, 14, 30, tzinfo=timezone.utc)
+    assert closes == datetime(2024, 11, 29, 18, 0, tzinfo=timezone.utc)  # early close
+    assert calendar.is_open(datetime(2024, 11, 29, 17, 59, tzinfo=timezone.utc).timestamp())
+    assert not calendar.is_open(datetime(2024, 11, 29, 18, 0, tzinfo=timezone.utc).timestamp())
+    assert not calendar.is_open(datetime(2024, 11, 28, 15, 0, tzinfo=timezone.utc).timestamp())
+
+
+def test_load_calendar_fetches_once_then_uses_cache(tmp_path):
+    cache = str(tmp_path / 'calendar.json')
+    today = date(2024, 11, 26)
+    calls = []
+
+    async def fetch(api_key, api_secret, base_url, start, end):
+        calls.append((start, end))
+        return [{'date': d.isoformat(), 'open': '09:30', 'close': '16:00'}
+                for d, _, _ in TradingCalendar.weekdays(start, end).sessions
+                if d != date(2024, 11, 28)]
+
+    first = asyncio.run(load_calendar('k', 's', 'https://paper-api.alpaca.markets', cache, today, fetch))
+    second = asyncio.run(load_calendar('k', 's', 'https://paper-api.alpaca.markets', cache, today, fetch))
+
+    assert len(calls) == 1
+    assert second.sessions == first.sessions
+    assert second.previous_session(date(2024, 11, 29)) == date(2024, 11, 27)
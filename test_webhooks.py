@@ -0,0 +1,176 @@
+import asyncio
+import json
+from collections import namedtuple
+
+from aiohttp import web
+
+from dispatcher import Dispatcher
+from webhooks import WebhookFanout, WebhookRoute, load_routes
+
+Alert = namedtuple('Alert', ['symbol', 'level'])
+
+
+def render(alerts):
+    return ', '.join(f"{a.symbol} {a.level}" for a in alerts), [{'title': f"{len(alerts)} alerts"}]
+
+
+async def webhook_server(handler):
+    app = web.Application()
+    app.router.add_post('/api/webhooks/{id}/{token}', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    return runner, site._server.sockets[0].getsockname()[1]
+
+
+def test_routes_expand_guilds_and_channels(tmp_path):
+    spec = json.dumps([
+        {'guild': 'A', 'channel': 'pivots', 'webhook': 'https://x/1'},
+        {'guild': 'B', 'symbols': ['aapl', 'MSFT'], 'channels': [
+            {'channel': 'big', 'webhook': 'https://x/2'},
+            {'channel': 'tsla', 'webhook': 'https://x/3', 'symbols': ['TSLA']}]},
+    ])
+    path = tmp_path / 'routes.json'
+    path.write_text(spec)
+    routes = load_routes(str(path))
+    assert routes == load_routes(spec)
+    assert [(r.name, r.symbols) for r in routes] == [
+        ('A/#pivots', None), ('B/#big', frozenset({'AAPL', 'MSFT'})), ('B/#tsla', frozenset({'TSLA'}))]
+    assert routes[0].wants('NVDA') and not routes[2].wants('AAPL')
+
+
+def test_alerts_fan_out_in_parallel_with_symbol_filters():
+    received = {}
+    state = {'rate_limited': 0, 'in_flight': 0, 'peak': 0}
+
+    async def handler(request):
+        channel = request.match_info['id']
+        state['in_flight'] += 1
+        state['peak'] = max(state['peak'], state['in_flight'])
+        await asyncio.sleep(0.05)
+        state['in_flight'] -= 1
+        if channel == 'broken':
+            return web.Response(status=404, text='Unknown Webhook')
+        if channel == 'busy' and not state['rate_limited']:
+            state['rate_limited'] += 1
+            return web.json_response({'retry_after': 0.05}, status=429)
+        received.setdefault(channel, []).append(await request.json())
+        return web.Response(status=204, headers={'X-RateLimit-Limit': '5', 'X-RateLimit-Remaining': '4',
+                                                 'X-RateLimit-Reset-After': '2'})
+
+    async def scenario():
+        runner, port = await webhook_server(handler)
+        url = f"http://127.0.0.1:{port}/api/webhooks"
+        routes = [WebhookRoute(f"g{i}", 'pivots', f"{url}/all{i}/t", None) for i in range(20)]
+        routes += [WebhookRoute('g', 'apple', f"{url}/apple/t", frozenset({'AAPL'})),
+                   WebhookRoute('g', 'energy', f"{url}/energy/t", frozenset({'XOM'})),
+                   WebhookRoute('g', 'busy', f"{url}/busy/t", None),
+                   WebhookRoute('g', 'broken', f"{url}/broken/t", None)]
+        fanout = WebhookFanout(routes, render, username='bot')
+        dispatcher = Dispatcher(fanout.send, render, window=0.01, send_alerts=fanout.send_alerts)
+        task = asyncio.create_task(dispatcher.run())
+        try:
+            await asyncio.sleep(0)
+            dispatcher.submit_alert(Alert('AAPL', 'R1'))
+            dispatcher.submit_alert(Alert('MSFT', 'S1'))
+            while dispatcher.stats()['sent'] < 1:
+                await asyncio.sleep(0.01)
+        finally:
+            task.cancel()
+            await fanout.close()
+            await runner.cleanup()
+        return fanout.stats(), dispatcher.stats()
+
+    stats, dispatch_stats = asyncio.run(asyncio.wait_for(scenario(), 10))
+    assert stats == {'routes': 24, 'sent': 22, 'failed': 1, 'dropped': 0, 'alerts_delivered': 43, 'pending': 0,
+                     'rate_limited_seconds': stats['rate_limited_seconds']}
+    assert stats['rate_limited_seconds'] >= 0.05 and dispatch_stats['alerts_sent'] == 2
+    assert state['peak'] > 10  # posted concurrently, not one channel after another
+    assert [m['content'] for m in received['all0']] == ['AAPL R1, MSFT S1']
+    assert received['all0'][0]['username'] == 'bot' and received['all0'][0]['embeds'] == [{'title': '2 alerts'}]
+    assert [m['content'] for m in received['apple']] == ['AAPL R1']
+    assert 'energy' not in received and len(received['busy']) == 1
+
+
+def test_a_slow_channel_does_not_hold_up_the_others():
+    received = []
+
+    async def handler(request):
+        if request.match_info['id'] == 'slow':
+            await asyncio.sleep(1.0)
+        else:
+            received.append((await request.json())['content'])
+        return web.Response(status=204)
+
+    async def scenario():
+        runner, port = await webhook_server(handler)
+        url = f"http://127.0.0.1:{port}/api/webhooks"
+        fanout = WebhookFanout([WebhookRoute('g', 'slow', f"{url}/slow/t", None),
+                                WebhookRoute('g', 'fast', f"{url}/fast/t", None)], render, round_timeout=0.1)
+        try:
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            for i in range(3):
+                await fanout.send_alerts([Alert('AAPL', f"R{i}")])
+            elapsed = loop.time() - started
+            stats = fanout.stats()
+        finally:
+            await fanout.close()
+            await runner.cleanup()
+        return elapsed, stats
+
+    elapsed, stats = asyncio.run(asyncio.wait_for(scenario(), 10))
+    assert elapsed < 0.8 and received == ['AAPL R0', 'AAPL R1', 'AAPL R2']
+    assert stats['pending'] == 2 and stats['failed'] == 0
+
+
+def test_a_round_every_channel_rejected_counts_as_failed():
+    async def handler(request):
+        return web.Response(status=404, text='Unknown Webhook')
+
+    async def scenario():
+        runner, port = await webhook_server(handler)
+        url = f"http://127.0.0.1:{port}/api/webhooks"
+        fanout = WebhookFanout([WebhookRoute('g', f"c{i}", f"{url}/c{i}/t", None) for i in range(3)], render)
+        dispatcher = Dispatcher(fanout.send, render, window=0.01, send_alerts=fanout.send_alerts)
+        task = asyncio.create_task(dispatcher.run())
+        try:
+            await asyncio.sleep(0)
+            dispatcher.submit_alert(Alert('AAPL', 'R1'))
+            while dispatcher.stats()['failed'] < 1:
+                await asyncio.sleep(0.01)
+        finally:
+            task.cancel()
+            await fanout.close()
+            await runner.cleanup()
+        return fanout.stats(), dispatcher.stats()
+
+    stats, dispatch_stats = asyncio.run(asyncio.wait_for(scenario(), 10))
+    assert stats['failed'] == 3 and stats['alerts_delivered'] == 0
+    assert dispatch_stats['failed'] == 1 and dispatch_stats['alerts_sent'] == 0
+
+
+def test_routes_sharing_a_webhook_keep_their_own_filters():
+    received = []
+
+    async def handler(request):
+        received.append((await request.json())['content'])
+        return web.Response(status=204)
+
+    async def scenario():
+        runner, port = await webhook_server(handler)
+        url = f"http://127.0.0.1:{port}/api/webhooks/shared/t"
+        fanout = WebhookFanout([WebhookRoute('g', 'apple', url, frozenset({'AAPL'})),
+                                WebhookRoute('g', 'tesla', url, frozenset({'TSLA'}))], render)
+        try:
+            await fanout.send_alerts([Alert('AAPL', 'R1'), Alert('TSLA', 'S1')])
+            stats = fanout.stats()
+        finally:
+            await fanout.close()
+            await runner.cleanup()
+        return stats, fanout.route_stats
+
+    stats, route_stats = asyncio.run(asyncio.wait_for(scenario(), 10))
+    assert sorted(received) == ['AAPL R1', 'TSLA S1']
+    assert stats['alerts_delivered'] == 2 and route_stats == [{'sent': 1, 'failed': 0}, {'sent': 1, 'failed': 0}]
@@ -0,0 +1,132 @@
+import json
+import time
+
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    loads = json.loads
+
+
+def decode_frame(raw):
+    """Decode one websocket frame into a list of message dicts"""
+    data = loads(raw)
+    return data if isinstance(data, list) else [data]
+
+
+def latest_prices(messages, watched, ticks=None, quote_ticks=False, trade_prices=True):
+    """
+    Group quote ('q') and trade ('t') messages by symbol.
+
+    Returns ({symbol: latest price}, {symbol: stream timestamp of that price},
+    [control messages]). Quotes are priced at the bid/ask midpoint; quotes
+    with a missing side, non-positive trades and symbols outside `watched` are
+    dropped. Anything that is not a quote or a trade (auth/subscription acks,
+    errors) is returned as a control message.
+
+    If `ticks` is a list, every kept trade is appended to it as (symbol,
+    price, size, timestamp), and with `quote_ticks` every kept quote too, with
+    size 0. Without `trade_prices`, trades only go to `ticks` and the latest
+    prices come from quotes alone.
+    """
+    prices = {}
+    times = {}
+    control = []
+    for msg in messages:
+        msg_type = msg.get('T')
+        if msg_type == 'q':
+            symbol = msg.get('S')
+            if symbol in watched:
+                ask_price = msg.get('ap', 0)
+                bid_price = msg.get('bp', 0)
+                if ask_price > 0 and bid_price > 0:
+                    prices[symbol] = (ask_price + bid_price) / 2
+                    times[symbol] = msg.get('t')
+                    if quote_ticks and ticks is not None:
+                        ticks.append((symbol, prices[symbol], 0, times[symbol]))
+        elif msg_type == 't':
+            symbol = msg.get('S')
+            if symbol in watched:
+                price = msg.get('p', 0)
+                if price > 0:
+                    if trade_prices:
+                        prices[symbol] = price
+                        times[symbol] = msg.get('t')
+                    if ticks is not None:
+                        ticks.append((symbol, price, msg.get('s', 0), msg.get('t')))
+        else:
+            control.append(msg)
+    return prices, times, control
+
+
+class TickPipeline:
+    """
+    Batch path from raw websocket frames to level hits.
+
+    Each frame is decoded once, reduced to the latest price per symbol, and
+    the armed symbols are evaluated against the LevelBook in one vectorized
+    step. Callbacks:
+    - on_hit(symbol, price, hit, tick_time) for every LevelHit
+    - on_unarmed(symbol, price) for watched symbols without pivots yet
+    - on_control(msg) for non-market-data messages
+
+    With a PriceCache, every frame's latest prices are stored in it too, so
+    readers never need REST for a symbol the stream is already pricing. With
+    a BarAggregator, every trade (and with `bar_quotes` every quote) of the
+    frame is folded into its bars. Without `trade_prices`, trades feed only
+    the bars, so alerts and the PriceCache follow one price source (quote
+    midpoints) even when trades are subscribed. With a TickHistory, each
+    frame's latest prices are sampled into it before the crossing check.
+    """
+
+    def __init__(self, book, watched, on_hit, on_unarmed=None, on_control=None, price_cache=None,
+                 clock=time.time, bars=None, bar_quotes=False, history=None, trade_prices=True):
+        self.book = book
+        self.watched = watched
+        self.on_hit = on_hit
+        self.on_unarmed = on_unarmed
+        self.on_control = on_control
+        self.price_cache = price_cache
+        self.clock = clock
+        self.bars = bars
+        self.bar_quotes = bar_quotes
+        self.history = history
+        self.trade_prices = trade_prices
+        self.frames = 0
+        self.messages = 0
+
+    def feed(self, raw):
+        """Process one raw frame; returns the number of messages it contained"""
+        messages = decode_frame(raw)
+        self.frames += 1
+        self.messages += len(messages)
+
+        ticks = [] if self.bars is not None else None
+        prices, times, control = latest_prices(messages, self.watched, ticks, self.bar_quotes, self.trade_prices)
+        if control and self.on_control:
+            for msg in control:
+                self.on_control(msg)
+        if ticks:
+            self.bars.add_many(ticks)
+        if not prices:
+            return len(messages)
+        now = self.clock()
+        if self.price_cache is not None:
+            self.price_cache.update_many(prices, times, now)
+        if self.history is not None:
+            self.history.record_many(prices, now)
+
+        book = self.book
+        symbols = []
+        values = []
+        for symbol, price in prices.items():
+            if symbol in book:
+                symbols.append(symbol)
+                values.append(price)
+            elif self.on_unarmed:
+                self.on_unarmed(symbol, price)
+
+        if symbols:
+            for symbol, price, hit in book.check_many(symbols, values):
+                self.on_hit(symbol, price, hit, times[symbol])
+        return len(messages)
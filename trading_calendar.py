@@ -0,0 +1,165 @@
+import json
+import logging
+import os
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import aiohttp
+
+from market_data import AlpacaDataError
+
+log = logging.getLogger('pivotbot.calendar')
+
+MARKET_TZ = ZoneInfo('America/New_York')
+CALENDAR_CACHE = 'data/calendar.json'
+# Fetch this far around today; the cache is reused until it stops covering
+# MIN_COVERAGE on either side, i.e. roughly once a year.
+FETCH_DAYS = 365
+MIN_COVERAGE = timedelta(days=7)
+
+
+def market_today(now=None):
+    """Today's date on the exchange clock"""
+    return datetime.fromtimestamp(now, MARKET_TZ).date() if now is not None else datetime.now(MARKET_TZ).date()
+
+
+def _api_root(base_url):
+    base_url = base_url.rstrip('/')
+    return base_url if base_url.endswith('/v2') else f"{base_url}/v2"
+
+
+async def fetch_calendar(api_key, api_secret, base_url, start, end):
+    """Fetch raw session dicts (`date`, `open`, `close`) from the trading API's /v2/calendar"""
+    headers = {'APCA-API-KEY-ID': api_key, 'APCA-API-SECRET-KEY': api_secret}
+    params = {'start': start.isoformat(), 'end': end.isoformat()}
+    async with aiohttp.ClientSession(headers=headers) as session:
+        async with session.get(f"{_api_root(base_url)}/calendar", params=params) as response:
+            if response.status != 200:
+                raise AlpacaDataError(response.status, await response.text())
+            return await response.json()
+
+
+class TradingCalendar:
+    """
+    Exchange sessions between `start` and `end` with O(1) lookups.
+
+    Every calendar day in the range maps to the index of the last session on
+    or before it, so previous/next session, session hours and "is the market
+    open" are dict lookups rather than date arithmetic that ignores holidays.
+    Sessions are (date, open, close) with aware UTC datetimes; early closes
+    come straight from the calendar.
+    """
+
+    def __init__(self, sessions, start=None, end=None):
+        sessions = sorted(sessions)
+        self.sessions = sessions
+        self.start = start or (sessions[0][0] if sessions else date.today())
+        self.end = end or (sessions[-1][0] if sessions else date.today())
+        self._by_date = {s[0]: i for i, s in enumerate(sessions)}
+        self._floor = {}
+        i = -1
+        day = self.start
+        while day <= self.end:
+            if day in self._by_date:
+                i = self._by_date[day]
+            self._floor[day] = i
+            day += timedelta(days=1)
+
+    @classmethod
+    def from_alpaca(cls, raw, start=None, end=None):
+        sessions = []
+        for entry in raw:
+            day = date.fromisoformat(entry['date'])
+            opens = datetime.combine(day, dt_time.fromisoformat(entry['open']), MARKET_TZ)
+            closes = datetime.combine(day, dt_time.fromisoformat(entry['close']), MARKET_TZ)
+            sessions.append((day, opens.astimezone(timezone.utc), closes.astimezone(timezone.utc)))
+        return cls(sessions, start, end)
+
+    @classmethod
+    def weekdays(cls, start, end):
+        """Fallback calendar with a 9:30-16:00 session every weekday and no holidays"""
+        raw = []
+        day = start
+        while day <= end:
+            if day.weekday() < 5:
+                raw.append({'date': day.isoformat(), 'open': '09:30', 'close': '16:00'})
+            day += timedelta(days=1)
+        return cls.from_alpaca(raw, start, end)
+
+    def covers(self, day):
+        return self.start <= day <= self.end
+
+    def _floor_index(self, day):
+        try:
+            return self._floor[day]
+        except KeyError:
+            raise ValueError(f"{day} is outside the cached calendar ({self.start} to {self.end})") from None
+
+    def is_session(self, day):
+        return day in self._by_date
+
+    def session(self, day):
+        """(open, close) as aware UTC datetimes, or None if the market is closed that day"""
+        i = self._by_date.get(day)
+        return None if i is None else self.sessions[i][1:]
+
+    def previous_session(self, day):
+        """The last session strictly before `day`"""
+        i = self._floor_index(day)
+        if i >= 0 and self.sessions[i][0] == day:
+            i -= 1
+        if i < 0:
+            raise ValueError(f"No session before {day} in the cached calendar")
+        return self.sessions[i][0]
+
+    def next_session(self, day):
+        """The first session strictly after `day`"""
+        i = self._floor_index(day) + 1
+        if i >= len(self.sessions):
+            raise ValueError(f"No session after {day} in the cached calendar")
+        return self.sessions[i][0]
+
+    def is_open(self, now=None):
+        """True during regular trading hours; `now` is a unix timestamp (default: current time)"""
+        current = datetime.now(timezone.utc) if now is None else datetime.fromtimestamp(now, timezone.utc)
+        hours = self.session(current.astimezone(MARKET_TZ).date())
+        return hours is not None and hours[0] <= current < hours[1]
+
+    def save(self, path):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        raw = [{'date': d.isoformat(),
+                'open': o.astimezone(MARKET_TZ).strftime('%H:%M'),
+                'close': c.astimezone(MARKET_TZ).strftime('%H:%M')} for d, o, c in self.sessions]
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'start': self.start.isoformat(), 'end': self.end.isoformat(), 'sessions': raw}, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load_cached(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        return cls.from_alpaca(data['sessions'], date.fromisoformat(data['start']), date.fromisoformat(data['end']))
+
+
+async def load_calendar(api_key, api_secret, base_url, cache_path=CALENDAR_CACHE, today=None, fetch=fetch_calendar):
+    """
+    Return a TradingCalendar around `today`, from the local cache when it
+    still covers today, otherwise fetched once from Alpaca and cached.
+    """
+    today = today or market_today()
+    try:
+        calendar = TradingCalendar.load_cached(cache_path)
+        if calendar.covers(today - MIN_COVERAGE) and calendar.covers(today + MIN_COVERAGE):
+            return calendar
+    except (OSError, ValueError, KeyError):
+        pass
+
+    start = today - timedelta(days=FETCH_DAYS)
+    end = today + timedelta(days=FETCH_DAYS)
+    raw = await fetch(api_key, api_secret, base_url, start, end)
+    calendar = TradingCalendar.from_alpaca(raw, start, end)
+    calendar.save(cache_path)
+    log.info("📅 Cached %d trading sessions from %s to %s", len(calendar.sessions), start, end)
+    return calendar
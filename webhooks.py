@@ -0,0 +1,251 @@
+import asyncio
+import json
+import logging
+from collections import namedtuple
+
+import aiohttp
+
+from dispatcher import RateLimitBucket
+
+log = logging.getLogger('pivotbot.webhooks')
+
+# Discord lets each webhook execute 5 times per 2 seconds
+WEBHOOK_RATE_LIMIT = 5
+WEBHOOK_RATE_PERIOD = 2.0
+MAX_CONNECTIONS = 32
+MAX_RETRIES = 3
+
+
+class WebhookError(Exception):
+    """Raised when Discord rejects a webhook execution"""
+
+    def __init__(self, status, text):
+        super().__init__(f"Discord webhook error {status}: {text}")
+        self.status = status
+        self.text = text
+
+
+class WebhookRoute(namedtuple('WebhookRoute', ['guild', 'channel', 'url', 'symbols'])):
+    """One alert destination; `symbols` is a frozenset filter, or None for every symbol"""
+
+    __slots__ = ()
+
+    @property
+    def name(self):
+        return f"{self.guild}/#{self.channel}" if self.guild else f"#{self.channel}"
+
+    def wants(self, symbol):
+        return self.symbols is None or symbol in self.symbols
+
+
+def load_routes(spec):
+    """
+    Parse ALERT_ROUTES: inline JSON or the path of a JSON file holding a list
+    of routes. Each route has a `webhook` URL and optional `guild`, `channel`
+    and `symbols`; a guild entry may instead list its `channels`, which
+    inherit the guild's name and symbol filter unless they set their own.
+    """
+    text = spec.strip()
+    if not text.startswith('['):
+        with open(text) as f:
+            text = f.read()
+    routes = []
+    for entry in json.loads(text):
+        for channel in entry.get('channels', [entry]):
+            route = {**entry, **channel}
+            if not route.get('webhook'):
+                raise ValueError(f"Alert route without a webhook URL: {channel}")
+            symbols = route.get('symbols')
+            routes.append(WebhookRoute(route.get('guild'), route.get('channel') or route.get('name', 'webhook'),
+                                       route['webhook'],
+                                       frozenset(s.strip().upper() for s in symbols) if symbols else None))
+    return routes
+
+
+def embed_dict(embed):
+    """A discord.Embed (or an already serialized embed) as webhook JSON"""
+    return embed.to_dict() if hasattr(embed, 'to_dict') else embed
+
+
+class WebhookFanout:
+    """
+    Dispatcher sender that delivers to many Discord channels through webhooks.
+
+    Every route has its own queue and worker task, and all of them post over
+    one pooled aiohttp session (at most `max_connections` sockets), so a
+    round reaching dozens of channels takes about one round trip and never
+    queues behind the gateway connection. Each webhook follows its own
+    RateLimitBucket, fed by its response headers; a 429 pauses only that
+    webhook's workers, which retry up to `retries` times. A slow or
+    rate-limited channel therefore only delays its own later messages.
+    Queues and counters belong to each route, so two routes sharing a URL
+    with different symbol filters stay separate; they share the URL's
+    bucket, since Discord limits the webhook, not the route.
+    Messages for a route with `max_pending` posts already queued are dropped
+    and counted as failed.
+
+    `send(content, embeds)` posts the same message to every route.
+    `send_alerts(alerts)` gives each route only the alerts for its symbols,
+    rendering every distinct subset once through
+    `render_alerts(alerts) -> (content, embeds)`. Both queue the posts and
+    wait at most `round_timeout` seconds for them. If every route has failed
+    by then, they raise WebhookError so the dispatcher counts the failure
+    (and splits a batch every route rejected as too large). Delivered alerts
+    and failed posts are counted per route.
+    """
+
+    def __init__(self, routes, render_alerts, max_connections=MAX_CONNECTIONS, retries=MAX_RETRIES,
+                 username=None, timeout=10.0, round_timeout=2.0, max_pending=100):
+        self.routes = list(routes)
+        self.render_alerts = render_alerts
+        self.max_connections = max_connections
+        self.retries = retries
+        self.username = username
+        self.timeout = timeout
+        self.round_timeout = round_timeout
+        self.max_pending = max_pending
+        self.buckets = {route.url: RateLimitBucket(WEBHOOK_RATE_LIMIT, WEBHOOK_RATE_PERIOD) for route in self.routes}
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.alerts_delivered = 0
+        self.rate_limited_seconds = 0.0
+        self.route_stats = [{'sent': 0, 'failed': 0} for _ in self.routes]
+        self._session = None
+        self._queues = []
+        self._workers = []
+
+    def _ensure_session(self):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.max_connections),
+                                                  timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._session
+
+    def _ensure_workers(self):
+        if self._workers:
+            return
+        loop = asyncio.get_running_loop()
+        self._queues = [asyncio.Queue() for _ in self.routes]
+        self._workers = [loop.create_task(self._work(i)) for i in range(len(self.routes))]
+
+    async def close(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queues = []
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def routes_for(self, symbol):
+        return [route for route in self.routes if route.wants(symbol)]
+
+    def stats(self):
+        return {
+            'routes': len(self.routes),
+            'sent': self.sent,
+            'failed': self.failed,
+            'dropped': self.dropped,
+            'alerts_delivered': self.alerts_delivered,
+            'pending': sum(queue.qsize() for queue in self._queues),
+            'rate_limited_seconds': round(self.rate_limited_seconds, 3),
+        }
+
+    def _payload(self, content, embeds):
+        payload = {'embeds': [embed_dict(embed) for embed in embeds or []], 'allowed_mentions': {'parse': []}}
+        if content:
+            payload['content'] = content
+        if self.username:
+            payload['username'] = self.username
+        return payload
+
+    async def send(self, content=None, embeds=None):
+        """Post one message to every route"""
+        payload = self._payload(content, embeds)
+        await self._round([(i, payload, 0) for i in range(len(self.routes))])
+
+    async def send_alerts(self, alerts):
+        """Post each route the alerts matching its symbol filter"""
+        everything = tuple(range(len(alerts)))
+        payloads = {}
+        posts = []
+        for i, route in enumerate(self.routes):
+            picked = everything if route.symbols is None else tuple(
+                i for i, alert in enumerate(alerts) if alert.symbol in route.symbols)
+            if not picked:
+                continue
+            payload = payloads.get(picked)
+            if payload is None:
+                payload = payloads[picked] = self._payload(*self.render_alerts([alerts[i] for i in picked]))
+            posts.append((i, payload, len(picked)))
+        await self._round(posts)
+
+    async def _round(self, posts):
+        """Queue (route index, payload, alert count) posts; raise if all of them failed within round_timeout"""
+        if not posts:
+            return None
+        self._ensure_workers()
+        loop = asyncio.get_running_loop()
+        futures = []
+        for index, payload, alerts in posts:
+            future = loop.create_future()
+            queue = self._queues[index]
+            if queue.qsize() >= self.max_pending:
+                self.dropped += 1
+                self._failed(index, f"{queue.qsize()} posts already pending")
+                future.set_result(None)
+            else:
+                queue.put_nowait((payload, alerts, future))
+            futures.append(future)
+        done, _ = await asyncio.wait(futures, timeout=self.round_timeout)
+        statuses = [future.result() for future in done]
+        if len(done) == len(futures) and all(status is None or status >= 400 for status in statuses):
+            raise WebhookError(statuses[0] if len(set(statuses)) == 1 else None,
+                               f"all {len(statuses)} webhook posts failed")
+        return None
+
+    async def _work(self, index):
+        queue = self._queues[index]
+        while True:
+            payload, alerts, future = await queue.get()
+            status = await self._post(index, payload)
+            if status is not None and status < 400:
+                self.alerts_delivered += alerts
+            if not future.done():
+                future.set_result(status)
+
+    def _failed(self, index, error):
+        route = self.routes[index]
+        self.failed += 1
+        self.route_stats[index]['failed'] += 1
+        log.error("❌ Webhook post to %s failed: %s", route.name, error, extra={'route': route.name})
+
+    async def _post(self, index, payload):
+        """Execute route `index`'s webhook, waiting out its rate limit; returns the final status (None: no response)"""
+        route = self.routes[index]
+        session = self._ensure_session()
+        bucket = self.buckets[route.url]
+        status = None
+        try:
+            for _ in range(self.retries + 1):
+                self.rate_limited_seconds += await bucket.acquire()
+                async with session.post(route.url, json=payload) as response:
+                    status = response.status
+                    bucket.update(response.headers)
+                    if response.status == 429:
+                        try:
+                            retry_after = float((await response.json(content_type=None))['retry_after'])
+                        except (ValueError, KeyError, TypeError):
+                            retry_after = float(response.headers.get('Retry-After', WEBHOOK_RATE_PERIOD))
+                        bucket.pause(retry_after)
+                        continue
+                    if response.status >= 400:
+                        raise WebhookError(response.status, await response.text())
+                    self.sent += 1
+                    self.route_stats[index]['sent'] += 1
+                    return status
+            raise WebhookError(429, f"still rate limited after {self.retries + 1} attempts")
+        except Exception as e:
+            self._failed(index, e)
+            return status